@@ -0,0 +1,667 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+
+Module blackjack estimates the expected value of blackjack strategies by
+simulating very many hands.
+
+Blackjack cares only for the point value of a card, so the shoe holds the
+Card.point_count() of each card (the Ace counting 11) rather than Card
+objects, and dealing is taking the next int from a list. A Shoe of several
+decks is shuffled when it has been dealt past its penetration, never
+between hands, so a card-counting policy has something to count.
+
+The rules simulated are the common multi-deck ones: the dealer stands on
+soft 17 and peeks for blackjack, blackjack pays 3 to 2, the player may
+double on any first two cards, and may split a pair once, doubling after a
+split allowed; split Aces take one card each. There is no surrender or
+insurance.
+
+Policies:
+
+    BasicStrategy() plays the standard basic strategy for these rules and
+    always bets one unit.
+
+    HiLoCounter( ramp ) plays basic strategy but bets according to the
+    Hi-Lo true count, the running count (+1 for 2-6, -1 for tens and Aces)
+    divided by the decks left in the shoe.
+
+simulate( policy, rounds ) plays rounds of one hand each in chunks spread
+over a pool of worker processes. Each chunk keeps a Stats object, a running
+mean and variance (Welford's method), and the chunks' Stats are merged as
+they arrive, so nothing is stored per hand.
+
+    stats = simulate( HiLoCounter(), 10**8, decks=6 )
+    print( stats.ev(), stats.stderr() )
+
+A SharedShoe is one shoe that many threads deal from at once, as players
+at one table share a shoe. Each thread deals through its own ShoeView,
+which has the methods of a Shoe, so play_round() and the policies take it
+as they are. A view takes a block of places in the shoe at a time, moving
+the shared cursor under a lock held only for that, and then deals its
+block with no lock at all. Each shuffle of the shoe is an epoch, a tuple
+of values that is never changed; a reshuffle makes a new epoch, so a block
+taken from the old one is still good, and of several threads that find
+the shoe past its cut at once only the first reshuffles it.
+simulate_shared( policy, rounds, threads ) plays rounds on one SharedShoe
+from several threads. Threads run in parallel only on a free-threaded
+(no GIL) build of Python; elsewhere they take turns.
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+from __future__ import annotations
+
+__all__ = [ 'Shoe', 'SharedShoe', 'ShoeView', 'Stats', 'BasicStrategy',
+            'HiLoCounter', 'play_round', 'simulate', 'simulate_shared' ]
+
+from suit_card_deck import Card
+import math
+import multiprocessing
+import random
+import threading
+from typing import List, Sequence, Tuple
+
+# point values of the 52 cards of one deck, in position order
+DECK_POINTS = tuple( Card( p ).point_count() for p in range(52) )
+# Hi-Lo count tag by point value, index 0..11
+HILO_TAGS = ( 0, 0, 1, 1, 1, 1, 1, 0, 0, 0, -1, -1 )
+
+class Shoe() :
+    '''
+    Several decks of card point values, dealt in shuffled order.
+
+    Shoe( decks=6, penetration=0.75, seed=None ) is shuffled with its own
+    random.Random( seed ).
+
+    deal() -> int, the point value of the next card, 2..11; if the shoe
+        runs out in the middle of a round it is shuffled then
+
+    needs_shuffle() -> bool, True when the penetration has been passed
+
+    shuffle() starts a new shoe and resets the count
+
+    running_count: the Hi-Lo count of the cards dealt since the shuffle
+
+    true_count() -> float, running_count per deck remaining
+    '''
+
+    __slots__ = ( 'decks', '_values', '_next', '_cut', '_random', 'running_count' )
+
+    def __init__( self, decks:int = 6, penetration:float = 0.75, seed:int = None ) :
+        if not 0 < penetration <= 1 :
+            raise ValueError( 'penetration must be above 0 and at most 1' )
+        self.decks = decks
+        self._values = list( DECK_POINTS ) * decks
+        self._cut = int( len( self._values ) * penetration )
+        self._random = random.Random( seed )
+        self.shuffle()
+
+    def shuffle( self ) :
+        self._random.shuffle( self._values )
+        self._next = 0
+        self.running_count = 0
+
+    def needs_shuffle( self ) -> bool :
+        return self._next >= self._cut
+
+    def deal( self ) -> int :
+        if self._next == len( self._values ) :
+            self.shuffle() # used up in mid-round, as SharedShoe.reserve() does
+        value = self._values[ self._next ]
+        self._next += 1
+        self.running_count += HILO_TAGS[ value ]
+        return value
+
+    def __len__( self ) -> int :
+        return len( self._values ) - self._next
+
+    def true_count( self ) -> float :
+        return self.running_count * 52 / max( 1, len( self ) )
+
+class _Epoch() :
+    '''
+    One shuffle of a SharedShoe: number counts the shuffles, values are the
+    point values in dealing order, counts[ k ] is the Hi-Lo count of the
+    first k values, cut is the place of the cut card, and next is the first
+    place not yet reserved, changed only with the shoe's lock held.
+    '''
+
+    __slots__ = ( 'number', 'values', 'counts', 'cut', 'next' )
+
+    def __init__( self, number:int, values:List[int], cut:int ) :
+        self.number = number
+        self.values = tuple( values )
+        counts = [ 0 ]
+        for value in values :
+            counts.append( counts[-1] + HILO_TAGS[ value ] )
+        self.counts = tuple( counts )
+        self.cut = cut
+        self.next = 0
+
+class SharedShoe() :
+    '''
+    A shoe of point values that many threads deal from at once.
+
+    SharedShoe( decks=6, penetration=0.75, seed=None, block=8 ) is shuffled
+    with its own random.Random( seed ). Each thread deals through its own
+    view() and never through the SharedShoe itself.
+
+    reserve( count ) -> ( epoch, start, stop ), places start to stop of the
+        current epoch, at most count of them, which no other caller gets;
+        if the epoch is used up, it is reshuffled first
+
+    reshuffle( number ) starts a new epoch if epoch number is still the
+        current one, and otherwise does nothing, so that when several
+        threads see the cut at once the shoe is shuffled once
+
+    needs_shuffle() -> bool, True when the cut card has been reached
+
+    epoch: the current _Epoch, its number the count of shuffles so far
+    '''
+
+    def __init__( self, decks:int = 6, penetration:float = 0.75,
+                  seed:int = None, block:int = 8 ) :
+        self.decks = decks
+        self.block = block
+        self._values = list( DECK_POINTS ) * decks
+        self._cut = int( len( self._values ) * penetration )
+        self._random = random.Random( seed )
+        self._lock = threading.Lock()
+        self.epoch = None
+        self._new_epoch()
+
+    def _new_epoch( self ) :
+        ''' with the lock held, or before there are views '''
+        self._random.shuffle( self._values )
+        self.epoch = _Epoch( self.epoch.number + 1 if self.epoch else 0,
+                             self._values, self._cut )
+
+    def reserve( self, count:int ) -> Tuple[_Epoch, int, int] :
+        with self._lock :
+            epoch = self.epoch
+            if epoch.next >= len( epoch.values ) :
+                self._new_epoch()
+                epoch = self.epoch
+            start = epoch.next
+            epoch.next = min( start + count, len( epoch.values ) )
+            return epoch, start, epoch.next
+
+    def reshuffle( self, number:int ) :
+        with self._lock :
+            if self.epoch.number == number :
+                self._new_epoch()
+
+    def needs_shuffle( self ) -> bool :
+        epoch = self.epoch
+        return epoch.next >= epoch.cut
+
+    def view( self ) -> ShoeView :
+        return ShoeView( self )
+
+class ShoeView() :
+    '''
+    One thread's way into a SharedShoe, with the methods of a Shoe.
+
+    deal() -> int, the next value of the block this view holds, taking a
+        new block when it is used up; a block reserved before another
+        thread reshuffled the shoe is dealt to its end first
+
+    needs_shuffle() asks the shared shoe, and shuffle() reshuffles it
+        unless it has been reshuffled since needs_shuffle() was asked, and
+        drops the rest of this view's block
+
+    running_count: the Hi-Lo count of the cards up to the last card this
+        view dealt, by whatever thread, since the shuffle of the epoch the
+        view is dealing from; 0 once its block is used up and the shoe has
+        been reshuffled
+
+    true_count() -> float, running_count per deck after that card
+    '''
+
+    __slots__ = ( 'shoe', '_epoch', '_next', '_stop', '_seen' )
+
+    def __init__( self, shoe:SharedShoe ) :
+        self.shoe = shoe
+        self._epoch = shoe.epoch
+        self._next = self._stop = 0
+        self._seen = None # the epoch that needs_shuffle() looked at
+
+    def deal( self ) -> int :
+        if self._next == self._stop :
+            self._epoch, self._next, self._stop = self.shoe.reserve( self.shoe.block )
+        value = self._epoch.values[ self._next ]
+        self._next += 1
+        return value
+
+    def needs_shuffle( self ) -> bool :
+        self._seen = epoch = self.shoe.epoch
+        return epoch.next >= epoch.cut
+
+    def shuffle( self ) :
+        self.shoe.reshuffle( ( self._seen or self.shoe.epoch ).number )
+        self._epoch = self.shoe.epoch
+        self._next = self._stop = 0 # drop the rest of the block
+
+    @property
+    def running_count( self ) -> int :
+        if self._next == self._stop and self._epoch is not self.shoe.epoch :
+            return 0
+        return self._epoch.counts[ self._next ]
+
+    def __len__( self ) -> int :
+        if self._next == self._stop and self._epoch is not self.shoe.epoch :
+            return len( self.shoe.epoch.values )
+        return len( self._epoch.values ) - self._next
+
+    def true_count( self ) -> float :
+        return self.running_count * 52 / max( 1, len( self ) )
+
+class Stats() :
+    '''
+    Running statistics of the net result of rounds.
+
+    add( net, wagered ) records one round: net units won (negative if
+    lost) and total units wagered, counting doubles and splits.
+
+    merge( other ) adds in the rounds of another Stats.
+
+    rounds, mean (net per round), variance(), stderr() of the mean,
+    wagered (total units bet), and ev(): net per unit wagered.
+    '''
+
+    __slots__ = ( 'rounds', 'mean', '_m2', 'wagered' )
+
+    def __init__( self ) :
+        self.rounds = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.wagered = 0.0
+
+    def add( self, net:float, wagered:float ) :
+        self.rounds += 1
+        delta = net - self.mean
+        self.mean += delta / self.rounds
+        self._m2 += delta * ( net - self.mean )
+        self.wagered += wagered
+
+    def merge( self, other:Stats ) :
+        if other.rounds == 0 :
+            return
+        total = self.rounds + other.rounds
+        delta = other.mean - self.mean
+        self.mean += delta * other.rounds / total
+        self._m2 += other._m2 + delta * delta * self.rounds * other.rounds / total
+        self.rounds = total
+        self.wagered += other.wagered
+
+    def variance( self ) -> float :
+        return self._m2 / ( self.rounds - 1 ) if self.rounds > 1 else 0.0
+
+    def stderr( self ) -> float :
+        return math.sqrt( self.variance() / self.rounds ) if self.rounds else 0.0
+
+    def ev( self ) -> float :
+        return self.mean * self.rounds / self.wagered if self.wagered else 0.0
+
+'''
+Basic strategy tables, dealer up card 2..11 (11 is the Ace) in columns.
+H hit, S stand, D double (else hit), X double (else stand), P split.
+'''
+
+def _row( text:str ) -> dict :
+    return { up : action for up, action in zip( range( 2, 12 ), text.split() ) }
+
+_HARD = { total : _row( 'H H H H H H H H H H' ) for total in range( 4, 9 ) }
+_HARD.update( {
+    9 :  _row( 'H D D D D H H H H H' ),
+    10 : _row( 'D D D D D D D D H H' ),
+    11 : _row( 'D D D D D D D D D H' ),
+    12 : _row( 'H H S S S H H H H H' ),
+    13 : _row( 'S S S S S H H H H H' ),
+    14 : _row( 'S S S S S H H H H H' ),
+    15 : _row( 'S S S S S H H H H H' ),
+    16 : _row( 'S S S S S H H H H H' ),
+    } )
+_SOFT = {
+    13 : _row( 'H H H D D H H H H H' ),
+    14 : _row( 'H H H D D H H H H H' ),
+    15 : _row( 'H H D D D H H H H H' ),
+    16 : _row( 'H H D D D H H H H H' ),
+    17 : _row( 'H D D D D H H H H H' ),
+    18 : _row( 'S X X X X S S H H H' ),
+    }
+_PAIRS = {
+    2 :  _row( 'P P P P P P H H H H' ),
+    3 :  _row( 'P P P P P P H H H H' ),
+    4 :  _row( 'H H H P P H H H H H' ),
+    6 :  _row( 'P P P P P H H H H H' ),
+    7 :  _row( 'P P P P P P H H H H' ),
+    8 :  _row( 'P P P P P P P P P P' ),
+    9 :  _row( 'P P P P P S P P S S' ),
+    11 : _row( 'P P P P P P P P P P' ),
+    }
+
+class BasicStrategy() :
+    '''
+    Basic strategy for multi-deck, dealer stands on soft 17, double after
+    split. Always bets one unit.
+
+    bet( shoe ) -> units to bet on the next round
+
+    action( total, soft, pair, dealer, can_double, can_split ) -> one of
+        'H', 'S', 'D', 'P': hit, stand, double or split, where total is
+        the hand's best total, soft is True if an Ace counts 11 in it,
+        pair is the point value of a pair or 0, and dealer is the point
+        value of the dealer's up card.
+    '''
+
+    def bet( self, shoe:Shoe ) -> float :
+        return 1
+
+    def action( self, total:int, soft:bool, pair:int, dealer:int,
+                can_double:bool, can_split:bool ) -> str :
+        if pair and can_split and pair in _PAIRS \
+        and _PAIRS[ pair ][ dealer ] == 'P' :
+            return 'P'
+        if soft and total in _SOFT :
+            action = _SOFT[ total ][ dealer ]
+        elif not soft and total in _HARD :
+            action = _HARD[ total ][ dealer ]
+        else :
+            action = 'S' if total >= 17 else 'H'
+        if action == 'X' :
+            return 'D' if can_double else 'S'
+        if action == 'D' and not can_double :
+            return 'H'
+        return action
+
+class HiLoCounter( BasicStrategy ) :
+    '''
+    Basic strategy, betting by the Hi-Lo true count.
+
+    HiLoCounter( ramp=( (1,2), (2,4), (3,6), (4,8) ) ): ramp is a sequence
+    of ( true count, units ) in increasing order; the bet is the units of
+    the last step whose true count is reached, or 1 below the first.
+    '''
+
+    def __init__( self, ramp:Sequence[ Tuple[float, float] ] = ( (1,2), (2,4), (3,6), (4,8) ) ) :
+        self.ramp = tuple( ramp )
+
+    def bet( self, shoe:Shoe ) -> float :
+        true_count = shoe.true_count()
+        units = 1
+        for count, step_units in self.ramp :
+            if true_count < count :
+                break
+            units = step_units
+        return units
+
+def _add( total:int, aces:int, value:int ) -> Tuple[int, int] :
+    ''' add a card to a hand total, counting Aces 11 while that does not bust '''
+    total += value
+    if value == 11 :
+        aces += 1
+    while total > 21 and aces :
+        total -= 10
+        aces -= 1
+    return total, aces
+
+def play_round( shoe:Shoe, policy:BasicStrategy ) -> Tuple[float, float] :
+    '''
+    Play one round of one player hand against the dealer. Returns ( net
+    units won, units wagered ).
+    '''
+    if shoe.needs_shuffle() :
+        shoe.shuffle()
+    bet = policy.bet( shoe )
+    first, up, second, hole = shoe.deal(), shoe.deal(), shoe.deal(), shoe.deal()
+    player_blackjack = first + second == 21
+    if up + hole == 21 : # dealer peeks
+        return ( 0.0 if player_blackjack else -bet ), bet
+    if player_blackjack :
+        return 1.5 * bet, bet
+
+    # each hand is [ total, aces, bet, cards, split ]
+    hands = [ [ 0, 0, bet, 0, False ] ]
+    for value in ( first, second ) :
+        hands[0][0], hands[0][1] = _add( hands[0][0], hands[0][1], value )
+    hands[0][3] = 2
+    pair = first if first == second else 0
+    finished = []
+    while hands :
+        hand = hands.pop()
+        total, aces, stake, cards, split = hand
+        if split and cards == 1 :
+            total, aces = _add( total, aces, shoe.deal() )
+            cards = 2
+            if pair == 11 : # split Aces take one card each
+                finished.append( ( total, stake, cards, True ) )
+                continue
+        while total < 21 :
+            action = policy.action( total, aces > 0,
+                                    pair if cards == 2 and not split else 0,
+                                    up, cards == 2, not split )
+            if action == 'S' :
+                break
+            if action == 'P' :
+                # two hands of one card each, the pair value as the total
+                single = _add( 0, 0, pair )
+                hands.append( [ single[0], single[1], stake, 1, True ] )
+                hands.append( [ single[0], single[1], stake, 1, True ] )
+                total = None
+                break
+            total, aces = _add( total, aces, shoe.deal() )
+            cards += 1
+            if action == 'D' :
+                stake *= 2
+                break
+        if total is not None :
+            finished.append( ( total, stake, cards, split ) )
+
+    wagered = sum( [ stake for total, stake, cards, split in finished ] )
+    if all( [ total > 21 for total, stake, cards, split in finished ] ) :
+        return -wagered, wagered
+    dealer, dealer_aces = _add( *_add( 0, 0, up ), hole )
+    while dealer < 17 :
+        dealer, dealer_aces = _add( dealer, dealer_aces, shoe.deal() )
+    net = 0.0
+    for total, stake, cards, split in finished :
+        if total > 21 or ( dealer <= 21 and total < dealer ) :
+            net -= stake
+        elif dealer > 21 or total > dealer :
+            net += stake
+    return net, wagered
+
+def _simulate_chunk( task:Tuple[BasicStrategy, int, int, float, int] ) -> Stats :
+    ''' play rounds with a fresh Shoe in one worker and return the Stats '''
+    policy, rounds, decks, penetration, seed = task
+    shoe = Shoe( decks, penetration, seed )
+    stats = Stats()
+    for _ in range( rounds ) :
+        net, wagered = play_round( shoe, policy )
+        stats.add( net, wagered )
+    return stats
+
+def simulate( policy:BasicStrategy, rounds:int, decks:int = 6,
+              penetration:float = 0.75, seed:int = 1,
+              workers:int = None, chunk:int = 100000 ) -> Stats :
+    '''
+    Play rounds with policy, in chunks of chunk rounds on a pool of worker
+    processes (workers defaults to the number of CPUs; 1 means play in
+    this process). Each chunk has its own shoe, seeded from seed and the
+    chunk number, so a result can be reproduced. Returns the merged Stats.
+    '''
+    tasks = [ ( policy, min( chunk, rounds - start ), decks, penetration,
+                seed * 1000003 + number )
+              for number, start in enumerate( range( 0, rounds, chunk ) ) ]
+    stats = Stats()
+    if workers == 1 :
+        for task in tasks :
+            stats.merge( _simulate_chunk( task ) )
+        return stats
+    with multiprocessing.Pool( workers ) as pool :
+        for chunk_stats in pool.imap_unordered( _simulate_chunk, tasks ) :
+            stats.merge( chunk_stats )
+    return stats
+
+def simulate_shared( policy:BasicStrategy, rounds:int, threads:int = 4,
+                     decks:int = 6, penetration:float = 0.75, seed:int = 1,
+                     block:int = 8 ) -> Stats :
+    '''
+    Play rounds with policy on one SharedShoe, split among threads, each
+    with its own ShoeView and Stats. Returns the merged Stats. The order in
+    which the threads take blocks varies, so a result cannot be repeated
+    exactly as it can with simulate().
+    '''
+    shoe = SharedShoe( decks, penetration, seed, block )
+    results = [ Stats() for _ in range( threads ) ]
+
+    def play( stats:Stats, count:int ) :
+        view = shoe.view()
+        for _ in range( count ) :
+            net, wagered = play_round( view, policy )
+            stats.add( net, wagered )
+
+    workers = [ threading.Thread( target=play,
+                                  args=( results[j], rounds // threads + ( j < rounds % threads ) ) )
+                for j in range( threads ) ]
+    for worker in workers :
+        worker.start()
+    for worker in workers :
+        worker.join()
+    stats = Stats()
+    for result in results :
+        stats.merge( result )
+    return stats
+
+'''
+Test code
+'''
+
+if __name__ == '__main__' :
+
+    assert DECK_POINTS.count( 10 ) == 16 and DECK_POINTS.count( 11 ) == 4
+    shoe = Shoe( decks=2, seed=5 )
+    assert len( shoe ) == 104
+    values = [ shoe.deal() for _ in range( 104 ) ]
+    assert sorted( values ) == sorted( DECK_POINTS * 2 )
+    assert shoe.running_count == 0 and shoe.needs_shuffle()
+    assert shoe.deal() and len( shoe ) == 103 # used up, so shuffled again
+    try :
+        Shoe( penetration=1.5 )
+        assert False
+    except ValueError :
+        pass
+    # with no cut card short of the end, rounds run past it and reshuffle
+    shoe = Shoe( decks=1, penetration=1.0, seed=2 )
+    for _ in range( 200 ) :
+        play_round( shoe, BasicStrategy() )
+
+    B = BasicStrategy()
+    assert B.action( 16, False, 0, 10, True, True ) == 'H'
+    assert B.action( 16, False, 0, 6, True, True ) == 'S'
+    assert B.action( 11, False, 0, 6, True, True ) == 'D'
+    assert B.action( 11, False, 0, 6, False, True ) == 'H'
+    assert B.action( 18, True, 0, 4, False, True ) == 'S'
+    assert B.action( 16, False, 8, 10, True, True ) == 'P'
+    assert B.action( 20, False, 10, 6, True, True ) == 'S'
+    assert B.action( 12, True, 11, 6, True, False ) == 'H'
+
+    H = HiLoCounter()
+    shoe = Shoe( decks=1, seed=1 )
+    shoe.running_count = 4 # four per deck with one deck left
+    assert H.bet( shoe ) == 8
+    shoe.running_count = -3
+    assert H.bet( shoe ) == 1
+
+    S1, S2, S3 = Stats(), Stats(), Stats()
+    data = [ 1.0, -1.0, 1.5, 0.0, -2.0, 2.0, -1.0 ]
+    for j, x in enumerate( data ) :
+        ( S1 if j < 3 else S2 ).add( x, 1 )
+        S3.add( x, 1 )
+    S1.merge( S2 )
+    assert S1.rounds == S3.rounds
+    assert abs( S1.mean - S3.mean ) < 1e-12
+    assert abs( S1.variance() - S3.variance() ) < 1e-12
+
+    stats = simulate( BasicStrategy(), 20000, workers=2, chunk=5000 )
+    assert stats.rounds == 20000
+    assert abs( stats.ev() ) < 0.05 # about -0.5%, give or take 0.8%
+    assert 1.0 < stats.variance() < 1.6
+    again = simulate( BasicStrategy(), 20000, workers=1, chunk=5000 )
+    assert abs( again.mean - stats.mean ) < 1e-9 # reproducible
+
+    # many threads dealing one shoe: every card of it is dealt once
+    import sys
+    switch = sys.getswitchinterval()
+    sys.setswitchinterval( 1e-6 ) # make the threads take turns often
+    for block in ( 1, 13 ) :
+        shared = SharedShoe( decks=6, penetration=1.0, seed=3, block=block )
+        dealt = [ [] for _ in range( 8 ) ]
+        start = threading.Barrier( 8 )
+
+        def deal_cards( cards:List[int] ) :
+            view = shared.view()
+            start.wait()
+            for _ in range( 39 ) :
+                cards.append( view.deal() )
+
+        workers = [ threading.Thread( target=deal_cards, args=( dealt[j], ) ) for j in range( 8 ) ]
+        for worker in workers :
+            worker.start()
+        for worker in workers :
+            worker.join()
+        assert shared.epoch.number == 0 and shared.epoch.next == 312
+        assert sorted( [ v for cards in dealt for v in cards ] ) == sorted( DECK_POINTS * 6 )
+        # the shoe is used up, so the next card comes from a new shuffle
+        assert shared.view().deal() and shared.epoch.number == 1
+
+    # threads that see the cut together reshuffle once
+    shared = SharedShoe( decks=1, penetration=0.5, seed=4 )
+    view = shared.view()
+    seen = []
+    while not view.needs_shuffle() :
+        seen.append( view.deal() )
+    count = sum( [ HILO_TAGS[ v ] for v in seen ] )
+    assert view.running_count == count
+    old = shared.epoch
+    start = threading.Barrier( 6 )
+
+    def reshuffle() :
+        view = shared.view()
+        start.wait()
+        if view.needs_shuffle() :
+            view.shuffle()
+
+    workers = [ threading.Thread( target=reshuffle ) for _ in range( 6 ) ]
+    for worker in workers :
+        worker.start()
+    for worker in workers :
+        worker.join()
+    assert shared.epoch.number == 1 and not shared.needs_shuffle()
+    # the view deals out the block it reserved from the old epoch, then
+    # moves to the new one
+    assert view.running_count == count and len( view ) == 52 - len( seen )
+    held = view._stop - view._next
+    assert 0 < held < shared.block
+    assert [ view.deal() for _ in range( held ) ] == list( old.values[ len( seen ) : view._stop ] )
+    assert view.running_count == 0 and len( view ) == 52
+    view.deal()
+    assert view._epoch is shared.epoch and view.running_count == shared.epoch.counts[1]
+    # a view that reshuffles itself drops its block at once
+    view.needs_shuffle()
+    view.shuffle()
+    assert shared.epoch.number == 2 and view.running_count == 0 and len( view ) == 52
+    sys.setswitchinterval( switch )
+
+    stats = simulate_shared( BasicStrategy(), 20000, threads=4, block=4 )
+    assert stats.rounds == 20000
+    assert abs( stats.ev() ) < 0.05
+    assert 1.0 < stats.variance() < 1.6
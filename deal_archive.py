@@ -0,0 +1,281 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+
+Module deal_archive stores many shuffled deals in one file and reads them
+back without unpickling or building Card objects.
+
+The file format is an eight-byte signature, b'CardzDA1', followed by any
+number of 52-byte records. Each record is one deal: the positions (0..51)
+of the cards in the sequence they are dealt, that is, the _access array of
+a shuffled Deck. Record i starts at byte 8 + 52*i.
+
+Writing:
+
+    with DealWriter( 'deals.cdz' ) as writer :
+        for j in range(1000000) :
+            deck = Deck()
+            deck.shuffle( times=5 )
+            writer.write( deck )
+
+Reading:
+
+    with DealArchive( 'deals.cdz' ) as archive :
+        for deal in archive :   # or archive[i]
+            hand = deal.deal_pile( 13 )
+
+The reader maps the file into memory. archive[i] is a DealView, a read-only
+kind of Deck whose access array is a memoryview of record i in the mapped
+file and whose Cards are those of one Deck shared by the whole archive. So
+opening a view copies nothing and creates no Cards. A DealView can be dealt
+from like any Deck, but it cannot be shuffled, cut, or have cards put back;
+for that, make an ordinary Deck from it with to_deck().
+
+archive.buffer is a memoryview of all the records, for code that wants to
+treat the archive as an array, as numpy.frombuffer( archive.buffer,
+dtype=numpy.uint8 ).reshape( -1, 52 ).
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+from __future__ import annotations
+
+__all__ = [ 'DealWriter', 'DealArchive', 'DealView', 'ReadOnlyDeckError' ]
+
+from suit_card_deck import *
+import mmap
+from typing import Iterator, Sequence, Union
+
+class ReadOnlyDeckError( ValueError ) :
+    pass
+
+SIGNATURE = b'CardzDA1'
+RECORD_SIZE = 52
+
+class DealWriter() :
+    '''
+    Write deals to a new archive file.
+
+    writer = DealWriter( path ) creates (or replaces) the file and writes
+    the signature. writer.write( deal ) appends one record, where deal is a
+    Deck (its whole dealing sequence is written, whether or not any cards
+    have been dealt) or a sequence of the 52 positions. A deal that is not
+    a permutation of 0..51 raises ValueError. writer.close() finishes the
+    file; a DealWriter can also be used as a context manager.
+
+    writer.count is the number of records written.
+    '''
+
+    def __init__( self, path:str ) :
+        self._file = open( path, 'wb' )
+        self._file.write( SIGNATURE )
+        self.count = 0
+
+    def write( self, deal:Union[Deck, Sequence[int]] ) -> int :
+        positions = deal._access if isinstance( deal, Deck ) else deal
+        record = bytes( positions )
+        if len( record ) != RECORD_SIZE \
+        or len( set( record ) ) != RECORD_SIZE \
+        or max( record ) >= RECORD_SIZE :
+            raise ValueError( 'A deal must be a permutation of 0..51' )
+        self._file.write( record )
+        self.count += 1
+        return self.count
+
+    def close( self ) :
+        self._file.close()
+
+    def __enter__( self ) -> DealWriter :
+        return self
+
+    def __exit__( self, *args ) :
+        self.close()
+
+class DealView( Deck ) :
+    '''
+    A read-only Deck over one record of a DealArchive. Its access array is
+    a memoryview into the mapped file, and its Cards belong to the Deck the
+    archive shares among all its views. len(), deal(), deal_pile() and
+    deal_to_pile() work as for any Deck; shuffle(), cut(), put_back_card()
+    and put_back_pile() raise ReadOnlyDeckError.
+
+    positions() returns the memoryview of the record itself.
+    '''
+
+    __slots__ = ()
+    ex_text_6 = 'A DealView is read-only; use to_deck() for a Deck you can change'
+
+    def __init__( self, record:memoryview, cards:list ) :
+        self._access = record
+        self._cards = cards
+        self._top = 0
+
+    def positions( self ) -> memoryview :
+        return self._access
+
+    def to_deck( self ) -> Deck :
+        '''
+        Return an ordinary Deck with the same sequence of cards, and the
+        same number of them already dealt. Like Deck.copy() it shares the
+        archive's Cards, so a card dealt from this view can be put back
+        into the Deck.
+        '''
+        return Deck.copy( self )
+
+    def shuffle( self, times:int = 1 ) :
+        raise ReadOnlyDeckError( DealView.ex_text_6 )
+
+    def cut( self, cards_to_take:int = None, minimum_cut:int = 5 ) :
+        raise ReadOnlyDeckError( DealView.ex_text_6 )
+
+    def put_back_card( self, card:Card ) -> int :
+        raise ReadOnlyDeckError( DealView.ex_text_6 )
+
+    def put_back_pile( self, pile:Pile ) -> int :
+        raise ReadOnlyDeckError( DealView.ex_text_6 )
+
+class DealArchive() :
+    '''
+    Read an archive file written by DealWriter.
+
+    archive = DealArchive( path ) maps the file. A file without the right
+    signature, or whose size is not a whole number of records, raises
+    ValueError.
+
+    len( archive ) is the number of deals; archive[i] (i may be negative)
+    is a new DealView of deal i, and iterating the archive yields a
+    DealView of each deal in turn.
+
+    archive.buffer is a memoryview of all the records.
+
+    archive.close() unmaps the file. Any DealView still in use must be
+    discarded first, or close() raises BufferError and leaves the archive
+    open and usable. A DealArchive can also be used as a context manager.
+    '''
+
+    def __init__( self, path:str ) :
+        with open( path, 'rb' ) as file :
+            self._map = mmap.mmap( file.fileno(), 0, access=mmap.ACCESS_READ )
+        size = len( self._map ) - len( SIGNATURE )
+        if self._map[ : len( SIGNATURE ) ] != SIGNATURE \
+        or size % RECORD_SIZE :
+            self._map.close()
+            raise ValueError( path + ' is not a deal archive' )
+        self._count = size // RECORD_SIZE
+        self.buffer = memoryview( self._map )[ len( SIGNATURE ) : ]
+        self._cards = Deck()._cards # the Cards shared by every view
+
+    def __len__( self ) -> int :
+        return self._count
+
+    def __getitem__( self, index:int ) -> DealView :
+        if index < 0 :
+            index += self._count
+        if not 0 <= index < self._count :
+            raise IndexError( 'deal archive index out of range' )
+        start = index * RECORD_SIZE
+        return DealView( self.buffer[ start : start + RECORD_SIZE ], self._cards )
+
+    def __iter__( self ) -> Iterator[DealView] :
+        for index in range( self._count ) :
+            yield self[ index ]
+
+    def close( self ) :
+        # the map can only be closed once no memoryview exports it, and
+        # there is no asking how many do but to try, so if a DealView is
+        # still alive the buffer is made again and the archive stays open
+        self.buffer.release()
+        try :
+            self._map.close()
+        except BufferError :
+            self.buffer = memoryview( self._map )[ len( SIGNATURE ) : ]
+            raise
+
+    def __enter__( self ) -> DealArchive :
+        return self
+
+    def __exit__( self, *args ) :
+        self.close()
+
+'''
+Test code
+'''
+
+if __name__ == '__main__' :
+
+    import os
+    import random
+    import tempfile
+
+    path = os.path.join( tempfile.mkdtemp(), 'test.cdz' )
+    random.seed( 2024 )
+    decks = []
+    with DealWriter( path ) as writer :
+        for j in range(5) :
+            D = Deck()
+            D.shuffle( times=5 )
+            decks.append( D )
+            writer.write( D )
+        writer.write( range(52) )
+        assert writer.count == 6
+        try :
+            writer.write( [0] * 52 )
+            assert False
+        except ValueError :
+            pass
+
+    archive = DealArchive( path )
+    assert len( archive ) == 6
+    shared = archive._cards
+    for j, view in enumerate( archive ) :
+        assert view._cards is shared # no Cards made for the view
+        assert len( view ) == 52
+        if j < 5 :
+            for k in range(52) :
+                assert view.deal().position() == decks[j].deal().position()
+            assert len( view ) == 0
+    last = archive[-1]
+    hand = last.deal_pile( 13 )
+    assert len( hand ) == 13 and len( last ) == 39
+    assert hand[0].position() == 12 # dealt in order, club Ace on top
+    for method, args in ( ( last.shuffle, () ), ( last.cut, () ),
+                          ( last.put_back_pile, (hand,) ) ) :
+        try :
+            method( *args )
+            assert False
+        except ReadOnlyDeckError :
+            pass
+    D = last.to_deck()
+    assert len( D ) == 39
+    assert D.put_back_card( hand[0] ) == 40 # a card the view dealt
+    assert D._access[-1] == 12 and len( last ) == 39
+    D.shuffle()
+    assert list( last.positions() ) == list( range(52) ) # record unchanged
+    try :
+        archive[6]
+        assert False
+    except IndexError :
+        pass
+    try :
+        archive.close()
+        assert False
+    except BufferError :
+        pass
+    assert list( archive[-1].positions() ) == list( range(52) ) # still open
+    del view, last, hand, method # release the memoryviews into the file
+    archive.close()
+
+    with open( path, 'ab' ) as file :
+        file.write( b'x' )
+    try :
+        DealArchive( path )
+        assert False
+    except ValueError :
+        pass
+    os.remove( path )
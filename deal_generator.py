@@ -0,0 +1,241 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+
+Module deal_generator makes random bridge deals that meet constraints on
+the four hands, for practice sets and teaching scenarios.
+
+A constraint on one hand can give a range of high card points, a range of
+length for any suit, and cards the hand must hold:
+
+    opener = HandConstraint( hcp=(15, 17), lengths={ 'S' : (5, 13) } )
+    partner = HandConstraint( cards=[ 'SA', 'HK' ] )
+    deals = generate_deals( 1000, { 'N' : opener, 'S' : partner }, seed=1 )
+
+A deal is a row of 52 card positions laid out as deal_stats lays them out,
+the first 13 cards to North, then East, South and West, so the result is a
+(count, 52) numpy array that the deal_stats functions take as it is, and
+deal_hands( row ) deals one row from a Deck into four Piles.
+
+Deals are not made by shuffling a Deck and testing its hands one at a time.
+The given cards are put in their hands first, and only the other cards are
+shuffled, a whole batch of deals at once with numpy, into the places left.
+Then the points and suit lengths of every hand of the batch are found with
+the deal_stats tables, and the deals that meet every constraint are kept.
+Each kept deal is equally likely among the deals that meet the constraints.
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+from __future__ import annotations
+
+__all__ = [ 'SEATS', 'HandConstraint', 'card_position', 'generate_deals',
+            'deal_hands' ]
+
+from suit_card_deck import Card, Deck, Pile, card_position
+from deal_stats import HCP, high_card_points, suit_lengths
+import numbers
+import numpy
+from typing import Dict, Iterable, List, Tuple, Union
+
+SEATS = 'NESW'
+SUITS = 'CDHS'
+
+class HandConstraint() :
+    '''
+    What one hand must be like.
+
+    hcp is ( least, most ) high card points, 4-3-2-1 for A K Q J.
+    lengths maps a suit initial, 'C' 'D' 'H' or 'S', to ( least, most )
+    cards of that suit, or to one number for an exact length.
+    cards are cards the hand must hold, as for card_position().
+
+    Raises ValueError for a constraint no hand can meet on its own,
+    including cards that already break its lengths or points.
+    '''
+
+    __slots__ = ( 'hcp', 'lengths', 'cards' )
+
+    def __init__( self, hcp:Tuple[int, int] = ( 0, 37 ),
+                  lengths:Dict[str, Union[int, Tuple[int, int]]] = None,
+                  cards:Iterable = () ) :
+        self.hcp = tuple( hcp )
+        self.lengths = [ ( 0, 13 ) ] * 4
+        for suit, length in ( lengths or dict() ).items() :
+            if isinstance( length, numbers.Integral ) :
+                length = ( int( length ), int( length ) )
+            self.lengths[ SUITS.index( suit.upper() ) ] = tuple( length )
+        self.cards = tuple( card_position( card ) for card in cards )
+        if self.hcp[0] > self.hcp[1] or len( self.cards ) > 13 \
+        or len( set( self.cards ) ) < len( self.cards ) \
+        or sum( [ low for low, high in self.lengths ] ) > 13 \
+        or sum( [ high for low, high in self.lengths ] ) < 13 :
+            raise ValueError( 'No hand can meet this constraint' )
+        # the given cards count toward the lengths and points: no suit may
+        # have more of them than it allows, nor the hand more points, and
+        # the best of the other cards must still reach the least points
+        given = [ 0 ] * 4
+        for position in self.cards :
+            given[ position // 13 ] += 1
+        points = sum( [ int( HCP[ position ] ) for position in self.cards ] )
+        others = sorted( [ int( HCP[ position ] ) for position in range( 52 )
+                           if position not in self.cards ], reverse=True )
+        if any( [ given[ suit ] > high for suit, ( low, high ) in enumerate( self.lengths ) ] ) \
+        or sum( [ max( low, given[ suit ] ) for suit, ( low, high ) in enumerate( self.lengths ) ] ) > 13 \
+        or points > self.hcp[1] \
+        or points + sum( others[ : 13 - len( self.cards ) ] ) < self.hcp[0] :
+            raise ValueError( 'The given cards break this constraint' )
+
+def _template( constraints:Dict[str, HandConstraint] ) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray] :
+    '''
+    The fixed part of every deal: a row of 52 with the given cards in
+    their hands' places and -1 elsewhere, the indices of the free places,
+    and the cards to shuffle into them.
+    '''
+    row = numpy.full( 52, -1, dtype=numpy.int16 )
+    for seat, constraint in constraints.items() :
+        start = 13 * SEATS.index( seat )
+        for j, position in enumerate( constraint.cards ) :
+            if position in row :
+                raise ValueError( 'A card is given to two hands' )
+            row[ start + j ] = position
+    free_places = numpy.nonzero( row < 0 )[0]
+    free_cards = numpy.setdiff1d( numpy.arange( 52 ), row[ row >= 0 ] )
+    return row, free_places, free_cards
+
+def _meets( deals:numpy.ndarray, constraints:Dict[str, HandConstraint] ) -> numpy.ndarray :
+    ''' a boolean per deal, True if every hand meets its constraint '''
+    points = high_card_points( deals )
+    lengths = suit_lengths( deals )
+    keep = numpy.ones( len( deals ), dtype=bool )
+    for seat, constraint in constraints.items() :
+        hand = SEATS.index( seat )
+        low, high = constraint.hcp
+        keep &= ( points[ :, hand ] >= low ) & ( points[ :, hand ] <= high )
+        for suit, ( low, high ) in enumerate( constraint.lengths ) :
+            if low > 0 or high < 13 :
+                length = lengths[ :, hand, suit ]
+                keep &= ( length >= low ) & ( length <= high )
+    return keep
+
+def generate_deals( count:int, constraints:Dict[str, HandConstraint],
+                    seed:int = None, batch:int = 100000,
+                    max_deals:int = 100000000 ) -> numpy.ndarray :
+    '''
+    count deals meeting constraints, a dict of seat ('N' 'E' 'S' 'W') to
+    HandConstraint, as a (count, 52) uint8 array. Deals are tried in
+    batches with numpy.random.default_rng( seed ), each sized from the
+    deals still needed and the share of tried deals kept so far, and at
+    most batch. If max_deals have been tried without finding count, the
+    constraints are taken to be too rare (or impossible) and ValueError
+    is raised.
+    '''
+    for seat in constraints :
+        if seat not in SEATS :
+            raise ValueError( 'Not a seat: ' + repr( seat ) )
+    rng = numpy.random.default_rng( seed )
+    row, free_places, free_cards = _template( constraints )
+    found = []
+    total = 0
+    tried = 0
+    size = 0
+    while total < count :
+        if tried >= max_deals :
+            raise ValueError( 'Found {} of {} deals in {} tries'.format( total, count, tried ) )
+        # enough deals for what is still needed at the rate found so far,
+        # or twice the last batch while none have been found
+        needed = count - total
+        size = needed * tried // total + needed // 4 + 1 if total else max( needed, 2 * size )
+        size = min( size, batch, max_deals - tried )
+        deals = numpy.tile( row.astype( numpy.uint8 ), ( size, 1 ) )
+        deals[ :, free_places ] = rng.permuted(
+            numpy.tile( free_cards.astype( numpy.uint8 ), ( size, 1 ) ), axis=1 )
+        tried += size
+        good = deals[ _meets( deals, constraints ) ]
+        found.append( good[ : needed ] )
+        total += len( found[-1] )
+    if not found :
+        return numpy.empty( ( 0, 52 ), numpy.uint8 )
+    return numpy.concatenate( found )
+
+def deal_hands( deal ) -> List[Pile] :
+    '''
+    Deal one row of generate_deals() from a new Deck, as four Piles of
+    13 in the order N, E, S, W, each with its seat as flag.
+    '''
+    deck = Deck()
+    deck.arrange( deal )
+    hands = []
+    for seat in SEATS :
+        hand = Pile( seat )
+        deck.deal_to_pile( 13, hand )
+        hands.append( hand )
+    return hands
+
+'''
+Test code
+'''
+
+if __name__ == '__main__' :
+
+    for bad in ( dict( hcp=( 18, 15 ) ), dict( lengths={ 'S' : 7, 'H' : 7 } ),
+                 dict( cards=[ 'SA', 'SA' ] ),
+                 dict( cards=[ 'SA', 'SK' ], lengths={ 'S' : 1 } ),
+                 dict( cards=[ 'SA', 'SK', 'HA', 'HK' ], hcp=( 0, 12 ) ),
+                 dict( cards=[ 'S2', 'S3', 'H2', 'H3' ], lengths={ 'C' : 5, 'D' : 5 } ),
+                 dict( cards=[ 'S2', 'S3', 'S4', 'S5', 'S6', 'S7', 'S8', 'S9', 'ST', 'H2' ],
+                       hcp=( 13, 37 ) ) ) :
+        try :
+            HandConstraint( **bad )
+            assert False
+        except ValueError :
+            pass
+
+    opener = HandConstraint( hcp=( 15, 17 ), lengths={ 'S' : ( 5, 13 ), 'H' : ( 0, 3 ) } )
+    partner = HandConstraint( cards=[ 'SK', 'HA' ], lengths={ 'S' : 3 } )
+    deals = generate_deals( 1000, { 'N' : opener, 'S' : partner }, seed=5 )
+    assert deals.shape == ( 1000, 52 )
+    assert ( numpy.sort( deals, axis=1 ) == numpy.arange( 52 ) ).all()
+    points = high_card_points( deals )
+    lengths = suit_lengths( deals )
+    assert ( points[ :, 0 ] >= 15 ).all() and ( points[ :, 0 ] <= 17 ).all()
+    assert ( lengths[ :, 0, 3 ] >= 5 ).all() and ( lengths[ :, 0, 2 ] <= 3 ).all()
+    assert ( lengths[ :, 2, 3 ] == 3 ).all()
+    assert ( deals[ :, 26 : 39 ] == 50 ).any( axis=1 ).all() # ♠K with South
+    assert ( deals[ :, 26 : 39 ] == 38 ).any( axis=1 ).all() # ♥A with South
+    assert points[ :, 1 ].mean() < 10 # East and West have what is left
+
+    hands = deal_hands( deals[0] )
+    assert [ h.flag() for h in hands ] == list( SEATS )
+    assert sum( [ c.rank() - 10 for c in hands[0] if c.honor() and c.rank() > 10 ] ) == points[0, 0]
+    assert Card( 50 ) in hands[2] and Card( 38 ) in hands[2]
+
+    # the same seed gives the same deals
+    again = generate_deals( 1000, { 'N' : opener, 'S' : partner }, seed=5 )
+    assert ( again == deals ).all()
+
+    # no deals asked for, and lengths given as numpy integers
+    none = generate_deals( 0, {} )
+    assert none.shape == ( 0, 52 ) and none.dtype == numpy.uint8
+    five = HandConstraint( lengths={ 'S' : numpy.int64( 5 ) } )
+    assert five.lengths[3] == ( 5, 5 )
+    assert ( suit_lengths( generate_deals( 10, { 'E' : five }, seed=1 ) )[ :, 1, 3 ] == 5 ).all()
+
+    try : # West cannot hold the ♠A North was given
+        generate_deals( 1, { 'N' : HandConstraint( cards=[ 'SA' ] ),
+                             'W' : HandConstraint( cards=[ 'SA' ] ) } )
+        assert False
+    except ValueError :
+        pass
+    try : # 21 points each is more than the 40 in the deck
+        generate_deals( 1, { 'N' : HandConstraint( hcp=( 21, 37 ) ),
+                             'S' : HandConstraint( hcp=( 21, 37 ) ) }, batch=1000, max_deals=4500 )
+        assert False
+    except ValueError as error :
+        assert 'in 4500 tries' in str( error ) # no more than max_deals
@@ -0,0 +1,216 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+
+Module deal_stats computes statistics over many deals at once with numpy.
+
+A set of deals is a numpy array of shape (N, 52), one row per deal, each
+row the card positions (0..51) in the order they are dealt: the _access
+array of a shuffled Deck, or a record of a deal archive. Nothing here
+makes Card or Pile objects per deal; the value of each card is looked up
+in a 52-entry table made once from the Card methods, and indexed by the
+whole array.
+
+    deals = random_deals( 100000, seed=1 )
+    deals = archive_deals( archive )   # a DealArchive, copying nothing
+
+A bridge deal gives the first 13 cards to North, the next to East, then
+South and West, as four deck.deal_pile( 13 ) would.
+
+    high_card_points( deals ) -> (N, 4), 4-3-2-1 for A K Q J
+    suit_lengths( deals ) -> (N, 4, 4), hand by suit (C, D, H, S)
+    shape_counts( deals ) -> { '4-4-3-2' : count, ... } over all hands
+
+A Klondike deal is dealt as Klondike() does, in rows across the seven
+tableau piles; the top card of each pile is face up and the other 24
+cards are left in the deck.
+
+    klondike_features( deals ) -> dict of (N,) arrays: exposed_aces,
+        exposed_kings, buried_aces (face-down in the tableau)
+
+histogram( values ) and summary( values ) reduce any of these arrays, and
+analyze( count ) makes random deals in chunks and returns the histograms
+and summaries of all of the above, without holding every deal at once.
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+from __future__ import annotations
+
+__all__ = [ 'random_deals', 'archive_deals', 'high_card_points',
+            'suit_lengths', 'shape_counts', 'klondike_features',
+            'histogram', 'summary', 'analyze' ]
+
+from suit_card_deck import Card, Rank
+import numpy
+from typing import Dict
+
+'''
+Tables by card position, made from the Card methods.
+'''
+CARDS = [ Card( p ) for p in range( 52 ) ]
+HCP = numpy.array( [ card.rank() - 10 if card.honor() else 0 for card in CARDS ],
+                   dtype=numpy.int8 ) # 4-3-2-1, the Ten is an honor worth 0
+SUIT = numpy.array( [ card.suit_rank() for card in CARDS ], dtype=numpy.int8 )
+ACE = numpy.array( [ card.rank() == Rank.rA for card in CARDS ] )
+KING = numpy.array( [ card.rank() == Rank.rK for card in CARDS ] )
+
+# the index in the dealing sequence of the face-up card of each Klondike
+# tableau pile: the last card dealt to pile p comes in row p
+KLONDIKE_FACE_UP = numpy.array( [ sum( range( 7, 7 - p, -1 ) ) for p in range( 7 ) ] )
+KLONDIKE_TABLEAU = 28
+
+def random_deals( count:int, seed:int = None ) -> numpy.ndarray :
+    '''
+    count shuffled decks as a (count, 52) array of uint8 card positions,
+    from numpy.random.default_rng( seed ).
+    '''
+    rng = numpy.random.default_rng( seed )
+    rows = numpy.tile( numpy.arange( 52, dtype=numpy.uint8 ), ( count, 1 ) )
+    return rng.permuted( rows, axis=1 )
+
+def archive_deals( archive ) -> numpy.ndarray :
+    '''
+    The deals of a deal_archive.DealArchive as a read-only (N, 52) array
+    over its memory map. The archive cannot be closed while the array is
+    in use.
+    '''
+    return numpy.frombuffer( archive.buffer, dtype=numpy.uint8 ).reshape( -1, 52 )
+
+def high_card_points( deals:numpy.ndarray ) -> numpy.ndarray :
+    ''' (N, 4) high card points of the four hands of each deal '''
+    return HCP[ deals ].reshape( -1, 4, 13 ).sum( axis=2, dtype=numpy.int16 )
+
+def suit_lengths( deals:numpy.ndarray ) -> numpy.ndarray :
+    ''' (N, 4, 4) number of cards of each suit in each hand '''
+    suits = SUIT[ deals ].reshape( -1, 4, 13 )
+    return ( suits[ ..., None ] == numpy.arange( 4 ) ).sum( axis=2, dtype=numpy.int8 )
+
+def shape_counts( deals:numpy.ndarray ) -> Dict[str, int] :
+    '''
+    How many hands have each shape, suit lengths longest first as in
+    '5-4-3-1', counting all four hands of every deal.
+    '''
+    lengths = numpy.sort( suit_lengths( deals ).reshape( -1, 4 ), axis=1 )[ :, ::-1 ]
+    codes = lengths.astype( numpy.int32 ) @ numpy.array( [ 4096, 256, 16, 1 ] )
+    values, counts = numpy.unique( codes, return_counts=True )
+    return { '{}-{}-{}-{}'.format( v >> 12, ( v >> 8 ) & 15, ( v >> 4 ) & 15, v & 15 ) : int( c )
+             for v, c in zip( values, counts ) }
+
+def klondike_features( deals:numpy.ndarray ) -> Dict[str, numpy.ndarray] :
+    ''' Per deal counts of Aces and Kings face up, and Aces face down '''
+    face_up = deals[ :, KLONDIKE_FACE_UP ]
+    tableau_aces = ACE[ deals[ :, : KLONDIKE_TABLEAU ] ].sum( axis=1 )
+    exposed_aces = ACE[ face_up ].sum( axis=1 )
+    return { 'exposed_aces' : exposed_aces,
+             'exposed_kings' : KING[ face_up ].sum( axis=1 ),
+             'buried_aces' : tableau_aces - exposed_aces }
+
+def histogram( values:numpy.ndarray, size:int = None ) -> numpy.ndarray :
+    ''' counts of each non-negative integer value 0..size-1 '''
+    return numpy.bincount( numpy.ravel( values ), minlength=size or 0 )
+
+def summary( values:numpy.ndarray ) -> Dict[str, float] :
+    values = numpy.ravel( values )
+    return { 'count' : int( values.size ), 'mean' : float( values.mean() ),
+             'std' : float( values.std() ), 'min' : int( values.min() ),
+             'max' : int( values.max() ) }
+
+def _summary_of_histogram( counts:numpy.ndarray ) -> Dict[str, float] :
+    ''' summary() of the values a histogram counts '''
+    values = numpy.arange( len( counts ) )
+    total = int( counts.sum() )
+    mean = float( ( values * counts ).sum() / total )
+    variance = float( ( ( values - mean ) ** 2 * counts ).sum() / total )
+    present = numpy.nonzero( counts )[0]
+    return { 'count' : total, 'mean' : mean, 'std' : variance ** 0.5,
+             'min' : int( present[0] ), 'max' : int( present[-1] ) }
+
+def analyze( count:int, seed:int = None, chunk:int = 100000 ) -> Dict[str, dict] :
+    '''
+    Make count random deals, chunk at a time, and return for each of
+    'hcp' (per hand), 'exposed_aces', 'exposed_kings' and 'buried_aces'
+    (per Klondike deal) a dict of its 'histogram' and 'summary', and under
+    'shapes' the shape_counts() of all hands.
+    '''
+    rng_seeds = numpy.random.SeedSequence( seed ).spawn( ( count + chunk - 1 ) // chunk )
+    sizes = { 'hcp' : 38, 'exposed_aces' : 5, 'exposed_kings' : 5, 'buried_aces' : 5 }
+    counts = { name : numpy.zeros( size, dtype=numpy.int64 ) for name, size in sizes.items() }
+    shapes = dict()
+    for j, seeds in enumerate( rng_seeds ) :
+        deals = random_deals( min( chunk, count - j * chunk ), seeds )
+        counts[ 'hcp' ] += histogram( high_card_points( deals ), 38 )
+        for name, values in klondike_features( deals ).items() :
+            counts[ name ] += histogram( values, 5 )
+        for shape, n in shape_counts( deals ).items() :
+            shapes[ shape ] = shapes.get( shape, 0 ) + n
+    result = { name : { 'histogram' : c, 'summary' : _summary_of_histogram( c ) }
+               for name, c in counts.items() }
+    result[ 'shapes' ] = shapes
+    return result
+
+'''
+Test code
+'''
+
+if __name__ == '__main__' :
+
+    from suit_card_deck import Deck
+    from klondike import Klondike
+
+    assert HCP.sum() == 40 and list( KLONDIKE_FACE_UP ) == [ 0, 7, 13, 18, 22, 25, 27 ]
+
+    deals = random_deals( 2000, seed=3 )
+    assert deals.shape == ( 2000, 52 )
+    assert ( numpy.sort( deals, axis=1 ) == numpy.arange( 52 ) ).all()
+    points = high_card_points( deals )
+    assert ( points.sum( axis=1 ) == 40 ).all()
+    lengths = suit_lengths( deals )
+    assert ( lengths.sum( axis=2 ) == 13 ).all() and ( lengths.sum( axis=1 ) == 13 ).all()
+    shapes = shape_counts( deals )
+    assert sum( shapes.values() ) == 8000 and '4-4-3-2' in shapes
+
+    # agree with Piles dealt from a Deck
+    deck = Deck()
+    deck.shuffle()
+    row = numpy.array( [ deck._access ], dtype=numpy.uint8 )
+    hands = [ deck.deal_pile( 13 ) for _ in range(4) ]
+    for h, hand in enumerate( hands ) :
+        expect = sum( [ card.rank() - 10 for card in hand if card.rank() > Rank.rT ] )
+        assert high_card_points( row )[ 0, h ] == expect
+        for suit in range(4) :
+            assert suit_lengths( row )[ 0, h, suit ] == \
+                len( [ c for c in hand if c.suit_rank() == suit ] )
+
+    # agree with Klondike's layout
+    rows = []
+    games = []
+    for seed in range( 1, 30 ) :
+        game = Klondike( seed )
+        rows.append( game.deck._access[:] )
+        games.append( game )
+    features = klondike_features( numpy.array( rows, dtype=numpy.uint8 ) )
+    for j, game in enumerate( games ) :
+        tops = [ pile[0] for pile in game.tableau ]
+        assert features[ 'exposed_aces' ][j] == len( [ c for c in tops if c.rank() == Rank.rA ] )
+        assert features[ 'exposed_kings' ][j] == len( [ c for c in tops if c.rank() == Rank.rK ] )
+        buried = [ c for pile in game.tableau for c in pile[1:] if c.rank() == Rank.rA ]
+        assert features[ 'buried_aces' ][j] == len( buried )
+
+    assert list( histogram( numpy.array( [ 0, 2, 2 ] ), 4 ) ) == [ 1, 0, 2, 0 ]
+    stats = summary( points )
+    assert stats[ 'count' ] == 8000 and abs( stats[ 'mean' ] - 10 ) < 1e-9
+
+    result = analyze( 25000, seed=9, chunk=10000 )
+    hcp = result[ 'hcp' ]
+    assert hcp[ 'summary' ][ 'count' ] == 100000
+    assert abs( hcp[ 'summary' ][ 'mean' ] - 10 ) < 1e-9
+    assert 4.0 < hcp[ 'summary' ][ 'std' ] < 4.3 # about 4.13
+    assert sum( result[ 'shapes' ].values() ) == 100000
+    assert result[ 'exposed_aces' ][ 'histogram' ].sum() == 25000
@@ -0,0 +1,1100 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+
+Module double_dummy finds how many tricks can be taken in each strain from
+each declarer when all four hands of a bridge deal are known.
+
+    solver = DoubleDummy( [ north, east, south, west ] )
+    solver.tricks( 'S', 'N' ) -> tricks for North declaring in Spades
+    solver.table() -> { ( strain, declarer ) : tricks } for all 20
+    analyze_deals( deals, workers=None ) -> a table for each deal, the
+        deals shared among worker processes
+
+Seats are 'NESW', strains 'CDHS' by Suit.initial() and 'N' for notrump.
+The hands are Piles (or Hands) of equal length, usually 13 dealt from a
+Deck, but any ending with equal hands can be analyzed.
+
+Each hand is held as four 13-bit masks, one per suit, indexed by
+card.suit_rank(), with bit card.rank()-2 set for each card. The search is
+alpha-beta over single card plays, asked as a yes/no question: can North-
+South take at least so many of the remaining tricks? The exact count is
+found by bisecting on that question. The search is kept small by:
+
+  * playing only one card of a sequence: cards with no unplayed card of
+    another hand between them are equivalent;
+  * a partition search transposition table at the start of each trick.
+    Each result comes with its winning ranks, the cards whose ranks it
+    depended on, and is stored only for who holds the cards of each suit
+    from the top down to the lowest of them (with ranks made relative to
+    the cards still out), so it serves every position that differs only
+    in the small cards;
+  * quick tricks: the top winners the player on lead, or his partner, can
+    cash at once, and the tricks the top trumps must take;
+  * trying likely winners first: on lead, ruffs for partner and top cards,
+    then low cards toward partner's top cards, leads away from a guarded
+    second card late and leads the opponents can ruff last; following,
+    the cheapest card that wins the trick for good, or a low card when
+    partner has it.
+
+One table serves all four leads of a strain, since a position reached
+from one opening lead can be reached from another.
+
+In pure Python a full deal takes some 30 seconds for its 20 results, ten
+times fewer nodes than a search keyed on the whole position; solving many
+deals is what analyze_deals spreads over processes for.
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+from __future__ import annotations
+
+__all__ = [ 'DoubleDummy', 'analyze_deals', 'SEATS', 'STRAINS' ]
+
+from suit_card_deck import Card, Pile
+import multiprocessing
+from typing import Dict, List, Sequence, Tuple
+try :
+    import numba # optional, compiles the search
+    import numpy
+except ImportError :
+    numba = None
+
+SEATS = 'NESW'
+STRAINS = 'CDHSN'
+NOTRUMP = 4
+
+# memoized helpers on suit masks
+
+_COUNT = [ bin( mask ).count( '1' ) for mask in range( 8192 ) ] # cards in a mask
+_SEQUENCES = dict() # ( mine, out ) -> ( top bits of my sequences, high first, their bottoms )
+_SUITS = dict() # ( m0, m1, m2, m3 ) -> ( signature, cards, lengths )
+_TOPS = dict() # ( out, count ) -> mask of the count highest cards of out
+
+def _sequences( mine:int, out:int ) -> Tuple[ Tuple[int, ...], Tuple[int, ...] ] :
+    '''
+    The top card (as a bit) of each run of mine, where a run is broken only
+    by a card of out that is not mine, and the bottom card of each run, both
+    high first; out includes mine.
+    '''
+    try :
+        return _SEQUENCES[ ( mine, out ) ]
+    except KeyError :
+        pass
+    tops = []
+    bottoms = []
+    in_run = False
+    rest = out
+    while rest :
+        bit = 1 << ( rest.bit_length() - 1 )
+        rest ^= bit
+        if mine & bit :
+            if not in_run :
+                tops.append( bit )
+                bottoms.append( bit )
+            else :
+                bottoms[-1] = bit
+            in_run = True
+        else :
+            in_run = False
+    result = ( tuple( tops ), tuple( bottoms ) )
+    _SEQUENCES[ ( mine, out ) ] = result
+    return result
+
+def _suit( masks:Tuple[int, int, int, int] ) -> Tuple[int, int, int] :
+    '''
+    ( signature, cards, lengths ) of one suit: who holds each card still
+    out, high to low, two bits per card after a leading 1, which is the
+    suit with absolute ranks forgotten; how many cards are out; and the
+    length of each hand, four bits each.
+    '''
+    try :
+        return _SUITS[ masks ]
+    except KeyError :
+        pass
+    m0, m1, m2, m3 = masks
+    rest = m0 | m1 | m2 | m3
+    signature = 1
+    while rest :
+        bit = 1 << ( rest.bit_length() - 1 )
+        rest ^= bit
+        signature = signature * 4 + ( 0 if m0 & bit else 1 if m1 & bit else 2 if m2 & bit else 3 )
+    result = ( signature, _COUNT[ m0 | m1 | m2 | m3 ],
+               _COUNT[ m0 ] | _COUNT[ m1 ] << 4 | _COUNT[ m2 ] << 8 | _COUNT[ m3 ] << 12 )
+    _SUITS[ masks ] = result
+    return result
+
+def _tops( out:int, count:int ) -> int :
+    ''' the count highest cards of out '''
+    try :
+        return _TOPS[ ( out, count ) ]
+    except KeyError :
+        pass
+    rest = out
+    for _ in range( _COUNT[ out ] - count ) :
+        rest &= rest - 1
+    _TOPS[ ( out, count ) ] = rest
+    return rest
+
+# the same search compiled with numba, when it is installed: the hands are
+# a (4, 4) array of suit masks, and the lists of the Python search are rows
+# of arrays kept for each trick and each play of the search
+
+if numba is not None :
+
+    _BITS = numpy.array( _COUNT, dtype=numpy.int64 )
+    _HIGH = numpy.array( [ 1 << ( mask.bit_length() - 1 ) if mask else 0 for mask in range( 8192 ) ],
+                         dtype=numpy.int64 ) # the highest card of a mask
+    _HASH = -7046029254386353131 # 0x9E3779B97F4A7C15 as a signed 64-bit number
+
+    # the transposition table is a tree with a level for each suit. Its
+    # links are the rows of a hash table, ( key, node ), where the key is a
+    # root key (see _c_search) or node << 32 | shift << 27 | signature >>
+    # shift for the node above, and node is the number of the node below.
+    # For each node info holds the shifts of its links as bits, or for a
+    # leaf, below the last suit, its bounds as low | high << 8. used counts
+    # the links, and so the nodes. Nothing more is stored once half the
+    # rows are used; the table is grown between searches.
+
+    @numba.njit( cache=True )
+    def _c_slot( links, key ) :
+        ''' the row of key in links, or the empty row it would take '''
+        mask = len( links ) - 1
+        slot = ( key * _HASH ) >> 40 & mask
+        while links[ slot, 0 ] != key and links[ slot, 0 ] != 0 :
+            slot = ( slot + 1 ) & mask
+        return slot
+
+    @numba.njit( cache=True )
+    def _c_find( links, key ) :
+        ''' the node a link leads to, or -1 '''
+        slot = _c_slot( links, key )
+        return links[ slot, 1 ] if links[ slot, 0 ] == key else -1
+
+    @numba.njit( cache=True )
+    def _c_add( links, used, key ) :
+        '''
+        ( the node a link leads to, True if it is new ), or ( -1, False )
+        if the table is full.
+        '''
+        slot = _c_slot( links, key )
+        if links[ slot, 0 ] == key :
+            return links[ slot, 1 ], False
+        if 2 * used[0] >= len( links ) :
+            return -1, False
+        node = used[0]
+        links[ slot, 0 ], links[ slot, 1 ] = key, node
+        used[0] += 1
+        return node, True
+
+    @numba.njit( cache=True )
+    def _c_grow( links ) :
+        ''' links rehashed into twice as many rows '''
+        bigger = numpy.zeros( ( 2 * len( links ), 2 ), dtype=numpy.int64 )
+        for row in range( len( links ) ) :
+            if links[ row, 0 ] :
+                slot = _c_slot( bigger, links[ row, 0 ] )
+                bigger[ slot, 0 ], bigger[ slot, 1 ] = links[ row, 0 ], links[ row, 1 ]
+        return bigger
+
+    @numba.njit( cache=True )
+    def _c_probe( links, info, root, signature0, signature1, signature2, signature3, target ) :
+        '''
+        ( value, shifts ) of a bound below root that decides target, the
+        shifts in four 5-bit fields, or ( -1, 0 ) if there is none.
+        '''
+        for h0 in range( 0, 27, 2 ) :
+            node1 = _c_find( links, root << 32 | h0 << 27 | signature0 >> h0 ) if info[ root ] >> h0 & 1 else -1
+            if node1 < 0 :
+                continue
+            for h1 in range( 0, 27, 2 ) :
+                node2 = _c_find( links, node1 << 32 | h1 << 27 | signature1 >> h1 ) if info[ node1 ] >> h1 & 1 else -1
+                if node2 < 0 :
+                    continue
+                for h2 in range( 0, 27, 2 ) :
+                    node3 = _c_find( links, node2 << 32 | h2 << 27 | signature2 >> h2 ) if info[ node2 ] >> h2 & 1 else -1
+                    if node3 < 0 :
+                        continue
+                    for h3 in range( 0, 27, 2 ) :
+                        leaf = _c_find( links, node3 << 32 | h3 << 27 | signature3 >> h3 ) if info[ node3 ] >> h3 & 1 else -1
+                        if leaf < 0 :
+                            continue
+                        if info[ leaf ] & 255 >= target :
+                            return info[ leaf ] & 255, h0 | h1 << 5 | h2 << 10 | h3 << 15
+                        if info[ leaf ] >> 8 < target :
+                            return info[ leaf ] >> 8, h0 | h1 << 5 | h2 << 10 | h3 << 15
+        return -1, 0
+
+    @numba.njit( cache=True )
+    def _c_tops( out, count ) :
+        rest = out
+        for _ in range( _BITS[ out ] - count ) :
+            rest &= rest - 1
+        return rest
+
+    @numba.njit( cache=True )
+    def _c_suit( hands, suit ) :
+        ''' _suit() of one suit of the hands '''
+        m0, m1, m2, m3 = hands[ 0, suit ], hands[ 1, suit ], hands[ 2, suit ], hands[ 3, suit ]
+        rest = m0 | m1 | m2 | m3
+        signature = 1
+        while rest :
+            bit = _HIGH[ rest ]
+            rest ^= bit
+            signature = signature * 4 + ( 0 if m0 & bit else 1 if m1 & bit else 2 if m2 & bit else 3 )
+        return signature, _BITS[ m0 | m1 | m2 | m3 ], \
+               _BITS[ m0 ] | _BITS[ m1 ] << 4 | _BITS[ m2 ] << 8 | _BITS[ m3 ] << 12
+
+    @numba.njit( cache=True )
+    def _c_quick_tricks( hands, trump, leader, runs, row ) :
+        ''' _quick_tricks() into runs[ row ] (tricks) and runs[ row + 1 ] (cards), returning how many '''
+        left, partner, right = ( leader + 1 ) % 4, ( leader + 2 ) % 4, ( leader + 3 ) % 4
+        count = 0
+        for suit in range(4) :
+            held = hands[ leader, suit ]
+            if not held :
+                continue
+            out = held | hands[ left, suit ] | hands[ partner, suit ] | hands[ right, suit ]
+            run = 0
+            while out :
+                bit = _HIGH[ out ]
+                if not held & bit :
+                    break
+                out ^= bit
+                run += 1
+            if run and trump != NOTRUMP and suit != trump :
+                if hands[ left, trump ] :
+                    run = min( run, _BITS[ hands[ left, suit ] ] )
+                if hands[ right, trump ] :
+                    run = min( run, _BITS[ hands[ right, suit ] ] )
+            if run :
+                runs[ row, count ] = run
+                runs[ row + 1, count ] = _c_tops( held, run ) << ( 13 * suit )
+                count += 1
+        return count
+
+    @numba.njit( cache=True )
+    def _c_sure_tricks( hands, trump, leader, runs ) :
+        ''' _sure_tricks() into runs[0] and runs[1]: ( how many, the card to partner ) '''
+        count = _c_quick_tricks( hands, trump, leader, runs, 0 )
+        left, partner, right = ( leader + 1 ) % 4, ( leader + 2 ) % 4, ( leader + 3 ) % 4
+        for suit in range(4) :
+            if not ( hands[ leader, suit ] and hands[ partner, suit ] ) :
+                continue
+            top = _HIGH[ hands[ leader, suit ] | hands[ partner, suit ] | hands[ left, suit ] | hands[ right, suit ] ]
+            if not hands[ partner, suit ] & top :
+                continue
+            if trump != NOTRUMP and suit != trump \
+            and ( ( not hands[ left, suit ] and hands[ left, trump ] )
+                  or ( not hands[ right, suit ] and hands[ right, trump ] ) ) :
+                continue
+            his = _c_quick_tricks( hands, trump, partner, runs, 2 )
+            mine = theirs = 0
+            for j in range( count ) :
+                mine += runs[ 0, j ]
+            for j in range( his ) :
+                theirs += runs[ 2, j ]
+            if theirs > mine :
+                for j in range( his ) :
+                    runs[ 0, j ], runs[ 1, j ] = runs[ 2, j ], runs[ 3, j ]
+                return his, top << ( 13 * suit )
+            break
+        return count, 0
+
+    @numba.njit( cache=True )
+    def _c_top_trumps( hands, trump ) :
+        ''' _top_trumps() '''
+        if trump == NOTRUMP :
+            return 0, 0
+        out = hands[ 0, trump ] | hands[ 1, trump ] | hands[ 2, trump ] | hands[ 3, trump ]
+        if not out :
+            return 0, 0
+        bit = _HIGH[ out ]
+        seat = 0 if hands[ 0, trump ] & bit else 1 if hands[ 1, trump ] & bit \
+               else 2 if hands[ 2, trump ] & bit else 3
+        held = hands[ seat, trump ]
+        run = 0
+        while out and held & bit :
+            run += 1
+            out ^= bit
+            bit = _HIGH[ out ]
+        return seat, run
+
+    @numba.njit( cache=True )
+    def _c_beaten( hands, trump, seat, lead_suit, suit, bit ) :
+        ''' _beaten() '''
+        if hands[ seat, lead_suit ] :
+            return suit == lead_suit and hands[ seat, suit ] > bit
+        if trump == NOTRUMP or not hands[ seat, trump ] :
+            return False
+        return suit != trump or hands[ seat, trump ] > bit
+
+    @numba.njit( cache=True )
+    def _c_moves( hands, trump, seat, leader, lead_suit, winner, win_suit, win_bit, outs, remaining,
+                  plays, row, killer ) :
+        '''
+        _moves() into plays[ row, 0 ] (suits) and plays[ row, 1 ] (bits),
+        returning how many; plays[ row, 2 ] holds their sort keys. The
+        cards out are outs[ remaining ], and killer is the killer move as
+        suit << 13 | bit.
+        '''
+        count = 0
+        first, stop = ( lead_suit, lead_suit + 1 ) if lead_suit >= 0 and hands[ seat, lead_suit ] else ( 0, 4 )
+        for suit in range( first, stop ) :
+            mine = hands[ seat, suit ]
+            rest = outs[ remaining, suit ] if mine else 0
+            in_run = False
+            while rest :
+                bit = _HIGH[ rest ]
+                rest ^= bit
+                if mine & bit :
+                    if not in_run :
+                        plays[ row, 0, count ] = suit
+                        plays[ row, 1, count ] = bit
+                        count += 1
+                    in_run = True
+                else :
+                    in_run = False
+        if count < 2 :
+            return count
+        next_seat = ( seat + 1 ) % 4
+        if lead_suit < 0 :
+            partner, right = ( seat + 2 ) % 4, ( seat + 3 ) % 4
+            for j in range( count ) :
+                suit, bit = plays[ row, 0, j ], plays[ row, 1, j ]
+                out = outs[ remaining, suit ]
+                top = _HIGH[ out ]
+                second = _HIGH[ out ^ top ]
+                order, rank = 3, bit
+                if trump != NOTRUMP and suit != trump \
+                and ( ( not hands[ next_seat, suit ] and hands[ next_seat, trump ] )
+                      or ( not hands[ right, suit ] and hands[ right, trump ] ) ) :
+                    order = 5
+                elif trump != NOTRUMP and suit != trump and not hands[ partner, suit ] and hands[ partner, trump ] :
+                    order = 0
+                elif bit == top :
+                    order, rank = 0, -bit
+                elif hands[ partner, suit ] & top :
+                    order = 1
+                elif hands[ partner, suit ] & second :
+                    order = 2
+                elif hands[ right, suit ] & top and hands[ seat, suit ] & second :
+                    order = 4
+                plays[ row, 2, j ] = ( order * 16384 + rank + 8192 ) * 4 + suit
+        elif ( winner - seat ) % 2 == 0 and not (
+                next_seat != leader and _c_beaten( hands, trump, next_seat, lead_suit, win_suit, win_bit ) ) :
+            for j in range( count ) :
+                suit, bit = plays[ row, 0, j ], plays[ row, 1, j ]
+                plays[ row, 2, j ] = ( ( suit == trump ) * 8192 + bit ) * 4 + suit
+        else :
+            last = next_seat == leader
+            for j in range( count ) :
+                suit, bit = plays[ row, 0, j ], plays[ row, 1, j ]
+                if bit > win_bit if suit == win_suit else suit == trump :
+                    order = 0 if last or not _c_beaten( hands, trump, next_seat, lead_suit, suit, bit ) else 1
+                else :
+                    order = 2
+                plays[ row, 2, j ] = ( ( order * 2 + ( suit == trump ) ) * 8192 + bit ) * 4 + suit
+        for j in range( 1, count ) :
+            k = j
+            while k > 0 and plays[ row, 2, k - 1 ] > plays[ row, 2, k ] :
+                for field in range(3) :
+                    plays[ row, field, k - 1 ], plays[ row, field, k ] = plays[ row, field, k ], plays[ row, field, k - 1 ]
+                k -= 1
+        for j in range( 1, count ) :
+            if plays[ row, 0, j ] << 13 | plays[ row, 1, j ] == killer :
+                for k in range( j, 0, -1 ) :
+                    for field in range(3) :
+                        plays[ row, field, k - 1 ], plays[ row, field, k ] = plays[ row, field, k ], plays[ row, field, k - 1 ]
+                break
+        return count
+
+    _int = numba.types.int64
+    _SEARCH = numba.types.UniTuple( _int, 2 )(
+        _int[ :, ::1 ], _int, _int, _int, _int, _int, _int, _int, numba.types.boolean, _int, _int,
+        _int[ :, ::1 ], _int[ ::1 ], _int[ ::1 ],
+        _int[ :, ::1 ], _int[ :, :, ::1 ], _int[ ::1 ], _int[ :, ::1 ], _int[ ::1 ] )
+
+    @numba.njit( _SEARCH, cache=True ) # one signature: numba cannot cache a recursion between two
+    def _c_search( hands, trump, seat, leader, lead_suit, winner, win_suit, win_bit, ranked, target,
+                   remaining, links, info, used, outs, plays, killers, runs, nodes ) :
+        '''
+        DoubleDummy._trick for the leader when lead_suit is -1, else
+        DoubleDummy._play in the trick begun with remaining cards in each
+        hand. They are one function, as numba cannot cache functions that
+        call each other.
+        '''
+        start = lead_suit < 0
+        if start :
+            if target <= 0 :
+                return 0, 0
+            o0 = hands[ 0, 0 ] | hands[ 1, 0 ] | hands[ 2, 0 ] | hands[ 3, 0 ]
+            o1 = hands[ 0, 1 ] | hands[ 1, 1 ] | hands[ 2, 1 ] | hands[ 3, 1 ]
+            o2 = hands[ 0, 2 ] | hands[ 1, 2 ] | hands[ 2, 2 ] | hands[ 3, 2 ]
+            o3 = hands[ 0, 3 ] | hands[ 1, 3 ] | hands[ 2, 3 ] | hands[ 3, 3 ]
+            remaining = ( _BITS[ o0 ] + _BITS[ o1 ] + _BITS[ o2 ] + _BITS[ o3 ] ) // 4
+            if target > remaining :
+                return remaining, 0
+            signature0, cards0, lengths0 = _c_suit( hands, 0 )
+            signature1, cards1, lengths1 = _c_suit( hands, 1 )
+            signature2, cards2, lengths2 = _c_suit( hands, 2 )
+            signature3, cards3, lengths3 = _c_suit( hands, 3 )
+            key = 1 << 62 | leader << 52 | remaining << 48 | lengths0 << 32 | lengths1 << 16 | lengths2
+            root = _c_find( links, key )
+            if root >= 0 :
+                value, shifts = _c_probe( links, info, root, signature0, signature1, signature2, signature3, target )
+                if value >= 0 :
+                    h0, h1, h2, h3 = shifts & 31, shifts >> 5 & 31, shifts >> 10 & 31, shifts >> 15
+                    win = _c_tops( o0, cards0 - h0 // 2 ) | _c_tops( o1, cards1 - h1 // 2 ) << 13 \
+                          | _c_tops( o2, cards2 - h2 // 2 ) << 26 | _c_tops( o3, cards3 - h3 // 2 ) << 39
+                    return value, win
+            count, win = _c_sure_tricks( hands, trump, leader, runs )
+            need = target if leader % 2 == 0 else remaining - target + 1
+            quick = 0
+            for j in range( count ) :
+                quick += runs[ 0, j ]
+            if quick >= need :
+                # the longest runs first, as few as the target needs
+                quick = 0
+                while quick < need :
+                    best = 0
+                    for j in range( 1, count ) :
+                        if runs[ 0, j ] > runs[ 0, best ] \
+                        or ( runs[ 0, j ] == runs[ 0, best ] and runs[ 1, j ] > runs[ 1, best ] ) :
+                            best = j
+                    quick += runs[ 0, best ]
+                    win |= runs[ 1, best ]
+                    runs[ 0, best ] = 0
+                return ( quick if leader % 2 == 0 else remaining - quick ), win
+            holder, run = _c_top_trumps( hands, trump )
+            need = target if holder % 2 == 0 else remaining - target + 1
+            if run >= need :
+                trumps = o0 if trump == 0 else o1 if trump == 1 else o2 if trump == 2 else o3
+                return ( run if holder % 2 == 0 else remaining - run ), _c_tops( trumps, need ) << ( 13 * trump )
+            outs[ remaining, 0 ], outs[ remaining, 1 ], outs[ remaining, 2 ], outs[ remaining, 3 ] = o0, o1, o2, o3
+        nodes[0] += 1
+        row = 4 * remaining + ( seat + 4 - leader ) % 4
+        count = _c_moves( hands, trump, seat, leader, lead_suit, winner, win_suit, win_bit, outs, remaining,
+                          plays, row, killers[ row ] )
+        maximizing = seat % 2 == 0
+        best = -1 if maximizing else 14
+        wins = 0
+        next_seat = ( seat + 1 ) % 4
+        last = next_seat == leader
+        cut = False
+        # typed values, not constants, for a new trick: a call with
+        # constants would ask numba for a second version of this function
+        no_suit, no_bit, no_rank = numpy.int64( -1 ), numpy.int64( 0 ), numpy.bool_( False )
+        for j in range( count ) :
+            suit, bit = plays[ row, 0, j ], plays[ row, 1, j ]
+            if start :
+                new_lead, new_winner, new_suit, new_bit, new_ranked = suit, seat, suit, bit, False
+            else :
+                new_lead = lead_suit
+                if suit == win_suit :
+                    new_ranked = True
+                    if bit > win_bit :
+                        new_winner, new_suit, new_bit = seat, suit, bit
+                    else :
+                        new_winner, new_suit, new_bit = winner, win_suit, win_bit
+                elif suit == trump :
+                    new_winner, new_suit, new_bit, new_ranked = seat, suit, bit, False
+                else :
+                    new_winner, new_suit, new_bit, new_ranked = winner, win_suit, win_bit, ranked
+            hands[ seat, suit ] ^= bit
+            if last :
+                won = 1 if new_winner % 2 == 0 else 0
+                value, win = _c_search( hands, trump, new_winner, new_winner, no_suit, new_winner, no_suit,
+                                        no_bit, no_rank, target - won, remaining - 1,
+                                        links, info, used, outs, plays, killers, runs, nodes )
+                value += won
+                if new_ranked :
+                    win |= new_bit << ( 13 * new_suit )
+            else :
+                value, win = _c_search( hands, trump, next_seat, leader, new_lead, new_winner, new_suit,
+                                        new_bit, new_ranked, target, remaining, links, info, used,
+                                        outs, plays, killers, runs, nodes )
+            hands[ seat, suit ] ^= bit
+            if maximizing :
+                if value >= target :
+                    best, wins, cut = value, win, True
+                    if j :
+                        killers[ row ] = suit << 13 | bit
+                    break
+                best = max( best, value )
+            else :
+                if value < target :
+                    best, wins, cut = value, win, True
+                    if j :
+                        killers[ row ] = suit << 13 | bit
+                    break
+                best = min( best, value )
+            wins |= win
+        if not cut :
+            # every card of a run was tried through its top card
+            first, stop = ( lead_suit, lead_suit + 1 ) if not start and hands[ seat, lead_suit ] else ( 0, 4 )
+            for suit in range( first, stop ) :
+                below = wins >> ( 13 * suit ) & 0x1FFF
+                mine = hands[ seat, suit ]
+                if not ( below and mine ) :
+                    continue
+                low = below & -below
+                rest = outs[ remaining, suit ]
+                top = bottom = 0
+                while True :
+                    bit = _HIGH[ rest ]
+                    if bit and mine & bit :
+                        if not top :
+                            top = bit
+                        bottom = bit
+                    else :
+                        if top >= low > bottom :
+                            wins |= bottom << ( 13 * suit )
+                            break
+                        if not bit :
+                            break
+                        top = 0
+                    rest ^= bit
+        if not start :
+            return best, wins
+        # the bound is stored for the cards out from the top down to the
+        # lowest winning rank of each suit
+        value, win = best, wins
+        below = win & 0x1FFF
+        h0 = 2 * _BITS[ o0 & ( ( below & -below ) - 1 ) ]
+        below = win >> 13 & 0x1FFF
+        h1 = 2 * _BITS[ o1 & ( ( below & -below ) - 1 ) ]
+        below = win >> 26 & 0x1FFF
+        h2 = 2 * _BITS[ o2 & ( ( below & -below ) - 1 ) ]
+        below = win >> 39 & 0x1FFF
+        h3 = 2 * _BITS[ o3 & ( ( below & -below ) - 1 ) ]
+        node, fresh = _c_add( links, used, key )
+        if node >= 0 :
+            info[ node ] |= 1 << h0
+            node, fresh = _c_add( links, used, node << 32 | h0 << 27 | signature0 >> h0 )
+        if node >= 0 :
+            info[ node ] |= 1 << h1
+            node, fresh = _c_add( links, used, node << 32 | h1 << 27 | signature1 >> h1 )
+        if node >= 0 :
+            info[ node ] |= 1 << h2
+            node, fresh = _c_add( links, used, node << 32 | h2 << 27 | signature2 >> h2 )
+        if node >= 0 :
+            info[ node ] |= 1 << h3
+            node, fresh = _c_add( links, used, node << 32 | h3 << 27 | signature3 >> h3 )
+        if node >= 0 :
+            low, high = ( 0, remaining ) if fresh else ( info[ node ] & 255, info[ node ] >> 8 )
+            if value >= target :
+                low = max( low, value )
+            else :
+                high = min( high, value )
+            info[ node ] = low | high << 8
+        return value, win
+
+class DoubleDummy() :
+    '''
+    Double-dummy analysis of one deal.
+
+    DoubleDummy( hands ): hands is a sequence of four Piles for North,
+    East, South and West, all of the same length. Raises ValueError if
+    they are not, or if a card appears twice.
+
+    tricks( strain, declarer ) -> int, the tricks declarer's side takes
+    with best play by both sides, the player on declarer's left leading.
+
+    table() -> dict of tricks for all ( strain, declarer ) pairs.
+
+    nodes is the number of card plays searched so far.
+
+    compiled is True if the search runs compiled by numba, which it does
+    when numba is installed; set it False to search in Python.
+    '''
+
+    def __init__( self, hands:Sequence[Pile] ) :
+        if len( hands ) != 4 :
+            raise ValueError( 'A deal has four hands' )
+        if len( { len( hand ) for hand in hands } ) != 1 :
+            raise ValueError( 'The hands must be the same length' )
+        self._hands = [ [ 0, 0, 0, 0 ] for _ in range(4) ]
+        for seat, hand in enumerate( hands ) :
+            for card in hand :
+                suit, bit = card.suit_rank(), 1 << ( card.rank() - 2 )
+                if any( [ h[ suit ] & bit for h in self._hands ] ) :
+                    raise ValueError( 'Card appears twice: ' + str( card ) )
+                self._hands[ seat ][ suit ] |= bit
+        self._length = len( hands[0] )
+        self._results = dict() # ( strain, leader ) -> North-South tricks
+        self.nodes = 0
+        self.compiled = numba is not None
+
+    def tricks( self, strain:str, declarer:str ) -> int :
+        trump = STRAINS.index( strain )
+        seat = SEATS.index( declarer )
+        leader = ( seat + 1 ) % 4
+        if ( trump, leader ) not in self._results :
+            self._solve_strain( trump )
+        north_south = self._results[ ( trump, leader ) ]
+        return north_south if seat % 2 == 0 else self._length - north_south
+
+    def table( self ) -> Dict[ Tuple[str, str], int ] :
+        return { ( strain, declarer ) : self.tricks( strain, declarer )
+                 for strain in STRAINS for declarer in SEATS }
+
+    def _solve_strain( self, trump:int ) :
+        ''' find North-South tricks for each of the four leads in one strain '''
+        self._trump = trump
+        self._table = dict()
+        trick = self._trick
+        if self.compiled :
+            hands = numpy.array( self._hands, dtype=numpy.int64 )
+            links = numpy.zeros( ( 1 << 18, 2 ), dtype=numpy.int64 ) # the transposition table
+            info = numpy.zeros( 1 << 17, dtype=numpy.int64 )
+            used = numpy.zeros( 1, dtype=numpy.int64 )
+            outs = numpy.zeros( ( 14, 4 ), dtype=numpy.int64 ) # per trick, by cards left in a hand
+            plays = numpy.zeros( ( 56, 3, 13 ), dtype=numpy.int64 ) # per play of a trick
+            killers = numpy.zeros( 56, dtype=numpy.int64 )
+            runs = numpy.zeros( ( 4, 4 ), dtype=numpy.int64 )
+            nodes = numpy.zeros( 1, dtype=numpy.int64 )
+
+            def trick( leader:int, target:int ) -> Tuple[int, int] :
+                nonlocal links, info
+                if 4 * used[0] >= len( links ) :
+                    links = _c_grow( links )
+                    info = numpy.concatenate( ( info, numpy.zeros_like( info ) ) )
+                nodes[0] = 0
+                value, win = _c_search( hands, trump, leader, leader, -1, leader, -1, 0, False, target,
+                                        0, links, info, used, outs, plays, killers, runs, nodes )
+                self.nodes += int( nodes[0] )
+                return int( value ), int( win )
+
+        guess = self._length // 2
+        for leader in ( 0, 2, 1, 3 ) :
+            low, high = 0, self._length
+            value = guess
+            while low < high :
+                target = min( max( value, low + 1 ), high )
+                value = trick( leader, target )[0]
+                if value >= target :
+                    low = value
+                    value += 1
+                else :
+                    high = value
+            self._results[ ( trump, leader ) ] = low
+            guess = low
+
+    # the search. Positions are kept in self._hands, changed and restored
+    # as cards are played. _trick and _play return a count of North-South
+    # tricks from here on: if it is target or more, North-South can take at
+    # least that many; if less, they can take no more than that. With the
+    # count they return the winning ranks, a 52-bit mask, bit 13 * suit +
+    # rank - 2, of the cards whose ranks the count depends on: the cards
+    # that won a trick by beating another card of their suit, and the top
+    # cards a quick-trick count relied on. Any position with the same
+    # leader and suit lengths, in which the same hands hold the cards of
+    # each suit from the top down to its lowest winning rank, has the same
+    # bound, so the transposition table keeps only that much of it.
+
+    def _quick_tricks( self, leader:int ) -> List[ Tuple[int, int] ] :
+        '''
+        Tricks the leader can surely cash from the top: in each suit, the
+        run of top cards he holds. In a trump contract a side suit counts
+        no more than the length of each opponent who holds a trump.
+        Returns ( tricks, cards ) for each suit with a run, the cards being
+        the top cards the tricks rely on.
+        '''
+        hands = self._hands
+        mine = hands[ leader ]
+        left, right = hands[ ( leader + 1 ) % 4 ], hands[ ( leader + 3 ) % 4 ]
+        trump = self._trump
+        runs = []
+        for suit in range(4) :
+            held = mine[ suit ]
+            if not held :
+                continue
+            out = held | left[ suit ] | right[ suit ] | hands[ ( leader + 2 ) % 4 ][ suit ]
+            run = 0
+            while out :
+                bit = 1 << ( out.bit_length() - 1 )
+                if not held & bit :
+                    break
+                out ^= bit
+                run += 1
+            if run and trump != NOTRUMP and suit != trump :
+                if left[ trump ] :
+                    run = min( run, _COUNT[ left[ suit ] ] )
+                if right[ trump ] :
+                    run = min( run, _COUNT[ right[ suit ] ] )
+            if run :
+                runs.append( ( run, _tops( held, run ) << ( 13 * suit ) ) )
+        return runs
+
+    def _sure_tricks( self, leader:int ) -> Tuple[ List[ Tuple[int, int] ], int ] :
+        '''
+        The quick tricks of the leader, or of his partner if the leader can
+        reach a top card of the partner's in a suit the opponents cannot
+        ruff, whichever is more, and the card that reaches the partner, or
+        0 when the leader's own are more.
+        '''
+        runs = self._quick_tricks( leader )
+        hands = self._hands
+        mine, partner = hands[ leader ], hands[ ( leader + 2 ) % 4 ]
+        left, right = hands[ ( leader + 1 ) % 4 ], hands[ ( leader + 3 ) % 4 ]
+        trump = self._trump
+        for suit in range(4) :
+            if not ( mine[ suit ] and partner[ suit ] ) :
+                continue
+            out = mine[ suit ] | partner[ suit ] | left[ suit ] | right[ suit ]
+            top = 1 << ( out.bit_length() - 1 )
+            if not partner[ suit ] & top :
+                continue
+            if trump != NOTRUMP and suit != trump \
+            and ( ( not left[ suit ] and left[ trump ] ) or ( not right[ suit ] and right[ trump ] ) ) :
+                continue
+            his = self._quick_tricks( ( leader + 2 ) % 4 )
+            if sum( [ run for run, cards in his ] ) > sum( [ run for run, cards in runs ] ) :
+                return his, top << ( 13 * suit )
+            break
+        return runs, 0
+
+    def _top_trumps( self ) -> Tuple[int, int] :
+        '''
+        ( seat, run ) for the hand holding the top trump, where run is how
+        many top trumps it holds in a row, each of which must win a trick.
+        ( 0, 0 ) in notrump or when the trumps are gone.
+        '''
+        trump = self._trump
+        if trump == NOTRUMP :
+            return 0, 0
+        hands = self._hands
+        out = hands[0][ trump ] | hands[1][ trump ] | hands[2][ trump ] | hands[3][ trump ]
+        if not out :
+            return 0, 0
+        bit = 1 << ( out.bit_length() - 1 )
+        seat = 0 if hands[0][ trump ] & bit else 1 if hands[1][ trump ] & bit \
+               else 2 if hands[2][ trump ] & bit else 3
+        held = hands[ seat ][ trump ]
+        run = 0
+        while out and held & bit :
+            run += 1
+            out ^= bit
+            bit = 1 << ( out.bit_length() - 1 ) if out else 0
+        return seat, run
+
+    def _trick( self, leader:int, target:int ) -> Tuple[int, int] :
+        if target <= 0 :
+            return 0, 0
+        north, east, south, west = self._hands
+        out = [ north[0] | east[0] | south[0] | west[0], north[1] | east[1] | south[1] | west[1],
+                north[2] | east[2] | south[2] | west[2], north[3] | east[3] | south[3] | west[3] ]
+        remaining = ( _COUNT[ out[0] ] + _COUNT[ out[1] ] + _COUNT[ out[2] ] + _COUNT[ out[3] ] ) // 4
+        if target > remaining :
+            return remaining, 0
+        suits = ( _suit( ( north[0], east[0], south[0], west[0] ) ), _suit( ( north[1], east[1], south[1], west[1] ) ),
+                  _suit( ( north[2], east[2], south[2], west[2] ) ), _suit( ( north[3], east[3], south[3], west[3] ) ) )
+        key = ( leader, suits[0][2], suits[1][2], suits[2][2], suits[3][2] )
+        patterns = self._table.get( key )
+        if patterns :
+            for shifts, bounds in patterns.items() :
+                found = bounds.get( ( suits[0][0] >> shifts[0], suits[1][0] >> shifts[1],
+                                      suits[2][0] >> shifts[2], suits[3][0] >> shifts[3] ) )
+                if found and ( found[0] >= target or found[1] < target ) :
+                    win = 0
+                    for s in range(4) :
+                        win |= _tops( out[s], suits[s][1] - shifts[s] // 2 ) << ( 13 * s )
+                    return found[0] if found[0] >= target else found[1], win
+        # tricks the side on lead can cash, and tricks the top trumps take,
+        # as few of them as the target needs
+        runs, win = self._sure_tricks( leader )
+        need = target if leader % 2 == 0 else remaining - target + 1
+        if sum( [ run for run, cards in runs ] ) >= need :
+            runs.sort( reverse=True )
+            quick = 0
+            for run, cards in runs :
+                quick += run
+                win |= cards
+                if quick >= need :
+                    break
+            return ( quick if leader % 2 == 0 else remaining - quick ), win
+        holder, run = self._top_trumps()
+        need = target if holder % 2 == 0 else remaining - target + 1
+        if run >= need :
+            trumps = out[ self._trump ]
+            return ( run if holder % 2 == 0 else remaining - run ), \
+                   _tops( trumps, need ) << ( 13 * self._trump )
+        value, win = self._play( leader, leader, -1, leader, -1, 0, False, target, out )
+        # only the cards out from the top down to the lowest winning rank
+        # of each suit are kept, as a prefix of its signature
+        shifts = []
+        for s in range(4) :
+            below = ( win >> ( 13 * s ) ) & 0x1FFF
+            shifts.append( 2 * _COUNT[ out[s] & ( ( below & -below ) - 1 ) ] )
+        shifts = tuple( shifts )
+        bounds = self._table.setdefault( key, dict() ).setdefault( shifts, dict() )
+        prefix = ( suits[0][0] >> shifts[0], suits[1][0] >> shifts[1],
+                   suits[2][0] >> shifts[2], suits[3][0] >> shifts[3] )
+        low, high = bounds.get( prefix, ( 0, remaining ) )
+        if value >= target :
+            bounds[ prefix ] = ( max( low, value ), high )
+        else :
+            bounds[ prefix ] = ( low, min( high, value ) )
+        return value, win
+
+    def _beaten( self, seat:int, lead_suit:int, suit:int, bit:int ) -> bool :
+        ''' True if seat, still to play, can beat the card ( suit, bit ) '''
+        hand = self._hands[ seat ]
+        trump = self._trump
+        if hand[ lead_suit ] :
+            return suit == lead_suit and hand[ suit ] > bit
+        if trump == NOTRUMP or not hand[ trump ] :
+            return False
+        return suit != trump or hand[ trump ] > bit
+
+    def _moves( self, seat:int, leader:int, lead_suit:int, winner:int,
+                win_suit:int, win_bit:int, out:List[int] ) -> List[ Tuple[int, int] ] :
+        '''
+        The plays to try for seat, as ( suit, bit ), one per sequence, the
+        likely winners first.
+        '''
+        hands = self._hands
+        hand = hands[ seat ]
+        trump = self._trump
+        if lead_suit >= 0 and hand[ lead_suit ] :
+            suits = ( lead_suit, )
+        else :
+            suits = range(4)
+        plays = []
+        for suit in suits :
+            if hand[ suit ] :
+                for bit in _sequences( hand[ suit ], out[ suit ] )[0] :
+                    plays.append( ( suit, bit ) )
+        if len( plays ) < 2 :
+            return plays
+        if lead_suit < 0 :
+            # leads: ruffs for partner and winners first, then low cards to
+            # partner's winners, and leads the opponents can ruff last
+            partner = hands[ ( seat + 2 ) % 4 ]
+            left, right = hands[ ( seat + 1 ) % 4 ], hands[ ( seat + 3 ) % 4 ]
+            keyed = []
+            for suit, bit in plays :
+                top = 1 << ( out[ suit ].bit_length() - 1 )
+                second = out[ suit ] ^ top
+                second = 1 << ( second.bit_length() - 1 ) if second else 0
+                if trump != NOTRUMP and suit != trump \
+                and ( ( not left[ suit ] and left[ trump ] ) or ( not right[ suit ] and right[ trump ] ) ) :
+                    keyed.append( ( 5, bit, suit ) )
+                elif trump != NOTRUMP and suit != trump and not partner[ suit ] and partner[ trump ] :
+                    keyed.append( ( 0, bit, suit ) )
+                elif bit == top :
+                    keyed.append( ( 0, -bit, suit ) )
+                elif partner[ suit ] & top :
+                    keyed.append( ( 1, bit, suit ) )
+                elif partner[ suit ] & second :
+                    keyed.append( ( 2, bit, suit ) )
+                elif right[ suit ] & top and hand[ suit ] & second :
+                    keyed.append( ( 4, bit, suit ) ) # away from a guarded second card
+                else :
+                    keyed.append( ( 3, bit, suit ) )
+        elif ( winner - seat ) % 2 == 0 and not (
+                ( seat + 1 ) % 4 != leader
+                and self._beaten( ( seat + 1 ) % 4, lead_suit, win_suit, win_bit ) ) :
+            # partner has the trick: lowest, trumps last
+            keyed = [ ( suit == trump, bit, suit ) for suit, bit in plays ]
+        else :
+            # the cheapest card that wins the trick for good, then one that
+            # wins it for now, then the lowest
+            last = ( seat + 1 ) % 4 == leader
+            keyed = []
+            for suit, bit in plays :
+                if bit > win_bit if suit == win_suit else suit == trump :
+                    if last or not self._beaten( ( seat + 1 ) % 4, lead_suit, suit, bit ) :
+                        keyed.append( ( 0, suit == trump, bit, suit ) )
+                    else :
+                        keyed.append( ( 1, suit == trump, bit, suit ) )
+                else :
+                    keyed.append( ( 2, suit == trump, bit, suit ) )
+            keyed.sort()
+            return [ ( play[3], play[2] ) for play in keyed ]
+        keyed.sort()
+        return [ ( suit, abs( bit ) ) for _, bit, suit in keyed ]
+
+    def _play( self, seat:int, leader:int, lead_suit:int, winner:int, win_suit:int,
+               win_bit:int, ranked:bool, target:int, out:List[int] ) -> Tuple[int, int] :
+        '''
+        Seat to play, in the trick led by leader; winner holds the trick so
+        far with the card ( win_suit, win_bit ), and ranked is True if it
+        beat another card of its suit. out is the cards in the hands when
+        the trick began, which are in hands or on the table now.
+        '''
+        self.nodes += 1
+        hand = self._hands[ seat ]
+        maximizing = seat % 2 == 0
+        best = -1 if maximizing else 14
+        wins = 0
+        next_seat = ( seat + 1 ) % 4
+        last = next_seat == leader
+        trump = self._trump
+        for suit, bit in self._moves( seat, leader, lead_suit, winner, win_suit, win_bit, out ) :
+            if lead_suit < 0 :
+                new_lead, new_winner, new_suit, new_bit, new_ranked = suit, seat, suit, bit, False
+            else :
+                new_lead = lead_suit
+                if suit == win_suit :
+                    new_ranked = True
+                    if bit > win_bit :
+                        new_winner, new_suit, new_bit = seat, suit, bit
+                    else :
+                        new_winner, new_suit, new_bit = winner, win_suit, win_bit
+                elif suit == trump :
+                    new_winner, new_suit, new_bit, new_ranked = seat, suit, bit, False
+                else :
+                    new_winner, new_suit, new_bit, new_ranked = winner, win_suit, win_bit, ranked
+            hand[ suit ] ^= bit
+            if last :
+                won = new_winner % 2 == 0
+                value, win = self._trick( new_winner, target - won )
+                value += won
+                if new_ranked :
+                    win |= new_bit << ( 13 * new_suit )
+            else :
+                value, win = self._play( next_seat, leader, new_lead, new_winner, new_suit,
+                                         new_bit, new_ranked, target, out )
+            hand[ suit ] ^= bit
+            if maximizing :
+                if value >= target :
+                    return value, win
+                best = max( best, value )
+            else :
+                if value < target :
+                    return value, win
+                best = min( best, value )
+            wins |= win
+        # every card of a run was tried through its top card, which holds
+        # only while the run reaches down as far as it does
+        for suit in ( ( lead_suit, ) if lead_suit >= 0 and hand[ lead_suit ] else range(4) ) :
+            below = ( wins >> ( 13 * suit ) ) & 0x1FFF
+            if below and hand[ suit ] :
+                low = below & -below
+                for top, bottom in zip( *_sequences( hand[ suit ], out[ suit ] ) ) :
+                    if top >= low > bottom :
+                        wins |= bottom << ( 13 * suit )
+                        break
+        return best, wins
+
+def _analyze( positions:List[ List[int] ] ) -> Dict[ Tuple[str, str], int ] :
+    ''' the table for one deal, given as lists of card positions '''
+    hands = []
+    for hand in positions :
+        pile = Pile()
+        for p in hand :
+            pile.receive( Card( p ) )
+        hands.append( pile )
+    return DoubleDummy( hands ).table()
+
+def analyze_deals( deals:Sequence[ Sequence[Pile] ], workers:int = None ) -> List[ Dict[ Tuple[str, str], int ] ] :
+    '''
+    The table() of each deal, in order, where each deal is four Piles as
+    for DoubleDummy. The deals are solved in a pool of worker processes
+    (workers defaults to the number of CPUs; 1 means in this process).
+    Only card positions are sent to the workers.
+    '''
+    tasks = [ [ [ card.position() for card in hand ] for hand in deal ] for deal in deals ]
+    if workers == 1 :
+        return [ _analyze( task ) for task in tasks ]
+    with multiprocessing.Pool( workers ) as pool :
+        return pool.map( _analyze, tasks, chunksize=1 )
+
+'''
+Test code
+'''
+
+if __name__ == '__main__' :
+
+    from suit_card_deck import Deck
+    import random
+
+    def hand( text:str ) -> Pile :
+        ''' a hand from suit holdings like 'AKQ.-.J2.T' in C.D.H.S order '''
+        pile = Pile()
+        for suit, holding in enumerate( text.split( '.' ) ) :
+            for letter in holding.replace( '-', '' ) :
+                pile.receive( Card( 13 * suit + '23456789TJQKA'.index( letter ) ) )
+        return pile
+
+    # four cards each: North has all the top clubs
+    D = DoubleDummy( [ hand( 'AKQJ.-.-.-' ), hand( '-.AKQJ.-.-' ),
+                       hand( '-.-.AKQJ.-' ), hand( '-.-.-.AKQJ' ) ] )
+    assert D.tricks( 'N', 'S' ) == 0 # West leads spades and runs them
+    assert D.tricks( 'N', 'W' ) == 0 # North leads clubs
+    assert D.tricks( 'C', 'N' ) == 4 # East leads, North ruffs and cashes
+    assert D.tricks( 'S', 'W' ) == 4
+    assert D.tricks( 'H', 'E' ) == 0 # South leads hearts
+
+    # a finesse: North's AQ sits over West's K
+    D = DoubleDummy( [ hand( 'AQ.-.-.-' ), hand( '65.-.-.-' ),
+                       hand( '43.-.-.-' ), hand( 'K2.-.-.-' ) ] )
+    assert D.tricks( 'N', 'N' ) == 2 # East leads, the finesse works
+    assert D.tricks( 'N', 'E' ) == 0 # South leads toward the AQ
+    assert D.tricks( 'N', 'W' ) == 1 # North must lead away from the AQ
+
+    try :
+        DoubleDummy( [ hand( 'A.-.-.-' ) ] * 4 )
+        assert False
+    except ValueError :
+        pass
+
+    # compare with plain minimax on small random endings
+    def minimax( hands, trump, leader ) :
+        ''' North-South tricks by brute force, hands as lists of cards (suit, rank) '''
+        def play( hands, leader, trick ) :
+            seat = ( leader + len( trick ) ) % 4
+            if len( trick ) == 4 :
+                winner = leader
+                best = trick[0]
+                for j, card in enumerate( trick ) :
+                    if ( card[0] == best[0] and card[1] > best[1] ) or ( card[0] == trump and best[0] != trump ) :
+                        winner, best = ( leader + j ) % 4, card
+                if not hands[0] :
+                    return ( winner % 2 == 0 )
+                return ( winner % 2 == 0 ) + play( hands, winner, [] )
+            cards = list( hands[ seat ] )
+            if trick and any( c[0] == trick[0][0] for c in cards ) :
+                cards = [ c for c in cards if c[0] == trick[0][0] ]
+            results = []
+            for card in cards :
+                hands[ seat ].remove( card )
+                results.append( play( hands, leader, trick + [ card ] ) )
+                hands[ seat ].append( card )
+            return max( results ) if seat % 2 == 0 else min( results )
+        return play( hands, leader, [] )
+
+    random.seed( 11 )
+    for trial in range( 8 ) :
+        positions = random.sample( range( 52 ), 16 )
+        piles = [ Pile() for _ in range(4) ]
+        for j, p in enumerate( positions ) :
+            piles[ j % 4 ].receive( Card( p ) )
+        D = DoubleDummy( piles )
+        lists = [ [ ( c.suit_rank(), c.rank() ) for c in pile ] for pile in piles ]
+        for strain in STRAINS :
+            trump = STRAINS.index( strain )
+            for declarer in range(4) :
+                ns = minimax( lists, trump, ( declarer + 1 ) % 4 )
+                expect = ns if declarer % 2 == 0 else 4 - ns
+                assert D.tricks( strain, SEATS[ declarer ] ) == expect
+
+    # endings of six cards, solved in worker processes
+    random.seed( 2 )
+    deals = []
+    for _ in range(3) :
+        deck = Deck()
+        deck.shuffle()
+        deals.append( [ deck.deal_pile( 6 ) for _ in range(4) ] )
+    tables = analyze_deals( deals, workers=2 )
+    assert len( tables ) == 3
+    for deal, results in zip( deals, tables ) :
+        assert results == DoubleDummy( deal ).table()
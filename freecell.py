@@ -0,0 +1,534 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+
+Emulation of the solitaire game "FreeCell", the second game (after Klondike)
+to be played by the solitaire_solver module.
+
+All 52 cards are dealt face-up into eight tableau piles. There are four free
+cells, each of which can hold any one card, and four foundations, built up
+by suit from the Ace. A card can be played onto a tableau pile of the other
+color and one rank higher, or onto an empty tableau pile.
+
+Only one card is moved at a time, but a run of cards in sequence can be
+moved together when there are enough free cells and empty piles to have
+moved it one card at a time. That is (free cells + 1) times 2 to the power of
+the number of empty piles, not counting the destination if it is empty.
+
+Moves are written as two characters, source and destination, as in the
+Klondike game:
+    1 to 8: the tableau piles
+    W, X, Y, Z: the free cells
+    C, D, H, S: the foundations (destination only)
+
+The display looks like (for example)
+
+ W:--  X:♦K  Y:--  Z:--    C:A  D:-  H:3  S:-
+ (1) (2) (3) (4) (5) (6) (7) (8)
+  ♣K  ♠7  ♥9  ♦5  ♣3  ♠J  ♥Q  ♦8
+  ...
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+from __future__ import annotations
+from suit_card_deck import *
+from solitaire_solver import SearchRules
+from typing import List
+
+def _legality_tables() :
+    '''
+    Work out the rules of play for every pair of cards once, so that
+    can_play_to() and run_length() are lookups, as in klondike.py. Returns
+
+        TABLEAU_STACKS[ 52*card + top ]: card can go on top in the tableau
+        FOUNDATION_STACKS[ 52*card + top ]: card can go on top in a foundation
+        FOUNDATION_EMPTY[ flag ]: the card that starts the foundation flag
+
+    where card and top are card positions. Unlike Klondike, an Ace can go
+    on a deuce of the other color in the tableau.
+    '''
+    cards = [ Card( p ) for p in range( 52 ) ]
+    tableau_stacks = tuple(
+        card.color() != top.color() and top.nrank() == card.nrank() + 1
+        for card in cards for top in cards )
+    foundation_stacks = tuple(
+        card.suit() is top.suit() and card.nrank() == top.nrank() + 1
+        for card in cards for top in cards )
+    foundation_empty = { card.suit().initial() : card.position()
+                         for card in cards if card.rank() == Rank.rA }
+    return tableau_stacks, foundation_stacks, foundation_empty
+
+TABLEAU_STACKS, FOUNDATION_STACKS, FOUNDATION_EMPTY = _legality_tables()
+
+# Card.nrank() by card position
+NRANKS = tuple( Card( p ).nrank() for p in range( 52 ) )
+
+class FreeCell():
+    '''
+    Implement the apparatus and the rules of the game.
+
+    The tableau is eight piles flagged 'T', the free cells four piles
+    flagged 'F' that hold at most one card each, and the foundations
+    four piles flagged with the initial of their suit. As in Klondike, the
+    top card of a pile is pile[0], so a run of cards in sequence is
+    pile[:n] with pile[n-1] the highest-ranked card of the run.
+
+    last_move is ( source letter, destination letter, card ) for the last
+    move made, where card is the lowest card it carried, or None.
+    '''
+
+    _header_line = ' (1) (2) (3) (4) (5) (6) (7) (8)'
+    tableau_letters = '12345678'
+    cell_letters = 'WXYZ'
+    ace_letters = 'CDHS'
+
+    def __init__( self, seed:int=None ) :
+        '''
+        Initialize game apparatus, shuffle, and deal all the cards to the
+        tableau, left to right.
+        '''
+        self.aces = [ Pile('C'), Pile('D'), Pile('H'), Pile('S') ]
+        self.cells = [ Pile('F') for _ in range(4) ]
+        self.tableau = [ Pile('T') for _ in range(8) ]
+        self.deck = Deck()
+        if seed : # user wants a certain game
+            import random
+            random.seed(seed)
+        self.deck.shuffle( times=5 )
+        for j in range(52) :
+            self.tableau[ j % 8 ].receive( self.deck.deal() )
+        self.last_move = None
+        self._children = None # positions FreeCellRules.moves() made from this one
+
+    def clone( self ) -> FreeCell :
+        '''
+        Return a copy of the game for searching. The piles are copied, but
+        the Cards and the Deck are shared with this game.
+        '''
+        new_game = FreeCell.__new__( FreeCell )
+        new_game.aces = [ p.copy() for p in self.aces ]
+        new_game.cells = [ p.copy() for p in self.cells ]
+        new_game.tableau = [ p.copy() for p in self.tableau ]
+        new_game.deck = self.deck
+        new_game.last_move = self.last_move
+        new_game._children = None
+        return new_game
+
+    def __getstate__( self ) :
+        ''' pickle the game without the positions FreeCellRules made from it '''
+        state = self.__dict__.copy()
+        state[ '_children' ] = None
+        return state
+
+    def game_over( self ) -> bool :
+        ''' The game is won when all cards are on the foundations. '''
+        return 52 == sum( [ len(x) for x in self.aces ] )
+
+    def can_play_to( self, card:Card, dest:Pile ) -> bool :
+        '''
+        Can card be played on dest?
+
+        To a tableau: the tableau is empty, or its top card is of the other
+        color and one rank higher (Ace is low).
+
+        To a free cell: the cell is empty.
+
+        To a foundation: same as Klondike, the correct Ace on an empty
+        foundation or the next higher card of the same suit.
+
+        The rules are looked up in the tables made by _legality_tables().
+        '''
+        flag = dest.flag()
+        if flag == 'T' :
+            return 0 == len(dest) \
+                or TABLEAU_STACKS[ card.position() * 52 + dest[0].position() ]
+        if flag == 'F' :
+            return 0 == len(dest)
+        if len(dest) :
+            return FOUNDATION_STACKS[ card.position() * 52 + dest[0].position() ]
+        return FOUNDATION_EMPTY.get( flag ) == card.position()
+
+    def run_length( self, pile:Pile ) -> int :
+        '''
+        The number of cards at the top of pile that are in sequence, each
+        of the other color and one rank lower than the card below it.
+        '''
+        if 0 == len(pile) :
+            return 0
+        n = 1
+        card = pile[0].position()
+        for below in pile[ 1: ] :
+            top = below.position()
+            if not TABLEAU_STACKS[ card * 52 + top ] :
+                break
+            card = top
+            n += 1
+        return n
+
+    def capacity( self, to_empty_pile:bool ) -> int :
+        '''
+        The longest run that can be moved at once, given the empty cells
+        and empty tableau piles, not counting an empty destination.
+        '''
+        free_cells = sum( [ 1 for c in self.cells if 0 == len(c) ] )
+        empty_piles = sum( [ 1 for t in self.tableau if 0 == len(t) ] )
+        if to_empty_pile :
+            empty_piles -= 1
+        return ( free_cells + 1 ) << max( 0, empty_piles )
+
+    def _pile( self, letter:str ) -> Pile :
+        if letter in self.tableau_letters :
+            return self.tableau[ self.tableau_letters.index( letter ) ]
+        if letter in self.cell_letters :
+            return self.cells[ self.cell_letters.index( letter ) ]
+        return self.aces[ self.ace_letters.index( letter ) ]
+
+    def _cards_to_move( self, source:Pile, dest:Pile,
+                        run:int = None, capacities:tuple = None ) -> int :
+        '''
+        How many cards a move from source to dest would carry: the longest
+        part of the run at the top of a tableau source that dest can take
+        within capacity(), or the top card alone for other moves. Zero when
+        the move is not legal. A caller testing many moves can pass the
+        run_length() of source and the pair capacity(False), capacity(True)
+        rather than have them counted again for each move.
+        '''
+        if 0 == len(source) :
+            return 0
+        if source.flag() == 'T' and dest.flag() == 'T' :
+            if run is None :
+                run = self.run_length( source )
+            if capacities is None :
+                capacities = ( self.capacity( False ), self.capacity( True ) )
+            if 0 == len(dest) :
+                return min( run, capacities[1] )
+            # only the card one rank below the top of dest can go on it
+            top = dest[0].position()
+            n = NRANKS[ top ] - NRANKS[ source[0].position() ]
+            if 0 < n <= min( run, capacities[0] ) \
+            and TABLEAU_STACKS[ source[n-1].position() * 52 + top ] :
+                return n
+            return 0
+        return 1 if self.can_play_to( source[0], dest ) else 0
+
+    def move( self, source_letter:str, dest_letter:str ) :
+        '''
+        Execute a move command with a source in '12345678WXYZ' and a
+        destination in '12345678WXYZCDHS'. Raise ValueError if the move is
+        not legal (it is up to the caller to display errors).
+        '''
+        source_pile = self._pile( source_letter )
+        dest_pile = self._pile( dest_letter )
+        if 0 == len(source_pile) :
+            raise ValueError( 'No cards in source '+source_letter )
+        if dest_pile is source_pile :
+            raise ValueError( 'Source and destination are the same' )
+        count = self._cards_to_move( source_pile, dest_pile )
+        if 0 == count :
+            raise ValueError( 'Invalid move' )
+        self.last_move = ( source_letter, dest_letter, source_pile[count-1] )
+        if 1 == count :
+            dest_pile.receive( source_pile.remove() )
+        else :
+            dest_pile.receive_pile( source_pile.remove_pile( count ) )
+
+    def legal_moves( self ) -> List[str] :
+        '''
+        Return every command that move() would accept: plays to a
+        foundation first, then to a non-empty tableau pile, then to an
+        empty tableau pile, and last to a free cell.
+        '''
+        to_aces = []
+        to_tableau = []
+        to_empty = []
+        to_cells = []
+        capacities = ( self.capacity( False ), self.capacity( True ) )
+        empty_cells = [ c for c in range(4) if 0 == len( self.cells[c] ) ]
+        tops = [ pile[0].position() if len( pile ) else None for pile in self.tableau ]
+        sources = zip( self.tableau_letters + self.cell_letters,
+                       self.tableau + self.cells )
+        for source_letter, source_pile in sources :
+            if 0 == len( source_pile ) :
+                continue
+            card = source_pile[0]
+            from_tableau = source_pile.flag() == 'T'
+            run = self.run_length( source_pile ) if from_tableau else 1
+            suit = card.suit_rank()
+            if self.can_play_to( card, self.aces[suit] ) :
+                to_aces.append( source_letter + self.ace_letters[suit] )
+            # as in _cards_to_move(), only the card one rank below the top
+            # of a pile can go on it; the source's own top gives n == 0
+            reach = min( run, capacities[0] )
+            rank = NRANKS[ card.position() ]
+            for d in range(8) :
+                top = tops[d]
+                if top is None :
+                    to_empty.append( source_letter + self.tableau_letters[d] )
+                    continue
+                n = NRANKS[ top ] - rank
+                if 0 < n <= reach \
+                and TABLEAU_STACKS[ source_pile[n-1].position() * 52 + top ] :
+                    to_tableau.append( source_letter + self.tableau_letters[d] )
+            if from_tableau :
+                for c in empty_cells :
+                    to_cells.append( source_letter + self.cell_letters[c] )
+        return to_aces + to_tableau + to_empty + to_cells
+
+    def play( self, command:str ) :
+        ''' Carry out a command as returned by legal_moves(). '''
+        self.move( command[0], command[1] )
+
+    def autoplay( self ) -> List[str] :
+        '''
+        Play to the foundations every card that can never be needed in the
+        tableau, and repeat until no such card remains. Return the commands
+        played. The test is the one Klondike.safe_to_play() uses: the
+        card's rank is at most 2 above both foundations of the other color,
+        so the cards that could be put on it can go up next, and at most 3
+        above the other foundation of its color, so the cards that could be
+        put on those can go up too. Aces and deuces always qualify.
+        '''
+        played = []
+        progress = True
+        while progress :
+            progress = False
+            for source_letter in self.tableau_letters + self.cell_letters :
+                source_pile = self._pile( source_letter )
+                if 0 == len( source_pile ) :
+                    continue
+                card = source_pile[0]
+                ace = self.aces[ card.suit_rank() ]
+                if not self.can_play_to( card, ace ) :
+                    continue
+                suit = card.suit_rank()
+                rank = len( ace ) + 1 # Ace is 1
+                other = [ len( self.aces[s] ) for s in range(4)
+                          if Suit.colors[s] != card.color() ]
+                if rank <= 2 + min( other ) and rank <= 3 + len( self.aces[ 3 - suit ] ) :
+                    ace.receive( source_pile.remove() )
+                    played.append( source_letter + self.ace_letters[ card.suit_rank() ] )
+                    progress = True
+        return played
+
+    def display( self, dest=None ) :
+        '''
+        Write the current game state to a stream, stdout by default, and
+        return the number of lines written.
+        '''
+        for c in range(4) :
+            print( ' {}:{}'.format( self.cell_letters[c],
+                                    self.cells[c][0] if len(self.cells[c]) else '--' ),
+                   file=dest, end=' ' )
+        print( '  ', file=dest, end='' )
+        for s in range(4) :
+            dash_or_rank = '-' if 0==len(self.aces[s]) else self.aces[s][0].name()
+            print( Suit(s).initial() + ':' + dash_or_rank, file=dest, end=' ' )
+        print( file=dest )
+        print( self._header_line, file=dest )
+        max_depth = max( [ len(p) for p in self.tableau ] )
+        for row in range( max_depth ) :
+            for pile in self.tableau :
+                out = str( pile[ len(pile) - row - 1 ] ) if len(pile) > row else '  '
+                print( ' ', out, end='', file=dest )
+            print( file=dest )
+        return max_depth + 2
+
+class FreeCellRules( SearchRules ) :
+    '''
+    Present the rules of FreeCell to the solitaire_solver Solver. A position
+    is a FreeCell object and a move is a command from legal_moves().
+
+    Since the free cells are interchangeable, and so are the empty tableau
+    piles, only the first empty cell or pile is offered as a destination,
+    and a whole pile is never moved to an empty pile. A move that would
+    only undo the last move, putting the same cards back where they came
+    from, is not offered either. After each move the safe plays to the
+    foundations are made by autoplay(), so a move in a solution can stand
+    for several commands (see expand()).
+
+    The moves are listed best first by the evaluate() score of the
+    positions they lead to. moves() keeps those positions in the game, and
+    play() hands them out rather than make them again.
+
+    The position key ignores the order of the tableau piles and of the cells.
+    '''
+
+    def moves( self, game:FreeCell ) -> List[str] :
+        first_empty = [ l for l in game.tableau_letters if 0 == len( game._pile(l) ) ][:1] \
+                    + [ l for l in game.cell_letters if 0 == len( game._pile(l) ) ][:1]
+        last = game.last_move
+        moves = []
+        for command in game.legal_moves() :
+            dest = game._pile( command[1] )
+            if dest.flag() in 'TF' and 0 == len( dest ) :
+                if command[1] not in first_empty :
+                    continue
+                source = game._pile( command[0] )
+                if dest.flag() == 'T' and source.flag() == 'T' \
+                and game._cards_to_move( source, dest ) == len( source ) :
+                    continue
+            if last is not None and command[0] == last[1] \
+            and ( command[1] == last[0]
+                  or command[1] in game.cell_letters and last[0] in game.cell_letters ) :
+                source = game._pile( command[0] )
+                if source[ game._cards_to_move( source, dest ) - 1 ] is last[2] :
+                    continue # it would put back just what the last move moved
+            moves.append( command )
+        children = { command : self._make( game, command ) for command in moves }
+        values = { command : self.evaluate( child ) for command, child in children.items() }
+        moves.sort( key=values.get, reverse=True )
+        game._children = children
+        return moves
+
+    @staticmethod
+    def evaluate( game:FreeCell ) -> int :
+        '''
+        Score a position, to try the moves to the best positions first:
+        8 for each card on the foundations, 1 for each empty free cell, 3
+        for each empty tableau pile and 1 for each card in sequence on the
+        one below it at the top of a pile, less 1 for each card lying on a
+        card that is next or next but one to go up on its foundation.
+        '''
+        levels = [ len( pile ) for pile in game.aces ]
+        value = 8 * sum( levels ) \
+              + sum( [ 1 for pile in game.cells if 0 == len( pile ) ] )
+        for pile in game.tableau :
+            if 0 == len( pile ) :
+                value += 3
+                continue
+            value += game.run_length( pile ) - 1
+            for depth, card in enumerate( pile ) :
+                if NRANKS[ card.position() ] <= levels[ card.suit_rank() ] + 1 :
+                    value -= depth
+        return value
+
+    def play( self, game:FreeCell, command:str ) -> FreeCell :
+        if game._children is not None and command in game._children :
+            return game._children.pop( command )
+        return self._make( game, command )
+
+    def _make( self, game:FreeCell, command:str ) -> FreeCell :
+        new_game = game.clone()
+        new_game.play( command )
+        new_game.autoplay()
+        return new_game
+
+    def key( self, game:FreeCell ) -> tuple :
+        return (
+            tuple( sorted( tuple( c.position() for c in pile )
+                           for pile in game.tableau ) ),
+            tuple( sorted( pile[0].position() for pile in game.cells if len(pile) ) )
+            )
+
+    def solved( self, game:FreeCell ) -> bool :
+        return game.game_over()
+
+    def expand( self, game:FreeCell, moves:List[str] ) -> List[str] :
+        '''
+        Replay a solution from the starting position, returning the full
+        list of commands including the automatic plays.
+        '''
+        game = game.clone()
+        commands = []
+        for command in moves :
+            game.play( command )
+            commands.append( command )
+            commands += game.autoplay()
+        return commands
+
+'''
+Test code
+'''
+
+if __name__ == '__main__' :
+
+    from solitaire_solver import Solver
+
+    G = FreeCell( 12345 )
+    assert 52 == sum( [ len(t) for t in G.tableau ] )
+    assert [ len(t) for t in G.tableau ] == [7,7,7,7,6,6,6,6]
+    assert G.capacity( False ) == 5
+    for command in G.legal_moves() :
+        G.clone().play( command ) # every listed move is legal
+    try :
+        G.move( 'W', '1' )
+        assert False
+    except ValueError :
+        pass
+
+    # a run of three moves at once with two cells free
+    G = FreeCell( 12345 )
+    for p in G.tableau + G.cells :
+        while len(p) : p.remove()
+    D = Deck()
+    T1, T2 = G.tableau[0], G.tableau[1]
+    for p in ( 11, 10+13, 9+39 ) : T1.receive( D._cards[p] ) # ♣K ♦Q ♠J
+    for p in ( 11+26, 10+26, 9 ) : T2.receive( D._cards[p] ) # ♥K ♥Q ♣J
+    G.cells[0].receive( D._cards[0] )
+    G.cells[1].receive( D._cards[1] )
+    assert G.run_length( T1 ) == 3
+    assert G.run_length( T2 ) == 2
+    G.move( '2', '3' ) # ♥Q ♣J to empty pile 3
+    assert len( G.tableau[2] ) == 2 and len( T2 ) == 1
+
+    # autoplay moves only safe cards: ♥4 may be wanted for ♣3 or ♠3, which
+    # may be wanted for ♦2, until ♦ reaches 1
+    G = FreeCell( 12345 )
+    for p in G.tableau + G.cells + G.aces :
+        while len(p) : p.remove()
+    cards = G.deck._cards
+    for s, height in ( (0,2), (2,3), (3,2) ) :
+        for r in ( [ 12 ] + list( range(12) ) )[ : height ] :
+            G.aces[s].receive( cards[ 13*s + r ] )
+    G.tableau[0].receive( cards[ 26 + 2 ] ) # ♥4
+    G.tableau[1].receive( cards[ 13 + 1 ] ) # ♦3
+    assert G.autoplay() == []
+    assert len( G.tableau[0] ) == 1
+    G.cells[0].receive( cards[ 13 + 12 ] ) # ♦A
+    assert G.autoplay() == [ 'WD', '1H' ] # now ♦ is at 1, ♥4 can go
+    # an end game: Aces to nines on the foundations, the other sixteen
+    # cards two to a pile with the Kings and Queens on top
+    G = FreeCell( 12345 )
+    for p in G.tableau + G.aces :
+        while len(p) : p.remove()
+    cards = G.deck._cards
+    for s in range(4) :
+        for r in [ 12 ] + list( range(8) ) : # Ace, then 2..9
+            G.aces[s].receive( cards[ 13*s + r ] )
+    for j, (under, over) in enumerate( [ (8,11), (9,10) ] * 4 ) :
+        suit = 13 * ( j // 2 )
+        G.tableau[j].receive( cards[ suit + under ] )
+        G.tableau[j].receive( cards[ suit + over ] )
+    assert not G.legal_moves()[0].endswith( tuple( G.ace_letters ) )
+    rules = FreeCellRules()
+    S = Solver( rules )
+    solution = S.solve( G )
+    assert solution is not None and not S.limited
+    for command in rules.expand( G, solution ) :
+        G.play( command )
+    assert G.game_over()
+
+    # whole deals, each solved within a few thousand positions
+    for seed in ( 1, 2, 3, 4, 5, 6, 7, 12345 ) :
+        G = FreeCell( seed )
+        S = Solver( rules, node_limit=2000 )
+        solution = S.solve( G, max_depth=200, first_depth=200 )
+        assert solution is not None, seed
+        for command in rules.expand( G, solution ) :
+            G.play( command )
+        assert G.game_over()
+
+    # a move that only undoes the last one is not offered, but a move
+    # back that carries other cards is
+    for seed, command in ( ( 10, '83' ), ( 7, '7W' ), ( 1, '31' ) ) :
+        G = FreeCell( seed )
+        G.play( command )
+        assert command[::-1] in G.legal_moves()
+        assert ( command[::-1] in rules.moves( G ) ) == ( seed == 1 )
@@ -6,7 +6,7 @@ Simple emulation of the solitaire game "Klondike by Threes" to exercise the
 suit_card_deck module.
 
 
-PTUI (plain terminal user interface) (TODO: rewrite for curses)
+PTUI (plain terminal user interface); klondike_curses.py is a curses front end
 
 On each turn displays the layout as (for example)
 
@@ -32,6 +32,9 @@ p6 (♦3 from pack to ♣4) and 63 (♦5/♣4 from pile 6 to ♠6 on pile 3)
 A null order (return only) means, turn up the next card. If the deck has been
 completely turned over, return means, invert it and turn it.
 
+    python klondike.py           play
+    python klondike.py test      run the test code
+
     LICENSE
 
 This work is licensed under the Creative Commons
@@ -41,9 +44,144 @@ http://creativecommons.org/licenses/by-nc-sa/4.0/.
 
 '''
 
+from __future__ import annotations
 from suit_card_deck import *
-from typing import List, Union
+from solitaire_solver import SearchRules
+from typing import Dict, List, Optional, Tuple, Union
 import string
+import time
+
+def _legality_tables() :
+    '''
+    Work out the rules of play for every pair of cards once, so that
+    can_play_to() is a lookup. Returns
+
+        TABLEAU_STACKS[ 52*card + top ]: card can go on top in the tableau
+        TABLEAU_EMPTY[ card ]: card can go on an empty tableau pile
+        FOUNDATION_STACKS[ 52*card + top ]: card can go on top in a foundation
+        FOUNDATION_EMPTY[ flag ]: the card that starts the foundation flag
+
+    where card and top are card positions.
+    '''
+    cards = [ Card( p ) for p in range( 52 ) ]
+    tableau_stacks = tuple(
+        card.rank() < Rank.rA
+        and card.suit().color() != top.suit().color()
+        and top.rank() == ( card.rank() + 1 )
+        for card in cards for top in cards )
+    tableau_empty = tuple( card.rank() == Rank.rK for card in cards )
+    foundation_stacks = tuple(
+        card.suit() == top.suit() and card.nrank() == top.nrank()+1
+        for card in cards for top in cards )
+    foundation_empty = { card.suit().initial() : card.position()
+                         for card in cards if card.rank() == Rank.rA }
+    return tableau_stacks, tableau_empty, foundation_stacks, foundation_empty
+
+TABLEAU_STACKS, TABLEAU_EMPTY, FOUNDATION_STACKS, FOUNDATION_EMPTY = _legality_tables()
+
+def _safety_table() :
+    '''
+    For each card position, ( foundation, rank, opposite foundations,
+    foundation of the other suit of the same color ), foundations by index
+    in 'CDHS' and rank with the Ace as 1, for Klondike.safe_to_play().
+    '''
+    cards = [ Card( p ) for p in range( 52 ) ]
+    table = []
+    for card in cards :
+        others = [ s for s in range(4) if s != card.suit_rank() ]
+        opposite = tuple( s for s in others if Suit( s ).color() != card.color() )
+        same = [ s for s in others if Suit( s ).color() == card.color() ][0]
+        table.append( ( card.suit_rank(), card.nrank() + 1, opposite, same ) )
+    return tuple( table )
+
+SAFETY = _safety_table()
+
+# the cards each card can be played on in the tableau, by position
+PARENTS = tuple( tuple( top for top in range( 52 ) if TABLEAU_STACKS[ card * 52 + top ] )
+                 for card in range( 52 ) )
+
+def _reach_tables() :
+    '''
+    Work out, for a stock of n cards of which top have been dealt to the
+    pack, which of them can come to the top of the pack by turning the deck
+    and how many turns that takes, when no card is taken from the pack in
+    between. Returns REACH[ n ][ top+1 ], a tuple of ( index, turns ) by
+    increasing turns, where index counts the stock in dealing order.
+
+    Turning deals three cards (fewer at the end), so a pass from top shows
+    top+3, top+6... and always the last card. After the last card the pack
+    goes back to the deck in the same order and the next pass shows 2, 5...
+    and the last card again, as every pass after it will.
+    '''
+    tables = []
+    for n in range( 25 ) :
+        by_top = []
+        for top in range( -1, n ) :
+            turns = dict()
+            if top >= 0 :
+                turns[ top ] = 0
+            for index in range( top + 1, n ) :
+                if ( index - top ) % 3 == 0 or index == n - 1 :
+                    turns[ index ] = ( index - top + 2 ) // 3
+            to_end = ( n - 1 - top + 2 ) // 3
+            for index in range( n ) :
+                if ( index + 1 ) % 3 == 0 or index == n - 1 :
+                    turns.setdefault( index, to_end + ( index + 3 ) // 3 )
+            by_top.append( tuple( sorted( turns.items(), key=lambda item : item[1] ) ) )
+        tables.append( tuple( by_top ) )
+    return tuple( tables )
+
+REACH = _reach_tables()
+
+class StockIndex() :
+    '''
+    The cards of the deck and the pack as one sequence in the order that
+    turning the deck deals them, and which of them can be brought to the
+    top of the pack in how many turns.
+
+    order is the stock, the pack from its bottom card up and then the deck
+    in dealing order; top is the index in order of the top card of the pack,
+    -1 when the pack is empty. turn() and remove() follow turn_the_deck()
+    and playing the top card of the pack, so the index never has to be made
+    again from the Deck and the Pile. reachable() is a lookup in REACH.
+    '''
+
+    __slots__ = ( 'order', 'top' )
+
+    def __init__( self, pack:Pile = None, deck:Deck = None ) :
+        if pack is None :
+            return # for copy()
+        self.order = [ pack[j] for j in range( len( pack ) - 1, -1, -1 ) ]
+        undealt = deck.copy()
+        self.order += [ undealt.deal() for _ in range( len( deck ) ) ]
+        self.top = len( pack ) - 1
+
+    def copy( self ) -> StockIndex :
+        new_index = StockIndex()
+        new_index.order = self.order[:]
+        new_index.top = self.top
+        return new_index
+
+    def turn( self ) :
+        ''' as turn_the_deck(): deal three, or turn the pack over first '''
+        if self.top == len( self.order ) - 1 :
+            self.top = min( 3, len( self.order ) ) - 1
+        else :
+            self.top = min( self.top + 3, len( self.order ) - 1 )
+
+    def remove( self ) :
+        ''' the top card of the pack has been played '''
+        del self.order[ self.top ]
+        self.top -= 1
+
+    def reachable( self ) -> List[ Tuple[Card, int] ] :
+        '''
+        The cards that can come to the top of the pack, each with the
+        number of turns of the deck needed, fewest first; the top card of
+        the pack (if any) with 0 turns.
+        '''
+        return [ ( self.order[ index ], turns )
+                 for index, turns in REACH[ len( self.order ) ][ self.top + 1 ] ]
 
 class Klondike():
     '''
@@ -62,8 +200,29 @@ class Klondike():
     must decrease in value. The index of the deepest (thus, highest-ranked)
     face-up card is pile[faceup_count-1].
 
+    face_up_cards( j ) and face_down_cards( j ) return these as PileViews
+    of tableau pile j, which do not copy the cards as a slice would.
+
     It works out conveniently to store the Pack as the 8th Tableau pile.
 
+    Some features of the position are kept up to date by move(), so that a
+    player or a solver can read them as often as it likes:
+
+        foundation_cards, the number of cards on the foundations
+        face_down, a list of the face-down cards in each tableau pile
+        face_down_total, the sum of face_down
+        empty_piles, the number of empty tableau piles
+        kings_ready, the number of tableau piles whose face-up cards start
+            with a King over face-down cards, which an empty pile would free
+
+    Set autoplay_sources to any of 'P1234567' to have play() follow each
+    command with the safe plays of auto_play() from those sources.
+
+    legal_moves() is worked out once for each position and then kept until
+    the next move or turn, so legal_move_count() costs nothing after it.
+    Change the position only with move(), turn_the_deck() and play(), or
+    these go out of date.
+
     '''
     import sys
 
@@ -90,6 +249,49 @@ class Klondike():
             for p in range( j, 7 ) :
                 self.tableau[ p ].receive( self.deck.deal() )
         self.faceup_count = [1] * 7 # turn over the top card of each tableau pile
+        self.stock = StockIndex( self.pack, self.deck )
+        self.foundation_cards = 0
+        self.face_down = list( range(7) )
+        self.face_down_total = 21
+        self.empty_piles = 0
+        self.kings_ready = len( [ j for j in range( 1, 7 )
+                                  if TABLEAU_EMPTY[ self.tableau[j][0].position() ] ] )
+        self._moves = None # legal_moves() of this position, once worked out
+        self._blocking = None # _waiting() of this position, once worked out
+        # the sources, any of 'P1234567', from which play() makes the safe
+        # plays of auto_play() after each command; none by default
+        self.autoplay_sources = ''
+        self._hints = None # the HintEngine of hint(), made when first wanted
+
+    def clone( self ) -> Klondike :
+        '''
+        Return a copy of the game position, for a player or solver to try
+        moves on. The piles, the face-up counts and the deck's dealing
+        sequence are copied; the Card objects are shared with this game.
+        '''
+        new_game = Klondike.__new__( Klondike )
+        new_game.aces = [ pile.copy() for pile in self.aces ]
+        new_game.tableau = [ pile.copy() for pile in self.tableau ]
+        new_game.deck = self.deck.copy()
+        new_game.pack = self.pack.copy()
+        new_game.faceup_count = self.faceup_count[:]
+        new_game.stock = self.stock.copy()
+        new_game.foundation_cards = self.foundation_cards
+        new_game.face_down = self.face_down[:]
+        new_game.face_down_total = self.face_down_total
+        new_game.empty_piles = self.empty_piles
+        new_game.kings_ready = self.kings_ready
+        new_game._moves = self._moves
+        new_game._blocking = self._blocking
+        new_game.autoplay_sources = self.autoplay_sources
+        new_game._hints = None
+        return new_game
+
+    def __getstate__( self ) :
+        ''' pickle the game without the hint engine's table '''
+        state = self.__dict__.copy()
+        state[ '_hints' ] = None
+        return state
 
     def game_over( self ) -> bool :
         '''
@@ -102,10 +304,11 @@ class Klondike():
         seems pretty unlikely. Anyway, you don't have to play all 52 cards to
         the foundations to get the game over with. Just play all but the last
         pack card into the tableaux.
+
+        That is, when at most one card is left face down, in the deck or
+        in the pack.
         '''
-        foundation_cards = sum( [ len(x) for x in self.aces ] )
-        tableau_face_up = sum( self.faceup_count )
-        return 51 <= foundation_cards + tableau_face_up
+        return len( self.deck ) + len( self.pack ) + self.face_down_total <= 1
 
     '''
     Turn the deck, that is, deal the top 3 cards onto the pack, so one can be
@@ -119,6 +322,7 @@ class Klondike():
     Deal the top 3 cards, or 2 or 1 as available, from deck to the pack.
     '''
     def turn_the_deck( self ) :
+        self._moves = None
         if 0 == len( self.deck ) :
             if len( self.pack ) :
                 self.pack.turn_over()
@@ -127,6 +331,9 @@ class Klondike():
                 return
         for k in range( min( 3, len( self.deck ) ) ) :
             self.pack.receive( self.deck.deal() )
+        self.stock.turn()
+        if self._hints is not None :
+            self._hints.played( 'NN' )
 
     '''
     Execute a move command give a source in 'P1234567' and a destination in
@@ -155,6 +362,7 @@ class Klondike():
     Carry out the move. Then, if the source has any cards left, deduct the
     count of cards moved from its faceup_count. If that reduces the face-up
     count to zero, and it has any cards left, turn up a card by setting face-up to 1.
+    Last, bring the features of the position up to date.
     '''
 
     def can_play_to( self, card:Card, dest:Pile ) -> bool :
@@ -168,35 +376,18 @@ class Klondike():
         Can play to a foundation if the foundation is not empty and the
         card is the same suit and one higher in numeric rank, or the
         foundation is empty and the card is the correct Ace.
+
+        The rules are looked up in tables indexed by card position, which
+        are made once from the rules by _legality_tables() above.
         '''
         if dest.flag() == 'T' : # playing to a tableau
-            #dbg = [ len(dest), card.rank(), card.suit().color() ]
-            #if len(dest) : dbg.append([ dest[0].suit().color(), dest[0].rank() ] )
-            return \
-                (
-                    len(dest)
-                    and card.rank() < Rank.rA
-                    and card.suit().color() != dest[0].suit().color()
-                    and dest[0].rank() == ( card.rank() + 1 )
-                ) or \
-                (
-                    0 == len(dest)
-                    and card.rank() == Rank.rK
-                )
+            if len(dest) :
+                return TABLEAU_STACKS[ card.position() * 52 + dest[0].position() ]
+            return TABLEAU_EMPTY[ card.position() ]
         else : # assume dest.flag in 'CDHS', playing to a foundation
-            #dbg = [ len(dest), card.suit(), card.nrank()]
-            #if len(dest) : dbg.append( [dest[0].suit(), dest[0].nrank()] )
-            return \
-                (
-                    len(dest)
-                    and card.suit() == dest[0].suit()
-                    and card.nrank() == dest[0].nrank()+1
-                ) or \
-                (
-                    0 == len(dest)
-                    and card.suit().initial() == dest.flag()
-                    and card.rank() == Rank.rA
-                )
+            if len(dest) :
+                return FOUNDATION_STACKS[ card.position() * 52 + dest[0].position() ]
+            return FOUNDATION_EMPTY.get( dest.flag() ) == card.position()
 
     def move( self, source_letter:str, dest_letter:str ) :
 
@@ -223,6 +414,10 @@ class Klondike():
         if dest_pile == source_pile :
             raise ValueError( 'Source and destination are the same' )
 
+        if source_is_tableau : # a King over face-down cards, before the move?
+            king_was_ready = self.face_down[source_number] and \
+                TABLEAU_EMPTY[ source_pile[ self.faceup_count[source_number]-1 ].position() ]
+
         if dest_is_tableau and source_is_tableau :
             # Can the dest receive all source face up cards?
             source_faceup_count = self.faceup_count[source_number]
@@ -245,14 +440,294 @@ class Klondike():
             else :
                 raise ValueError( 'Invalid move' )
             cards_moved = 1
+            if source_letter == 'P' :
+                self.stock.remove()
         if dest_is_tableau :
+            if 0 == self.faceup_count[dest_number] :
+                self.empty_piles -= 1
+                self._blocking = None
             self.faceup_count[dest_number] += cards_moved
+        else :
+            self.foundation_cards += 1
         if source_is_tableau :
             self.faceup_count[source_number] -= cards_moved
-            if self.faceup_count[ source_number ] == 0 \
-            and len(source_pile) :
-                # turn over top card of source tableau
-                self.faceup_count[source_number] = 1
+            if self.faceup_count[ source_number ] == 0 :
+                self._blocking = None
+                if king_was_ready :
+                    self.kings_ready -= 1
+                if len(source_pile) :
+                    # turn over top card of source tableau
+                    self.faceup_count[source_number] = 1
+                    self.face_down[source_number] -= 1
+                    self.face_down_total -= 1
+                    if self.face_down[source_number] \
+                    and TABLEAU_EMPTY[ source_pile[0].position() ] :
+                        self.kings_ready += 1
+                else :
+                    self.empty_piles += 1
+        self._moves = None
+        if self._hints is not None :
+            self._hints.played( source_letter + dest_letter )
+
+    def legal_moves( self ) -> List[str] :
+        '''
+        Return every command that move() would accept in the current
+        position, as two-character strings of source and destination such
+        as get_command() returns, followed by 'NN' (turn the deck) when the
+        deck or the pack has any cards.
+
+        Plays to a foundation are listed first, then plays to the tableau,
+        because a player or a solver usually wants to try them in that order.
+        '''
+        if self._moves is not None :
+            return list( self._moves )
+        to_aces = []
+        to_tableau = []
+        sources = [ ( 'P', self.pack, 1 ) ] + \
+                  [ ( '1234567'[j], self.tableau[j], self.faceup_count[j] )
+                    for j in range(7) ]
+        for source_letter, source_pile, faceup in sources :
+            if 0 == len( source_pile ) :
+                continue
+            top_card = source_pile[0]
+            for s in range(4) :
+                if self.can_play_to( top_card, self.aces[s] ) :
+                    to_aces.append( source_letter + 'CDHS'[s] )
+            for d in range(7) :
+                dest_pile = self.tableau[d]
+                if dest_pile is source_pile :
+                    continue
+                if self.can_play_to( top_card, dest_pile ) \
+                or ( source_letter != 'P'
+                     and self.can_play_to( source_pile[faceup-1], dest_pile ) ) :
+                    to_tableau.append( source_letter + '1234567'[d] )
+        moves = to_aces + to_tableau
+        if len( self.deck ) or len( self.pack ) :
+            moves.append( 'NN' )
+        self._moves = tuple( moves )
+        return moves
+
+    def legal_move_count( self ) -> int :
+        ''' len( legal_moves() ), worked out only once for a position '''
+        if self._moves is None :
+            self.legal_moves()
+        return len( self._moves )
+
+    def face_up_cards( self, j:int ) -> PileView :
+        ''' the face-up cards of tableau pile j, top first '''
+        return self.tableau[j].top( self.faceup_count[j] )
+
+    def face_down_cards( self, j:int ) -> PileView :
+        ''' the face-down cards of tableau pile j, top first '''
+        pile = self.tableau[j]
+        return pile.bottom( len( pile ) - self.faceup_count[j] )
+
+    def playable_stock( self ) -> List[ Tuple[int, str] ] :
+        '''
+        Return the plays of stock cards that turning the deck can make
+        possible, as ( turns, command ): turn the deck that many times, then
+        play command ('P' and a destination). Plays to a foundation are
+        listed before plays to the tableau, each by fewest turns. Uses the
+        stock index, so no turns are made to find them.
+        '''
+        to_aces = []
+        to_tableau = []
+        for card, turns in self.stock.reachable() :
+            for s in range(4) :
+                if self.can_play_to( card, self.aces[s] ) :
+                    to_aces.append( ( turns, 'P' + 'CDHS'[s] ) )
+            for d in range(7) :
+                if self.can_play_to( card, self.tableau[d] ) :
+                    to_tableau.append( ( turns, 'P' + '1234567'[d] ) )
+        return to_aces + to_tableau
+
+    def play( self, command:str ) -> List[str] :
+        '''
+        Carry out one command in the form returned by get_command() or
+        legal_moves(): 'NN' turns the deck, anything else is passed to
+        move() and so can raise ValueError. Then, if autoplay_sources names
+        any sources, make the safe plays to the foundations from them with
+        auto_play(). Returns the commands that auto_play() carried out.
+        '''
+        if command == 'NN' :
+            self.turn_the_deck()
+        else :
+            self.move( command[0], command[1] )
+        if self.autoplay_sources :
+            return self.auto_play( self.autoplay_sources )
+        return []
+
+    def hint( self, budget_ms:float = 50, node_limit:int = None,
+              max_depth:int = 200 ) -> Optional[str] :
+        '''
+        Suggest the next command, the best found by a HintEngine search of
+        about budget_ms milliseconds (or node_limit positions, or max_depth
+        moves ahead), or None if no move will help. The search sees only
+        what the player sees. The engine stays with the game and is told
+        every command played, so it remembers the positions hinted at
+        before and does not lead the player round in circles, and it goes
+        on from the search it made for the last hint.
+        '''
+        if self._hints is None :
+            self._hints = HintEngine()
+        return self._hints.hint( self, budget_ms, node_limit, max_depth )
+
+    def safe_to_play( self, card:Card ) -> bool :
+        '''
+        Can card go to its foundation now, with no risk of wanting it back?
+
+        A card in the tableau is wanted only as a place to put the cards of
+        the other color one rank lower. If those are already on their
+        foundations, or can go there next (both foundations of the other
+        color have reached two below card), and the cards of card's color two
+        lower that might want them in turn can go up too (the other
+        foundation of card's color has reached three below card), nothing
+        will ever need to be put on card. So card is safe when it is next on
+        its foundation, its rank is at most 2 above both foundations of the
+        other color, and at most 3 above the other foundation of its color.
+        Aces and deuces are always safe.
+        '''
+        foundation, rank, opposite, same = SAFETY[ card.position() ]
+        heights = [ len( pile ) for pile in self.aces ]
+        return heights[ foundation ] == rank - 1 \
+            and rank <= 2 + min( heights[ opposite[0] ], heights[ opposite[1] ] ) \
+            and rank <= 3 + heights[ same ]
+
+    def auto_play( self, sources:str = '1234567' ) -> List[str] :
+        '''
+        Play cards to the foundations from the tops of the sources, any of
+        'P1234567', for as long as one of them is safe_to_play(), and return
+        the commands played in order. Each is carried out by move(), which
+        keeps faceup_count up to date and turns up the next card of a pile.
+
+        Only the tableau is a source by default. Taking a card from the pack
+        is as safe for the foundations, but it changes which cards later
+        passes through the stock turn up, so it is not sure to be harmless.
+        '''
+        played = []
+        while True :
+            for letter in sources :
+                pile = self.pack if letter == 'P' else self.tableau[ '1234567'.index( letter ) ]
+                if len( pile ) and self.safe_to_play( pile[0] ) :
+                    command = letter + 'CDHS'[ pile[0].suit_rank() ]
+                    self.move( command[0], command[1] )
+                    played.append( command )
+                    break
+            else :
+                return played
+
+    def _waiting( self ) -> Tuple[ tuple, dict ] :
+        '''
+        The cards that can leave their piles only by a move in the tableau,
+        as ( pile, height, position ), height being the number of cards
+        under the card, and the ( pile, height ) of the cards under them by
+        position. These change only when a card is turned up or the deepest
+        face-up card of a pile changes, so they are kept until move() does
+        one of those.
+        '''
+        if self._blocking is None :
+            waiting = []
+            covered = dict()
+            for j, pile in enumerate( self.tableau ) :
+                lowest = [ 14 ] * 4 # lowest rank of each suit under the card
+                highest = None
+                run = pile.bottom( len( pile ) - self.faceup_count[j] + 1 )
+                for height, card in enumerate( reversed( run ) ) :
+                    position = card.position()
+                    suit, rank, opposite, same = SAFETY[ position ]
+                    if lowest[ suit ] < rank < 13 :
+                        waiting.append( ( j, height, position ) )
+                        highest = height
+                    elif rank < lowest[ suit ] :
+                        lowest[ suit ] = rank
+                if highest is not None :
+                    for height, card in enumerate( reversed( pile.bottom( highest ) ) ) :
+                        covered[ card.position() ] = ( j, height )
+            self._blocking = ( tuple( waiting ), covered )
+        return self._blocking
+
+    def _locked( self ) -> List[ Tuple[int, int] ] :
+        '''
+        The ( pile, height ) of each tableau card that can never leave its
+        pile, whatever is played; see locked_cards().
+        '''
+        waiting, covered = self._waiting()
+        if not waiting :
+            return []
+        aces = self.aces
+        freed = set()
+        changed = True
+        while changed :
+            changed = False
+            for card in waiting :
+                if card in freed :
+                    continue
+                for top in PARENTS[ card[2] ] :
+                    foundation, rank, opposite, same = SAFETY[ top ]
+                    if len( aces[ foundation ] ) >= rank :
+                        continue # on its foundation for good
+                    if top in covered :
+                        j, height = covered[ top ]
+                        if [ w for w in waiting if w[0] == j and w[1] > height and w not in freed ] :
+                            continue # under a card that has not been freed
+                    freed.add( card )
+                    changed = True
+                    break
+        return [ ( j, height ) for j, height, position in waiting
+                 if ( j, height, position ) not in freed ]
+
+    def locked_cards( self ) -> List[Card] :
+        '''
+        Return the tableau cards that can never leave their piles, however
+        the game is played. The search looks at the face-down cards, as the
+        Solver does.
+
+        A card with a lower card of its own suit under it in its pile cannot
+        go to the foundation before that card, and that card cannot come out
+        until the first one has left. If the first card is face down, or
+        the deepest face-up card, it can only leave as the head of a move in
+        the tableau, onto a card it can be played on (Kings are taken to be
+        able to reach an empty pile). Such a card is freed if one of the
+        cards it can go on is not on a foundation, where it would stay, and
+        is under no such card that is not itself freed. The cards that are
+        never freed, repeating until nothing changes, are locked: whether
+        each waits under its own only landing places, or a chain of piles
+        waits on each other, no sequence of moves can free them.
+        '''
+        return [ self.tableau[j][ len( self.tableau[j] ) - 1 - height ]
+                 for j, height in self._locked() ]
+
+    def is_stuck( self ) -> bool :
+        '''
+        True when no move can change the game any more, judged only from
+        cards the player can see: the deck has been turned through, so
+        every stock card is in the pack, in an order the player has seen,
+        and none of them can be played by turning; and the only moves left
+        take a King and its run from a pile with no face-down cards to an
+        empty pile. False for a game that is over.
+        '''
+        if self.game_over() or len( self.deck ) or self.playable_stock() :
+            return False
+        for command in self.legal_moves() :
+            if command == 'NN' :
+                continue
+            if command[0] == 'P' or command[1] in 'CDHS' :
+                return False
+            source = '1234567'.index( command[0] )
+            if self.faceup_count[ source ] < len( self.tableau[ source ] ) \
+            or len( self.tableau[ '1234567'.index( command[1] ) ] ) :
+                return False
+        return True
+
+    def is_lost( self ) -> bool :
+        '''
+        True when the locked cards keep two or more cards under them face
+        down for ever, so that game_over() can never be reached.
+        '''
+        under = dict() # the cards under the highest locked card of each pile
+        for j, height in self._locked() :
+            under[ j ] = max( height, under.get( j, 0 ) )
+        return sum( under.values() ) >= 2
 
 
     '''
@@ -313,6 +788,354 @@ class Klondike():
         return max_depth + 2
 
 
+class KlondikeRules( SearchRules ) :
+    '''
+    Present the rules of Klondike to the solitaire_solver Solver. A position
+    is a Klondike object and a move is a command from legal_moves().
+
+    Moving a face-up run headed by a King from a pile that has no face-down
+    cards onto an empty pile changes nothing, so those moves are not offered.
+
+    KlondikeRules( canonical=True ) gives positions canonical keys: the rules
+    treat the seven tableau piles alike, so two positions that differ only
+    in the order of the piles (for example, which empty pile a King was
+    moved to, or which of two fully face-up piles is which) have the same
+    key, and a transposition table holds one entry for all of them. The key
+    is a compact bytes object, not a nest of tuples. With canonical=False
+    the key also tells the piles apart, for callers that keep moves (which
+    name piles by number) under a key.
+
+    KlondikeRules( stock_moves=True ) does not offer 'NN' or plays from the
+    pack one turn at a time. Instead each play of a stock card that
+    Klondike.playable_stock() finds is one move, the turns and the play
+    written together: 'NNNNP3' is turn, turn, play from the pack to pile 3.
+    Turning the deck changes nothing in the tableau or the foundations, so
+    no play is lost by making turns only just before the play they are for.
+
+    KlondikeRules( auto_play=True ) follows every move with the plays from
+    the tableau that Klondike.auto_play() finds safe, so the search never
+    spends a move or a level of depth on them. To replay a solution, play
+    its moves through the rules' play().
+
+    KlondikeRules( prune=True ) makes dead() true of a position that
+    Klondike.is_lost() proves lost, so the Solver refutes it unsearched.
+    '''
+
+    def __init__( self, canonical:bool = True, stock_moves:bool = False,
+                  auto_play:bool = False, prune:bool = True ) :
+        self.canonical = canonical
+        self.stock_moves = stock_moves
+        self.auto_play = auto_play
+        self.prune = prune
+
+    def moves( self, game:Klondike ) -> List[str] :
+        moves = []
+        for command in game.legal_moves() :
+            if command[0] in '1234567' and command[1] in '1234567' :
+                source = '1234567'.index( command[0] )
+                if 0 == len( game.tableau[ '1234567'.index( command[1] ) ] ) \
+                and len( game.tableau[source] ) == game.faceup_count[source] :
+                    continue
+            elif self.stock_moves and command[0] in 'PN' :
+                continue
+            moves.append( command )
+        if self.stock_moves :
+            moves += [ 'NN' * turns + command for turns, command in game.playable_stock() ]
+        return moves
+
+    def play( self, game:Klondike, command:str ) -> Klondike :
+        new_game = game.clone()
+        for j in range( 0, len( command ), 2 ) :
+            new_game.play( command[ j : j+2 ] )
+        if self.auto_play :
+            new_game.auto_play()
+        return new_game
+
+    def key( self, game:Klondike ) -> bytes :
+        # Each pile is its length, face-up count and card positions, all
+        # under 256 so one byte each. Cards leave the deck and pack only
+        # from the top of the pack, and turning the deck keeps their order,
+        # so given the pack, the number of cards in the deck is enough to
+        # know which cards they are.
+        piles = [ bytes( ( len( pile ), game.faceup_count[j] ) )
+                  + bytes( [ c.position() for c in pile ] )
+                  for j, pile in enumerate( game.tableau ) ]
+        if self.canonical :
+            piles.sort()
+        return b''.join( piles ) \
+            + bytes( [ len( game.pack ) ] + [ c.position() for c in game.pack ] ) \
+            + bytes( [ len( game.deck ) ] + [ len( pile ) for pile in game.aces ] )
+
+    def solved( self, game:Klondike ) -> bool :
+        return game.game_over()
+
+    def dead( self, game:Klondike ) -> bool :
+        return self.prune and game.is_lost()
+
+
+class HintEngine() :
+    '''
+    Find a good next command for a Klondike game within a budget, seeing
+    only what the player sees.
+
+    engine = HintEngine( worlds=4, capacity=1<<18 )
+
+    engine.hint( game, budget_ms=50, node_limit=None, max_depth=200 )
+    makes worlds samples of the game with determinize(), each with the
+    face-down cards and the deck dealt again among their places, and
+    searches the moves of KlondikeRules( canonical=False, stock_moves=True )
+    in every sample by iterative deepening, one level deeper in all of them
+    each round, scoring the positions at the depth limit with evaluate().
+    Each first command gets the sum over the samples of the best value
+    after it, a stock move such as 'NNNNP3' counting as its first 'NN'.
+    When the time is spent, or more than node_limit positions have been
+    visited, or max_depth rounds are done, the command with the greatest
+    sum in the deepest round finished is returned. Returns None when there is nothing useful to do, which can
+    happen even with cards in the stock when turning the deck brings
+    nothing that plays in any sample, or when every move leads back to an
+    earlier position.
+
+    The table of searched positions holds, for each sample and what the
+    player would see of the position, the depth searched, the value and
+    the best move, so each round starts with the best move of the last.
+    The samples and the table are kept from one call to the next. The
+    next call plays in each sample the commands played in the game since,
+    as reported by engine.played( command ), and keeps the samples in which
+    the player would see the same as in the game. Only the samples that
+    the cards turned up since contradict are dealt again, and only their
+    entries are dropped from the table, so the search of the kept samples
+    starts from the work of the calls before. A Klondike game reports its
+    commands to the engine of its hint() method itself.
+
+    The engine also remembers every position it was asked about, and the
+    search counts a move back to one of them, or to a position already on
+    the path searched, as the worst of moves, so following the hints does
+    not go round in circles.
+
+    engine.depth and engine.nodes tell the depth completed and the number
+    of positions visited in the last call.
+    '''
+
+    WIN = 10000
+
+    def __init__( self, worlds:int = 4, capacity:int = 1 << 18 ) :
+        self.rules = KlondikeRules( canonical=False, stock_moves=True )
+        self.worlds = worlds
+        self.table = dict()
+        self.capacity = capacity
+        self.history = set()
+        self.depth = 0
+        self.nodes = 0
+        self._samples = [] # ( world, sample ), world numbering the samples dealt
+        self._next_world = 0
+        self._played = [] # commands played in the game since the last call
+        self._deadline = 0.0
+        self._node_limit = None
+        self._on_path = set()
+
+    @staticmethod
+    def evaluate( game:Klondike ) -> int :
+        '''
+        Score a position: cards on the foundations count 4, face-down cards
+        turned up 3 and cards out of the stock 1.
+        '''
+        return 4 * game.foundation_cards + 3 * ( 21 - game.face_down_total ) \
+            + ( 24 - len( game.stock.order ) )
+
+    @staticmethod
+    def seen_key( game:Klondike ) -> bytes :
+        '''
+        The key of what the player sees of a position: the key of
+        KlondikeRules( canonical=False ) with only the face-up cards of
+        each pile. Within one sample, as within one game, it tells
+        positions apart as well as the whole key does.
+        '''
+        piles = [ bytes( ( len( pile ), game.faceup_count[j] ) )
+                  + bytes( [ c.position() for c in game.face_up_cards(j) ] )
+                  for j, pile in enumerate( game.tableau ) ]
+        return b''.join( piles ) \
+            + bytes( [ len( game.pack ) ] + [ c.position() for c in game.pack ] ) \
+            + bytes( [ len( game.deck ) ] + [ len( pile ) for pile in game.aces ] )
+
+    def hint( self, game:Klondike, budget_ms:float = 50,
+              node_limit:int = None, max_depth:int = 200 ) -> Optional[str] :
+        self._deadline = time.perf_counter() + budget_ms / 1000
+        self._node_limit = node_limit
+        self.nodes = 0
+        self.depth = 0
+        if game.game_over() or not game.legal_moves() :
+            return None
+        samples = self._follow( game )
+        totals = None
+        try :
+            for depth in range( 1, max_depth + 1 ) :
+                round_totals = dict()
+                for world, sample in samples :
+                    for command, value in self._first_moves( sample, world, depth ).items() :
+                        round_totals[ command ] = round_totals.get( command, 0 ) + value
+                totals = round_totals
+                self.depth = depth
+                if not totals or max( totals.values() ) >= HintEngine.WIN * len( samples ) :
+                    break
+        except _OutOfBudget :
+            pass
+        self.history.add( self.seen_key( game ) )
+        if totals is None : # not even one level done
+            return game.legal_moves()[0]
+        if not totals :
+            return None
+        best = max( totals, key=totals.get )
+        if totals[ best ] < 0 : # every line goes back to an earlier position
+            return None
+        return best
+
+    def played( self, command:str ) :
+        ''' Note that command, as passed to Klondike.play(), was carried out. '''
+        self._played.append( command )
+
+    def _follow( self, game:Klondike ) -> List[Tuple[int, Klondike]] :
+        '''
+        Bring the samples of the last call up to game by playing in each
+        the commands played since. Keep those in which the player would
+        see the same as in game; deal new samples in place of the others
+        and drop the table entries of the ones replaced.
+        '''
+        seen = self.seen_key( game )
+        kept = []
+        stale = set()
+        for world, sample in self._samples :
+            try :
+                for command in self._played :
+                    if command == 'NN' :
+                        sample.turn_the_deck()
+                    else :
+                        sample.move( command[0], command[1] )
+            except ValueError : # a card it turned up was not the game's
+                stale.add( world )
+                continue
+            if self.seen_key( sample ) == seen :
+                kept.append( ( world, sample ) )
+            else :
+                stale.add( world )
+        self._played = []
+        if stale :
+            for key in [ key for key in self.table if key[0] in stale ] :
+                del self.table[ key ]
+        while len( kept ) < self.worlds :
+            kept.append( ( self._next_world, determinize( game ) ) )
+            self._next_world += 1
+        self._samples = kept
+        return kept
+
+    def _first_moves( self, sample:Klondike, world:int, depth:int ) -> Dict[str, int] :
+        ''' the best value in depth moves after each first command in sample '''
+        rules = self.rules
+        values = dict()
+        self._on_path = { self.seen_key( sample ) }
+        for move in rules.moves( sample ) :
+            value = self._search( rules.play( sample, move ), world, depth - 1 )
+            command = move[:2]
+            if command not in values or value > values[ command ] :
+                values[ command ] = value
+        return values
+
+    def _store( self, key:Tuple[int, bytes], depth:int, value:int, move:str ) :
+        if len( self.table ) >= self.capacity :
+            self.table.clear()
+        self.table[ key ] = ( depth, value, move )
+
+    def _search( self, game:Klondike, world:int, depth:int ) -> int :
+        ''' the best value reachable from game in depth moves '''
+        if game.game_over() :
+            return HintEngine.WIN + depth
+        if depth <= 0 :
+            return self.evaluate( game )
+        rules = self.rules
+        seen = self.seen_key( game )
+        if seen in self._on_path or seen in self.history :
+            return -1
+        key = ( world, seen )
+        entry = self.table.get( key )
+        if entry is not None and entry[0] >= depth :
+            return entry[1]
+        self.nodes += 1
+        if time.perf_counter() > self._deadline \
+        or ( self._node_limit is not None and self.nodes > self._node_limit ) :
+            raise _OutOfBudget()
+        moves = rules.moves( game )
+        if not moves :
+            value = self.evaluate( game )
+            self._store( key, depth, value, None )
+            return value
+        if entry is not None and entry[2] in moves :
+            moves.remove( entry[2] )
+            moves.insert( 0, entry[2] )
+        self._on_path.add( seen )
+        best_value = -2
+        best_move = None
+        for move in moves :
+            value = self._search( rules.play( game, move ), world, depth - 1 )
+            if value > best_value :
+                best_value, best_move = value, move
+        self._on_path.discard( seen )
+        self._store( key, depth, best_value, best_move )
+        return best_value
+
+class _OutOfBudget( Exception ) :
+    ''' raised inside HintEngine._search to unwind when the budget is spent '''
+    pass
+
+def determinize( game:Klondike ) -> Klondike :
+    '''
+    Return a copy of game in which the hidden cards, the face-down tableau
+    cards and the cards in the deck, have been shuffled among their places.
+    The face-up cards, the pack and the foundations are unchanged. The
+    hidden cards are put in order before they are shuffled, so the result
+    depends only on what the player sees and on the random module, which
+    Deck.shuffle() uses.
+    '''
+    world = game.clone()
+    deck = world.deck
+    face_up = []
+    hidden = []
+    for j, pile in enumerate( world.tableau ) :
+        face_up.append( pile.remove_pile( world.faceup_count[j] ) )
+        hidden.append( len( pile ) )
+        deck.put_back_pile( pile )
+    deck.arrange( sorted( deck.order() ) )
+    if len( deck ) > 1 :
+        deck.shuffle()
+    for j, pile in enumerate( world.tableau ) :
+        for _ in range( hidden[j] ) :
+            pile.receive( deck.deal() )
+        pile.receive_pile( face_up[j] )
+    world.stock = StockIndex( world.pack, world.deck )
+    world._blocking = None # the face-down cards have changed
+    world._moves = None
+    return world
+
+def hint_notice( command:Optional[str] ) -> str :
+    '''
+    The message for the player that offers command, as returned by
+    Klondike.hint(). Turning the deck is entered as an empty line, so
+    it is named rather than shown as its internal command 'NN'.
+    '''
+    if command is None :
+        return 'Try something else, no move helps'
+    if command == 'NN' :
+        return 'Try turning the deck (Enter)'
+    return 'Try ' + command
+
+def lost_notice( game:Klondike ) -> Optional[str] :
+    '''
+    If game.is_stuck(), a message saying so, for the player. Else None.
+    It rests only on what the player can see, unlike is_lost(), which
+    looks at the face-down cards and is for the solvers.
+    '''
+    if not game.is_stuck() :
+        return None
+    return 'This game cannot be won: no move is left that changes it.'
+
 def ask_another() -> str :
     '''
     prompt user if another game is wanted, return True if so,
@@ -332,77 +1155,309 @@ def ask_another() -> str :
         print("yeet!") # force a newline on ^C/Delete
         return False
 
+def parse_command( input_text:str ) -> Optional[str] :
+    '''
+    Make a command of what the user typed: NN for nothing (turn the deck),
+    HH for ?, ZZ for q, else a source and a destination, as 'P6'. Return
+    None if it is none of those.
+    '''
+    sources = '1234567P'
+    destinations = '1234567CDHS'
+    if input_text.lower() == "q" : return 'ZZ'
+    if input_text.strip() == "?" : return 'HH'
+    # strip commas and whitespace internal as well as outside
+    input_text = input_text.replace(',','')
+    command = input_text.translate( { ord(c):None for c in string.whitespace } )
+    # if nothing left after removing whitespace, return null command
+    if 0 == len( command) :
+        return 'NN'
+    # make uppercase
+    command = command.upper()
+    if len( command ) == 2 and \
+       command[0] in sources and \
+       command[1] in destinations and \
+       command[0] != command[1] :
+        return command
+    return None
+
 def get_command() -> str :
     '''
     Prompt the user for a move command, ensure it is two characters for
     source-target, and return it.
 
     If the command (after stripping) is null, return NN
+    If the command is ?, return HH, asking for a hint
     If the user hits ^D or ^C, return XX
 
     Allow manual "q" response because ^d doesn't work in Wing i/o window.
     '''
-    sources = '1234567P'
-    destinations = '1234567CDHS'
     while True :
         try:
             input_text = input( "source, target: " )
-            if input_text.lower() == "q" : return 'ZZ'
         except EOFError as e :
             print() # force a newline on ^D
             return 'XX'
         except KeyboardInterrupt as k :
             print() # force a newline on ^C/Delete
             return 'XX'
-
-        # strip commas and whitespace internal as well as outside
-        input_text.replace(',','')
-        command = input_text.translate( { ord(c):None for c in string.whitespace } )
-        # if nothing left after removing whitespace, return null command
-        if 0 == len( command) :
-            return 'NN'
-        # make uppercase
-        command = command.upper()
-        if len( command ) == 2 and \
-           command[0] in sources and \
-           command[1] in destinations and \
-           command[0] != command[1] :
-            break
+        command = parse_command( input_text )
+        if command is not None :
+            return command
 
         print( "Enter return to deal three more cards," )
         print( "Enter a source, 1 - 7 or P for the pack, and" )
         print( "a destination, C D H or S or 1-7, to move a card." )
+        print( "Enter ? for a hint." )
     # end input loop
-    return command
-
-
-# FOR DEVELOPMENT SET A FIXED SEED, OTHERWISE NONE
-# seed 319649 is a complete game
-# GAME_SEED = 319649
-GAME_SEED = None
-
-game = Klondike(GAME_SEED)
-while True:
-    game.display()
-    command = get_command()
-    if command == 'XX' :
-        # user hit ^C
-        break
-    if command == 'ZZ' :
-        # user entered q
-        if ask_another() :
-            game = Klondike(GAME_SEED)
-        else : break
-    elif command == 'NN' :
-        game.turn_the_deck()
-    else :
-        try:
-            game.move( command[0], command[1] )
-        except ValueError as VE:
-            print( str(VE) )
-    if not game.game_over() :
-        continue
-    if ask_another() :
+
+
+if __name__ == '__main__' :
+
+    import sys
+
+    if sys.argv[1:] != [ 'test' ] :
+
+        # FOR DEVELOPMENT SET A FIXED SEED, OTHERWISE NONE
+        # seed 319649 is a complete game
+        # GAME_SEED = 319649
+        GAME_SEED = None
+
         game = Klondike(GAME_SEED)
-    else :
-        break
+        warned = False # told the user the game is lost
+        while True:
+            game.display()
+            command = get_command()
+            if command == 'XX' :
+                # user hit ^C
+                break
+            if command == 'ZZ' :
+                # user entered q
+                if ask_another() :
+                    game = Klondike(GAME_SEED)
+                    warned = False
+                else : break
+            elif command == 'NN' :
+                game.turn_the_deck()
+            elif command == 'HH' :
+                print( hint_notice( game.hint() ) )
+            else :
+                try:
+                    game.move( command[0], command[1] )
+                except ValueError as VE:
+                    print( str(VE) )
+            if not game.game_over() :
+                if not warned :
+                    notice = lost_notice( game )
+                    if notice :
+                        print( notice )
+                        warned = True
+                continue
+            if ask_another() :
+                game = Klondike(GAME_SEED)
+                warned = False
+            else :
+                break
+        sys.exit( 0 )
+
+    import random
+
+    from solitaire_solver import Solver
+    rng = random.Random( 3 )
+    whole_key = KlondikeRules( canonical=False ).key
+
+    # the legality tables agree with the rules, and a pile that is neither
+    # tableau nor foundation takes no card
+    game = Klondike( 1 )
+    for card in [ Card( p ) for p in range( 52 ) ] :
+        for flag in 'CDHS' :
+            assert game.can_play_to( card, Pile( flag ) ) == ( card.rank() == Rank.rA
+                                                             and card.suit().initial() == flag )
+        assert not game.can_play_to( card, Pile( 'X' ) )
+
+    # the stock index follows turns and plays from the pack, and the cards
+    # it finds reachable come to the top of the pack in the turns given,
+    # as do no others
+    for seed in range( 1, 21 ) :
+        game = Klondike( seed )
+        for _ in range( 60 ) :
+            assert [ c.position() for c in game.stock.order ] == \
+                   [ c.position() for c in reversed( game.pack ) ] + game.deck.order()
+            turned = game.clone()
+            seen = dict()
+            for turns in range( 30 ) : # three passes of the largest stock
+                if len( turned.pack ) :
+                    seen.setdefault( turned.pack[0].position(), turns )
+                turned.turn_the_deck()
+            assert seen == { card.position() : turns for card, turns in game.stock.reachable() }
+            for turns, command in game.playable_stock() :
+                turned = game.clone()
+                for _ in range( turns ) :
+                    turned.turn_the_deck()
+                assert command in turned.legal_moves()
+            moves = game.legal_moves()
+            if not moves :
+                break
+            game.play( rng.choice( moves ) )
+
+    # moves that turn the deck as far as a playable stock card
+    stock_rules = KlondikeRules( stock_moves=True )
+    assert 'NN' not in stock_rules.moves( Klondike( 319649 ) )
+    solution = Solver( stock_rules ).solve( Klondike( 319649 ), max_depth=300, first_depth=300 )
+    assert solution is not None and any( command.startswith( 'NN' ) for command in solution )
+    game = Klondike( 319649 )
+    for command in solution :
+        game = stock_rules.play( game, command )
+    assert game.game_over()
+
+    # safe plays: safe_to_play() is the rule in its docstring, and with
+    # autoplay_sources set, play() makes every safe play from them and
+    # only those
+    for seed in range( 1, 21 ) :
+        game = Klondike( seed )
+        game.autoplay_sources = 'P1234567'
+        for _ in range( 100 ) :
+            heights = [ len( pile ) for pile in game.aces ]
+            for pile in game.tableau + [ game.pack ] :
+                if len( pile ) :
+                    card = pile[0]
+                    suit, rank = card.suit_rank(), card.nrank() + 1
+                    opposite = [ heights[s] for s in range(4) if Suit.colors[s] != card.color() ]
+                    assert game.safe_to_play( card ) == ( heights[ suit ] == rank - 1
+                        and rank <= 2 + min( opposite ) and rank <= 3 + heights[ 3 - suit ] )
+            moves = game.legal_moves()
+            if not moves :
+                break
+            before = game.foundation_cards
+            played = game.play( rng.choice( moves ) )
+            assert all( command[0] in 'P1234567' and command[1] in 'CDHS' for command in played )
+            assert game.foundation_cards >= before + len( played )
+            assert not [ pile for pile in game.tableau + [ game.pack ]
+                         if len( pile ) and game.safe_to_play( pile[0] ) ]
+    game = Klondike( 319649 )
+    auto_rules = KlondikeRules( auto_play=True )
+    solution = Solver( auto_rules ).solve( Klondike( 319649 ), max_depth=300, first_depth=300 )
+    assert solution is not None
+    for command in solution :
+        game = auto_rules.play( game, command )
+        assert not [ pile for pile in game.tableau if len( pile ) and game.safe_to_play( pile[0] ) ]
+    assert game.game_over()
+
+    # the features kept by move() agree with the piles, and so does the
+    # legal_moves() kept for the position
+    for seed in range( 1, 41 ) :
+        game = Klondike( seed )
+        for _ in range( 150 ) :
+            moves = game.legal_moves()
+            if not moves :
+                break
+            game.play( rng.choice( moves ) )
+            assert game.foundation_cards == sum( [ len( pile ) for pile in game.aces ] )
+            face_down = [ len( pile ) - game.faceup_count[j] for j, pile in enumerate( game.tableau ) ]
+            assert game.face_down == face_down and game.face_down_total == sum( face_down )
+            for j, pile in enumerate( game.tableau ) :
+                assert list( game.face_up_cards(j) ) == pile[ : game.faceup_count[j] ]
+                assert list( game.face_down_cards(j) ) == pile[ game.faceup_count[j] : ]
+            assert game.empty_piles == len( [ pile for pile in game.tableau if not len( pile ) ] )
+            assert game.kings_ready == len( [ j for j, pile in enumerate( game.tableau )
+                                              if face_down[j] and
+                                              TABLEAU_EMPTY[ pile[ game.faceup_count[j]-1 ].position() ] ] )
+            assert game.game_over() == ( 51 <= game.foundation_cards + sum( game.faceup_count ) )
+            fresh = game.clone()
+            fresh._moves = None
+            assert fresh.legal_moves() == game.legal_moves()
+            assert game.legal_move_count() == len( game.legal_moves() )
+            game.legal_moves().append( 'XX' ) # a copy, so the kept moves are unchanged
+            assert 'XX' not in game.legal_moves()
+
+    # dead positions: the locked cards of a lost deal, kept up to date as
+    # the game is played, and never found on the way to a win
+    lost = Klondike( 49 )
+    assert lost.is_lost() and lost.locked_cards()
+    assert lost_notice( lost ) is None # the player cannot see that yet
+    assert hint_notice( 'NN' ) == 'Try turning the deck (Enter)'
+    assert hint_notice( 'P3' ) == 'Try P3'
+    assert KlondikeRules().dead( lost ) and not KlondikeRules( prune=False ).dead( lost )
+    S = Solver( KlondikeRules() )
+    assert S.solve( lost ) is None and S.dead == 1
+    assert [ seed for seed in range( 1, 300 ) if Klondike( seed ).is_lost() ] == [ 49, 71, 257, 278 ]
+    rules = KlondikeRules()
+    for seed in range( 1, 31 ) :
+        game = Klondike( seed )
+        for _ in range( 100 ) :
+            moves = game.legal_moves()
+            if not moves :
+                break
+            game = rules.play( game, rng.choice( moves ) )
+            fresh = game.clone()
+            fresh._blocking = None
+            assert fresh._waiting() == game._waiting()
+            assert fresh.is_lost() == game.is_lost()
+    # the player is told only what the seen cards prove: a stuck game
+    # stays stuck however its face-down cards are dealt again, and has no
+    # solution
+    stuck = 0
+    for seed in range( 1, 31 ) :
+        game = Klondike( seed )
+        for _ in range( 400 ) :
+            if game.is_stuck() :
+                break
+            moves = game.legal_moves()
+            if not moves :
+                break
+            game.play( rng.choice( moves ) )
+        notice = lost_notice( game )
+        for _ in range( 3 ) :
+            assert lost_notice( determinize( game ) ) == notice
+        if notice :
+            stuck += 1
+            assert 'cannot be won' in notice
+            assert Solver( KlondikeRules( prune=False ) ).solve( game ) is None
+    assert stuck >= 10
+    for rules_used in ( rules, stock_rules, auto_rules ) :
+        game = Klondike( 319649 )
+        for command in Solver( rules_used ).solve( game, max_depth=300, first_depth=300 ) :
+            game = rules_used.play( game, command )
+            assert not game.is_lost()
+
+    # hints see only what the player sees: the same hint, from the same
+    # search, for a game and for a copy with the hidden cards dealt again
+    engine, other_engine = HintEngine(), HintEngine()
+    game = Klondike( 42 )
+    differed = False
+    for _ in range( 4 ) :
+        other = determinize( game )
+        differed = differed or whole_key( game ) != whole_key( other )
+        assert HintEngine.seen_key( other ) == HintEngine.seen_key( game )
+        random.seed( 5 )
+        command = engine.hint( game, 10**6, node_limit=600 )
+        random.seed( 5 )
+        assert other_engine.hint( other, 10**6, node_limit=600 ) == command
+        assert other_engine.nodes == engine.nodes <= 601 and engine.depth >= 1
+        assert command in game.legal_moves()
+        game.play( command )
+    assert differed
+    # the engine of game.hint() is told the commands played, so after a
+    # command that turns up no hidden card it keeps its samples and table,
+    # and visits fewer positions than a new engine given the same samples
+    game = Klondike( 6 )
+    random.seed( 6 )
+    game.play( game.hint( 10**6, max_depth=6 ) )
+    command = game.hint( 10**6, max_depth=6 )
+    assert command == 'PD'
+    game.play( command )
+    engine = game._hints
+    worlds = [ world for world, _ in engine._samples ]
+    cold = HintEngine()
+    cold.history = set( engine.history )
+    cold._samples = [ ( world, sample.clone() ) for world, sample in engine._samples ]
+    cold._played = engine._played[:]
+    game.hint( 10**6, max_depth=6 )
+    cold.hint( game, 10**6, max_depth=6 )
+    assert [ world for world, _ in engine._samples ] == worlds
+    assert engine.depth == cold.depth == 6 and engine.nodes < cold.nodes
+    # a bigger budget searches deeper
+    engine = HintEngine()
+    engine.hint( game, 10**6, node_limit=100 )
+    shallow = engine.depth
+    engine.hint( game, 10**6, node_limit=2000 )
+    assert engine.depth > shallow
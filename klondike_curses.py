@@ -0,0 +1,241 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+
+A curses front end for Klondike, with the same layout and commands as the
+plain terminal one in klondike.py:
+
+pack(21) ♦3   C:- D:A H:- S:-
+ (1) (2) (3) (4) (5) (6) (7)
+  ♣K  []  []  []  []  []  []
+      ♠Q  []  []  []  []  []
+      ...
+
+The screen is never cleared and redrawn. A frame is a dict of cells, each
+the ( row, column ) where a string is written: the pack count, the top
+card of the pack, each foundation, each card of the tableau, and the
+message line. frame_cells( game ) makes the frame of a game, and
+frame_changes( previous, current ) lists only the cells that differ, with
+blanks for cells that are gone. CursesDisplay keeps the last frame it
+showed, writes the changes, and lets curses send them in one update, so
+a move sends the few cards it moved and a turned-up card, not the screen.
+
+    python klondike_curses.py           play
+    python klondike_curses.py test      run the test code
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+from __future__ import annotations
+
+__all__ = [ 'frame_cells', 'frame_changes', 'CursesDisplay', 'play' ]
+
+from klondike import Klondike, hint_notice, lost_notice, parse_command
+from suit_card_deck import Suit
+import curses
+from typing import Dict, List, Tuple
+
+Cell = Tuple[int, int]
+
+TABLEAU_ROW = 2 # the first row of cards
+MESSAGE_ROW = 22 # below the deepest pile, 6 face-down cards and 13 up
+PROMPT_ROW = 23
+PROMPT = 'source, target: '
+HELP = 'Enter: three more cards; source 1-7 or P, target CDHS or 1-7; ? hint; q quit'
+
+def frame_cells( game:Klondike, message:str = '' ) -> Dict[Cell, str] :
+    ''' the cells of the layout of game, with message on the message row '''
+    cells = dict()
+    cells[ ( 0, 0 ) ] = 'pack({})'.format( len( game.pack ) )
+    cells[ ( 0, 9 ) ] = str( game.pack[0] ) if len( game.pack ) else '--'
+    for s in range( 4 ) :
+        ace = game.aces[ s ]
+        cells[ ( 0, 14 + 4 * s ) ] = Suit( s ).initial() + ':' \
+                                     + ( ace[0].name() if len( ace ) else '-' )
+    cells[ ( 1, 0 ) ] = Klondike._header_line
+    for p, pile in enumerate( game.tableau ) :
+        faceup = game.faceup_count[ p ]
+        for row in range( len( pile ) ) :
+            card = len( pile ) - row - 1
+            cells[ ( TABLEAU_ROW + row, 2 + 4 * p ) ] = \
+                str( pile[ card ] ) if card < faceup else '[]'
+    if message :
+        cells[ ( MESSAGE_ROW, 0 ) ] = message
+    return cells
+
+def frame_changes( previous:Dict[Cell, str], current:Dict[Cell, str] ) -> List[ Tuple[Cell, str] ] :
+    '''
+    The ( cell, string ) writes that change the screen from previous to
+    current, in screen order. A string shorter than the one it replaces is
+    padded with blanks, and a cell that is gone is blanked.
+    '''
+    changes = []
+    for cell, text in current.items() :
+        old = previous.get( cell )
+        if old != text :
+            changes.append( ( cell, text.ljust( len( old ) ) if old else text ) )
+    for cell, old in previous.items() :
+        if cell not in current :
+            changes.append( ( cell, ' ' * len( old ) ) )
+    changes.sort()
+    return changes
+
+class CursesDisplay() :
+    '''
+    Show games in a curses window, writing only what changed since the
+    last frame shown. render() returns the number of cells written.
+    forget() makes the next render() write everything, as after the
+    window has been cleared.
+    '''
+
+    def __init__( self, window ) :
+        self.window = window
+        self.frame = dict()
+
+    def forget( self ) :
+        self.frame = dict()
+
+    def render( self, game:Klondike, message:str = '' ) -> int :
+        current = frame_cells( game, message )
+        changes = frame_changes( self.frame, current )
+        for ( row, column ), text in changes :
+            self.window.addstr( row, column, text )
+        self.frame = current
+        self.window.noutrefresh()
+        return len( changes )
+
+def _read_line( window, prompt:str ) -> str :
+    ''' prompt on the prompt row and return what is typed there '''
+    window.move( PROMPT_ROW, 0 )
+    window.clrtoeol()
+    window.addstr( PROMPT_ROW, 0, prompt )
+    curses.doupdate()
+    curses.echo()
+    try :
+        return window.getstr( PROMPT_ROW, len( prompt ), 20 ).decode( errors='replace' )
+    finally :
+        curses.noecho()
+
+def play( window, seed:int = None ) :
+    '''
+    Play games in window until the user quits, with q at a prompt or by
+    answering n to "Another game?".
+    '''
+    display = CursesDisplay( window )
+    game = Klondike( seed )
+    message = ''
+    warned = False # told the user the game is lost
+    while True :
+        display.render( game, message )
+        message = ''
+        if not game.game_over() :
+            command = parse_command( _read_line( window, PROMPT ) )
+            if command is None :
+                message = HELP
+            elif command == 'HH' :
+                message = hint_notice( game.hint() )
+            elif command == 'NN' :
+                game.turn_the_deck()
+            elif command != 'ZZ' :
+                try :
+                    game.move( command[0], command[1] )
+                except ValueError as VE :
+                    message = str( VE )
+            if not message and not warned :
+                notice = lost_notice( game )
+                if notice :
+                    message = notice
+                    warned = True
+            if command != 'ZZ' :
+                continue
+        else :
+            display.render( game, 'You won!' )
+        answer = _read_line( window, 'Another game? [Yn] ' ).strip().lower()
+        if answer and answer[0] != 'y' :
+            return
+        game = Klondike( seed )
+        warned = False
+        window.erase()
+        display.forget()
+
+'''
+Play, or with the argument test, run the test code.
+'''
+
+if __name__ == '__main__' :
+
+    import sys
+
+    if sys.argv[1:] != [ 'test' ] :
+        import locale
+        locale.setlocale( locale.LC_ALL, '' ) # so curses writes the suit symbols
+        try :
+            curses.wrapper( play )
+        except KeyboardInterrupt :
+            pass
+        sys.exit( 0 )
+
+    class Screen() :
+        ''' a window that keeps what is written to it, for the tests '''
+        def __init__( self ) :
+            self.rows = [ [ ' ' ] * 80 for _ in range( 24 ) ]
+        def addstr( self, row, column, text ) :
+            self.rows[ row ][ column : column + len( text ) ] = list( text )
+        def noutrefresh( self ) :
+            pass
+        def text( self ) -> List[str] :
+            return [ ''.join( row ).rstrip() for row in self.rows ]
+
+    import io
+
+    game = Klondike( 319649 )
+    screen = Screen()
+    display = CursesDisplay( screen )
+    first = display.render( game )
+    assert first == len( frame_cells( game ) ) == 6 + 1 + 28
+    # the screen shows what display() prints, line for line
+    printed = io.StringIO()
+    lines = game.display( printed )
+    expected = [ line.rstrip() for line in printed.getvalue().splitlines() ]
+    shown = screen.text()[ : lines ]
+    assert shown[1:] == expected[1:]
+    assert shown[0].split() == expected[0].split()
+
+    # nothing changed, nothing written
+    assert display.render( game ) == 0
+
+    # turning the deck writes the pack count and card, nothing else
+    game.turn_the_deck()
+    assert display.render( game ) == 2
+
+    # a move writes the cells that changed, and blanks what is gone
+    for command in game.legal_moves() :
+        if command[0] in '1234567' and command[1] in '1234567' :
+            break
+    source = int( command[0] ) - 1
+    before = len( game.tableau[ source ] )
+    game.move( command[0], command[1] )
+    written = display.render( game )
+    assert written < 8
+    assert screen.text()[ TABLEAU_ROW + before - 1 ][ 2 + 4 * source : 4 + 4 * source ] == '  '
+    for _ in range( 30 ) :
+        moves = game.legal_moves()
+        game.play( moves[0] )
+        display.render( game, 'moved ' + moves[0] )
+    fresh = Screen()
+    CursesDisplay( fresh ).render( game, 'moved ' + moves[0] )
+    assert fresh.text() == screen.text()
+
+    # shorter strings are padded, gone cells blanked
+    assert frame_changes( { ( 0, 0 ) : 'pack(10)', ( 5, 2 ) : '♠Q' },
+                          { ( 0, 0 ) : 'pack(9)' } ) == \
+           [ ( ( 0, 0 ), 'pack(9) ' ), ( ( 5, 2 ), '  ' ) ]
+    display.render( game, 'a long message' )
+    display.render( game )
+    assert screen.text()[ MESSAGE_ROW ] == ''
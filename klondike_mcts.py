@@ -0,0 +1,248 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+
+Module klondike_mcts is an automatic Klondike player that decides each move
+by Monte Carlo tree search, seeing only what a human player sees.
+
+A solver that reads the face-down cards cheats. This player treats as
+hidden the face-down tableau cards, pile[faceup_count:], and the undealt
+cards in the deck. For each batch of playouts it samples one arrangement of
+the hidden cards (a "determinization"), by putting the hidden cards back in
+the deck, shuffling the deck, and dealing them again to the same places.
+Every playout in the batch starts from a copy of that sampled game, so the
+cost of sampling is shared by the whole batch.
+
+The tree is searched as "information set" MCTS: the tree is built on move
+sequences, and in each playout only the moves legal in its sampled game are
+considered, with the UCB1 formula counting how often a move was available
+rather than how often its parent was visited. Below the tree, a playout
+continues with a simple heuristic policy: play to the foundations, then
+moves that turn up a card or bring a card out of the pack, else turn the
+deck, stopping when the deck has gone round once with nothing to play.
+
+A playout scores the fraction of the 52 cards on the foundations, or 1.0
+if the game is won. The move chosen is the most visited at the root when
+time (or the iteration limit) runs out.
+
+    player = MCTSPlayer( time_limit=1.0 )
+    game = Klondike()
+    while not game.game_over() :
+        command = player.choose( game )
+        if command is None : break
+        game.play( command )
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+from __future__ import annotations
+
+__all__ = [ 'MCTSPlayer', 'determinize' ]
+
+from klondike import Klondike, KlondikeRules, determinize
+import math
+import random
+import time
+from typing import List, Optional
+
+class _Node() :
+    ''' One move sequence in the search tree '''
+
+    __slots__ = ( 'move', 'parent', 'children', 'visits', 'available', 'total' )
+
+    def __init__( self, move:str = None, parent:_Node = None ) :
+        self.move = move
+        self.parent = parent
+        self.children = dict() # move -> _Node
+        self.visits = 0
+        self.available = 0
+        self.total = 0.0
+
+class MCTSPlayer() :
+    '''
+    Choose Klondike moves by Monte Carlo tree search over sampled hidden
+    cards.
+
+    player = MCTSPlayer( time_limit=1.0, batch_size=16, exploration=0.7,
+                         rollout_limit=300 )
+
+        time_limit is the seconds allowed for each choice; batch_size the
+        number of playouts per sampled game; exploration the UCB1 constant;
+        rollout_limit the most moves in one playout.
+
+    player.choose( game, iterations=None ) -> str or None
+
+        Returns the command to play (as for Klondike.play()), or None if
+        there are no moves. Stops at time_limit, or after the given number
+        of playouts if that comes first; the clock is checked after every
+        playout. If no playout was made in time, returns the first legal
+        move. player.playouts is the number of playouts made for the last
+        choice.
+
+    player.play_game( game, max_moves=1000 ) -> bool
+
+        Plays game until it is over, stuck, or max_moves have been made.
+        Returns game.game_over().
+    '''
+
+    def __init__( self, time_limit:float = 1.0, batch_size:int = 16,
+                  exploration:float = 0.7, rollout_limit:int = 300 ) :
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.exploration = exploration
+        self.rollout_limit = rollout_limit
+        self.rules = KlondikeRules()
+        self.playouts = 0
+
+    def choose( self, game:Klondike, iterations:int = None ) -> Optional[str] :
+        moves = self.rules.moves( game )
+        self.playouts = 0
+        if len( moves ) <= 1 :
+            return moves[0] if moves else None
+        deadline = time.monotonic() + self.time_limit
+        root = _Node()
+        done = False
+        while not done and time.monotonic() < deadline :
+            world = determinize( game )
+            for _ in range( self.batch_size ) :
+                self._playout( root, world.clone() )
+                self.playouts += 1
+                done = ( iterations is not None and self.playouts >= iterations ) \
+                       or time.monotonic() >= deadline
+                if done :
+                    break
+        if not root.children :
+            return moves[0] # no playout finished in time
+        best = max( root.children.values(), key=lambda node : node.visits )
+        return best.move
+
+    def play_game( self, game:Klondike, max_moves:int = 1000 ) -> bool :
+        for _ in range( max_moves ) :
+            if game.game_over() :
+                break
+            command = self.choose( game )
+            if command is None :
+                break
+            game.play( command )
+        return game.game_over()
+
+    def _playout( self, root:_Node, state:Klondike ) :
+        '''
+        Descend the tree from root making moves in state, expand one new
+        node, finish the game with the rollout policy, and add the score
+        to every node on the way down.
+        '''
+        node = root
+        while not state.game_over() :
+            moves = self.rules.moves( state )
+            if not moves :
+                break
+            untried = [ m for m in moves if m not in node.children ]
+            for m in moves :
+                if m in node.children :
+                    node.children[m].available += 1
+            if untried :
+                move = random.choice( untried )
+                child = _Node( move, node )
+                child.available = 1
+                node.children[ move ] = child
+                state.play( move )
+                node = child
+                break
+            node = max( ( node.children[m] for m in moves ),
+                        key=lambda c : c.total / c.visits
+                            + self.exploration * math.sqrt( math.log( c.available ) / c.visits ) )
+            state.play( node.move )
+        score = self._rollout( state )
+        while node is not None :
+            node.visits += 1
+            node.total += score
+            node = node.parent
+
+    def _rollout( self, state:Klondike ) -> float :
+        '''
+        Play on with the heuristic policy and return the score.
+        '''
+        idle_turns = 0
+        for _ in range( self.rollout_limit ) :
+            if state.game_over() :
+                break
+            moves = state.legal_moves()
+            to_aces = [ m for m in moves if m[1] in 'CDHS' ]
+            if to_aces :
+                state.play( random.choice( to_aces ) )
+                idle_turns = 0
+                continue
+            useful = [ m for m in moves if m != 'NN' and self._useful( state, m ) ]
+            if useful :
+                state.play( random.choice( useful ) )
+                idle_turns = 0
+                continue
+            if 'NN' not in moves :
+                break
+            idle_turns += 1
+            if idle_turns > 2 + ( len( state.deck ) + len( state.pack ) ) // 3 :
+                break # round the whole deck with nothing to play
+            state.play( 'NN' )
+        if state.game_over() :
+            return 1.0
+        return state.foundation_cards / 52
+
+    def _useful( self, state:Klondike, command:str ) -> bool :
+        '''
+        A move to the tableau is useful if it comes from the pack, or if it
+        carries all the face-up cards of a pile that has face-down cards
+        under them.
+        '''
+        if command[0] == 'P' :
+            return True
+        source = '1234567'.index( command[0] )
+        pile = state.tableau[ source ]
+        faceup = state.faceup_count[ source ]
+        dest = state.tableau[ '1234567'.index( command[1] ) ]
+        return len( pile ) > faceup and state.can_play_to( pile[ faceup-1 ], dest )
+
+'''
+Test code
+'''
+
+if __name__ == '__main__' :
+
+    random.seed( 7 )
+    game = Klondike( 319649 )
+    world = determinize( game )
+    for j in range(7) :
+        assert len( world.tableau[j] ) == len( game.tableau[j] )
+        assert [ c.position() for c in world.face_up_cards(j) ] == \
+               [ c.position() for c in game.face_up_cards(j) ]
+    assert len( world.deck ) == len( game.deck )
+    hidden = lambda g : sorted( [ c.position() for p in range(7)
+                                  for c in g.face_down_cards(p) ]
+                                + g.deck.order() )
+    assert hidden( world ) == hidden( game )
+    world.turn_the_deck()
+    assert world.pack[0] is world.stock.reachable()[0][0]
+
+    game = Klondike( 319649 )
+
+    player = MCTSPlayer( time_limit=5.0, batch_size=4, rollout_limit=60 )
+    for _ in range(3) :
+        command = player.choose( game, iterations=12 )
+        assert command in game.legal_moves()
+        if len( player.rules.moves( game ) ) > 1 :
+            assert player.playouts == 12
+        game.play( command )
+
+    # With no time at all the choice still falls back to a legal move, and
+    # a batch bigger than the time allows stops at the deadline.
+    game = Klondike( 319649 )
+    assert MCTSPlayer( time_limit=0 ).choose( game ) in game.legal_moves()
+    player = MCTSPlayer( time_limit=0.05, batch_size=100000 )
+    assert player.choose( game ) in game.legal_moves()
+    assert 0 < player.playouts < 100000
@@ -0,0 +1,169 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+
+Module memory_bench measures the memory taken by the objects of
+suit_card_deck and Klondike with tracemalloc, and checks the measurements
+against budgets, so that a change that makes them bigger (a class that
+loses its __slots__, a Deck that makes more objects) is noticed.
+
+measure() returns bytes per object for each of
+
+    Card        a Card of a Deck
+    Pile        a hand of 13 cards dealt from a Deck
+    Deck        a new Deck with its 52 Cards
+    Deck.copy   a copy of a Deck, sharing its Cards
+    Klondike    a new game
+    hands       the peak while dealing and holding many hands of 13, dealt
+                from copies of one shuffled Deck, divided by the hands
+    games       the peak while making and holding many Klondike games,
+                divided by the games
+
+The counts are parameters; the defaults, 10**6 hands and 10**5 games, need
+about a gigabyte and two minutes, since tracemalloc slows every allocation.
+
+check( results, budgets ) returns the measurements that are over budget.
+Run as a program, the module measures, prints a report and exits with
+status 1 if anything is over BUDGETS; "python memory_bench.py 0.01" runs at
+a hundredth of the default counts.
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+from __future__ import annotations
+
+__all__ = [ 'BUDGETS', 'bytes_per', 'peak_per', 'measure', 'check', 'report' ]
+
+from suit_card_deck import Card, Deck, Pile
+from klondike import Klondike
+import gc
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+'''
+Budgets in bytes per object, on CPython 3.11 for 64 bits, with some room
+over what was measured when they were set: Card 72, Pile 241, Deck 4353,
+Deck.copy 553, Klondike 6683, hands 240, games 6681.
+'''
+BUDGETS = {
+    'Card' : 80,
+    'Pile' : 280,
+    'Deck' : 4800,
+    'Deck.copy' : 640,
+    'Klondike' : 7500,
+    'hands' : 280,
+    'games' : 7500,
+    }
+
+def bytes_per( make:Callable[[], object], count:int ) -> float :
+    '''
+    Make count objects with make(), holding all of them, and return the
+    memory traced while doing so divided by count. The list that holds
+    them adds 8 bytes to each.
+    '''
+    gc.collect()
+    tracemalloc.start()
+    try :
+        before = tracemalloc.get_traced_memory()[0]
+        objects = [ make() for _ in range( count ) ]
+        after = tracemalloc.get_traced_memory()[0]
+    finally :
+        tracemalloc.stop()
+    del objects
+    return ( after - before ) / count
+
+def peak_per( build:Callable[[int], list], count:int ) -> float :
+    '''
+    Call build( count ), which returns count objects, and return the peak
+    memory traced while it ran and its result was held, divided by count.
+    '''
+    gc.collect()
+    tracemalloc.start()
+    try :
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        objects = build( count )
+        peak = tracemalloc.get_traced_memory()[1]
+    finally :
+        tracemalloc.stop()
+    del objects
+    return ( peak - before ) / count
+
+def _hand( deck:Deck ) -> Pile :
+    copy = deck.copy()
+    return copy.deal_pile( 13 )
+
+def _deal_hands( count:int ) -> List[Pile] :
+    ''' count hands of 13, four from each shuffled copy of one Deck '''
+    deck = Deck()
+    hands = []
+    while len( hands ) < count :
+        copy = deck.copy()
+        copy.shuffle()
+        for _ in range( min( 4, count - len( hands ) ) ) :
+            hands.append( copy.deal_pile( 13 ) )
+    return hands
+
+def _make_games( count:int ) -> List[Klondike] :
+    return [ Klondike( seed ) for seed in range( 1, count + 1 ) ]
+
+def measure( hands:int = 10**6, games:int = 10**5,
+             instances:int = 10000 ) -> Dict[str, float] :
+    '''
+    Bytes per object, as listed above, making instances objects of each
+    class (a tenth as many Decks and Klondike games), and hands and games
+    for the peaks.
+    '''
+    deck = Deck()
+    deck.shuffle()
+    return {
+        'Card' : bytes_per( lambda : Card( 5, deck ), instances ),
+        'Pile' : bytes_per( lambda : _hand( deck ), instances ),
+        'Deck' : bytes_per( Deck, instances // 10 ),
+        'Deck.copy' : bytes_per( deck.copy, instances ),
+        'Klondike' : bytes_per( lambda : Klondike( 7 ), instances // 10 ),
+        'hands' : peak_per( _deal_hands, hands ),
+        'games' : peak_per( _make_games, games ),
+        }
+
+def check( results:Dict[str, float],
+           budgets:Dict[str, float] = BUDGETS ) -> List[ Tuple[str, float, float] ] :
+    ''' ( name, measured, budget ) for each result over its budget '''
+    return [ ( name, results[ name ], budget )
+             for name, budget in budgets.items()
+             if name in results and results[ name ] > budget ]
+
+def report( results:Dict[str, float], budgets:Dict[str, float] = BUDGETS ) -> str :
+    lines = []
+    for name, value in results.items() :
+        budget = budgets.get( name )
+        lines.append( '{:<10} {:10.1f} bytes{}'.format(
+            name, value, '' if budget is None else
+            '  budget {}{}'.format( budget, '  OVER' if value > budget else '' ) ) )
+    return '\n'.join( lines )
+
+'''
+Run the benchmark, at the default counts or scaled by the first argument.
+'''
+
+if __name__ == '__main__' :
+
+    import sys
+
+    scale = float( sys.argv[1] ) if len( sys.argv ) > 1 else 1.0
+    results = measure( hands=max( 100, int( 10**6 * scale ) ),
+                       games=max( 10, int( 10**5 * scale ) ),
+                       instances=max( 1000, int( 10000 * min( 1.0, scale * 10 ) ) ) )
+    print( report( results ) )
+    assert check( { 'Card' : 100.0, 'Deck' : 10.0 }, { 'Card' : 80 } ) == [ ( 'Card', 100.0, 80 ) ]
+    over = check( results )
+    if over :
+        for name, value, budget in over :
+            print( '{} is {:.1f} bytes, over its budget of {}'.format( name, value, budget ) )
+        sys.exit( 1 )
@@ -0,0 +1,257 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+
+Module move_log records Klondike games compactly and verifies them in bulk.
+
+A game is its seed (as passed to Klondike(seed)) and the commands played,
+each command stored as one byte:
+
+    source * 11 + destination, where source is the index in 'P1234567'
+    and destination the index in 'CDHS1234567', for a move
+    255 for 'NN', turning the deck
+
+A log file is the eight-byte signature b'CardzML1' followed by records.
+Each record is a 13-byte header, little-endian: the seed (8 bytes, unsigned),
+the number of commands (4 bytes) and the result claimed for the game (1 byte,
+1 if won, else 0); then one byte per command.
+
+    with LogWriter( 'today.cml' ) as writer :
+        writer.write( seed, commands, won=game.game_over() )
+
+verify_game() replays one game through Klondike, so every move is checked by
+move() and can_play_to() exactly as in play, and compares the result with
+game_over(). verify_file() does the same for every record of a file, split
+among worker processes.
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+from __future__ import annotations
+
+__all__ = [ 'encode_command', 'decode_command', 'LogWriter', 'read_logs',
+            'verify_game', 'verify_file' ]
+
+from klondike import Klondike
+import multiprocessing
+import struct
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+SIGNATURE = b'CardzML1'
+HEADER = struct.Struct( '<QIB' )
+TURN_CODE = 255
+SOURCES = 'P1234567'
+DESTINATIONS = 'CDHS1234567'
+
+def encode_command( command:str ) -> int :
+    '''
+    The one-byte code of a command such as 'P6', '3S' or 'NN'. Raises
+    ValueError for anything else.
+    '''
+    if command == 'NN' :
+        return TURN_CODE
+    if len( command ) == 2 \
+    and command[0] in SOURCES and command[1] in DESTINATIONS \
+    and command[0] != command[1] :
+        return SOURCES.index( command[0] ) * 11 + DESTINATIONS.index( command[1] )
+    raise ValueError( 'Not a Klondike command: ' + repr( command ) )
+
+def decode_command( code:int ) -> str :
+    ''' The command for a one-byte code; ValueError if there is none. '''
+    if code == TURN_CODE :
+        return 'NN'
+    source, dest = divmod( code, 11 )
+    if source >= len( SOURCES ) :
+        raise ValueError( 'Not a command code: {}'.format( code ) )
+    return SOURCES[ source ] + DESTINATIONS[ dest ]
+
+class LogWriter() :
+    '''
+    Write games to a new log file.
+
+    writer.write( seed, commands, won ) appends one record; commands is a
+    sequence of command strings or a bytes object of codes, and won is the
+    result claimed for the game. The seed must be a positive int, since
+    Klondike(0) would deal a random game. writer.count is the number of
+    records written. A LogWriter can be used as a context manager.
+    '''
+
+    def __init__( self, path:str ) :
+        self._file = open( path, 'wb' )
+        self._file.write( SIGNATURE )
+        self.count = 0
+
+    def write( self, seed:int, commands:Sequence, won:bool ) -> int :
+        if not isinstance( seed, int ) or not 0 < seed < 1 << 64 :
+            raise ValueError( 'Seed must be a positive 64-bit int' )
+        if isinstance( commands, bytes ) :
+            codes = commands
+        else :
+            codes = bytes( [ encode_command( c ) for c in commands ] )
+        self._file.write( HEADER.pack( seed, len( codes ), 1 if won else 0 ) )
+        self._file.write( codes )
+        self.count += 1
+        return self.count
+
+    def close( self ) :
+        self._file.close()
+
+    def __enter__( self ) -> LogWriter :
+        return self
+
+    def __exit__( self, *args ) :
+        self.close()
+
+def read_logs( path:str ) -> Iterator[ Tuple[int, bytes, bool] ] :
+    '''
+    Yield ( seed, codes, won ) for each record of a log file. Raises
+    ValueError if the file is not a log file or ends in mid-record.
+    '''
+    with open( path, 'rb' ) as file :
+        if file.read( len( SIGNATURE ) ) != SIGNATURE :
+            raise ValueError( path + ' is not a move log' )
+        while True :
+            header = file.read( HEADER.size )
+            if not header :
+                return
+            if len( header ) < HEADER.size :
+                raise ValueError( path + ' ends in the middle of a record' )
+            seed, count, won = HEADER.unpack( header )
+            codes = file.read( count )
+            if len( codes ) < count :
+                raise ValueError( path + ' ends in the middle of a record' )
+            yield seed, codes, bool( won )
+
+def verify_game( seed:int, codes:bytes, won:bool ) -> Optional[str] :
+    '''
+    Replay one game. Returns None if every command was legal and
+    game_over() agrees with won, else a string saying what was wrong.
+    Turning the deck when the deck and the pack are both empty counts as
+    illegal, as it is not offered by Klondike.legal_moves().
+    '''
+    game = Klondike( seed )
+    for number, code in enumerate( codes ) :
+        try :
+            command = decode_command( code )
+            if command == 'NN' and 0 == len( game.deck ) + len( game.pack ) :
+                raise ValueError( 'No cards to turn' )
+            game.play( command )
+        except ValueError as VE :
+            return 'move {}: {}'.format( number, VE )
+    if game.game_over() != won :
+        return 'claimed {} but game_over() is {}'.format( won, game.game_over() )
+    return None
+
+def _verify_chunk( chunk:List[ Tuple[int, int, bytes, bool] ] ) -> Tuple[ int, List[ Tuple[int, int, str] ] ] :
+    ''' verify a list of ( index, seed, codes, won ), return ( games, failures ) '''
+    failures = []
+    for index, seed, codes, won in chunk :
+        problem = verify_game( seed, codes, won )
+        if problem is not None :
+            failures.append( ( index, seed, problem ) )
+    return len( chunk ), failures
+
+def verify_file( path:str, workers:int = None,
+                 chunk_size:int = 1000 ) -> Tuple[ int, List[ Tuple[int, int, str] ] ] :
+    '''
+    Verify every record of a log file, in chunks of chunk_size records
+    spread over a pool of worker processes (workers defaults to the number
+    of CPUs). Returns ( number of games, failures ) where failures is a
+    list of ( record index, seed, problem ) in record order.
+    '''
+
+    def chunks() :
+        chunk = []
+        for index, ( seed, codes, won ) in enumerate( read_logs( path ) ) :
+            chunk.append( ( index, seed, codes, won ) )
+            if len( chunk ) >= chunk_size :
+                yield chunk
+                chunk = []
+        if chunk :
+            yield chunk
+
+    games = 0
+    failures = []
+    with multiprocessing.Pool( workers ) as pool :
+        for chunk_games, chunk_failures in pool.imap_unordered( _verify_chunk, chunks() ) :
+            games += chunk_games
+            failures += chunk_failures
+    failures.sort()
+    return games, failures
+
+'''
+Test code
+'''
+
+if __name__ == '__main__' :
+
+    import os
+    import random
+    import tempfile
+
+    for code in list( range( 88 ) ) + [ TURN_CODE ] :
+        command = decode_command( code )
+        if command[0] != command[1] :
+            assert encode_command( command ) == code
+    for bad in ( 'PP', '8C', 'X', 'P' ) :
+        try :
+            encode_command( bad )
+            assert False
+        except ValueError :
+            pass
+
+    # record some games played at random
+    random.seed( 99 )
+    games = []
+    for seed in range( 1, 21 ) :
+        game = Klondike( seed )
+        random.seed( seed * 7 )
+        commands = []
+        for _ in range( 60 ) :
+            moves = game.legal_moves()
+            if not moves :
+                break
+            command = random.choice( moves )
+            game.play( command )
+            commands.append( command )
+        games.append( ( seed, commands, game.game_over() ) )
+
+    path = os.path.join( tempfile.mkdtemp(), 'test.cml' )
+    with LogWriter( path ) as writer :
+        for seed, commands, won in games :
+            writer.write( seed, commands, won )
+        seed, commands, won = games[3]
+        writer.write( seed, commands, not won ) # false claim
+        seed, commands, won = games[4]
+        writer.write( seed, [ '1C' ] * 5 + commands, won ) # illegal move
+        try :
+            writer.write( 0, [], False )
+            assert False
+        except ValueError :
+            pass
+
+    records = list( read_logs( path ) )
+    assert len( records ) == 22
+    assert records[0][0] == 1 and decode_command( records[0][1][0] ) == games[0][1][0]
+    for seed, codes, won in records[:20] :
+        assert verify_game( seed, codes, won ) is None
+    count, failures = verify_file( path, workers=2, chunk_size=3 )
+    assert count == 22
+    assert [ f[0] for f in failures ] == [ 20, 21 ]
+    assert failures[0][2].startswith( 'claimed' )
+    assert failures[1][2].startswith( 'move ' )
+
+    with open( path, 'ab' ) as file :
+        file.write( b'\x01\x02' )
+    try :
+        list( read_logs( path ) )
+        assert False
+    except ValueError :
+        pass
+    os.remove( path )
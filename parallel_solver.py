@@ -0,0 +1,395 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+
+Module parallel_solver searches one hard deal with several worker
+processes, using the same SearchRules as the solitaire_solver Solver.
+
+The search tree is divided into tasks, each task being the sequence of
+moves from the starting position to the root of a subtree. The parent
+process expands the first few levels of the tree to make a few tasks per
+worker and puts them on a shared queue. Each worker takes a task, replays
+its moves from the starting position with rules.play(), and searches the
+subtree depth-first.
+
+Work is rebalanced as it goes: whenever some worker is idle, a busy worker
+that is within split_depth moves of the root of its task gives away the
+moves it has not yet tried there, as new tasks on the queue, rather than
+searching them itself. The giveaway happens only near the root of a task,
+where the subtrees are big enough to be worth the trip through the queue.
+
+The workers share one BloomFilter of the positions any of them has
+visited, in shared memory, so no two workers search the same position.
+A Bloom filter is compact, but it can report a position as visited when
+it was not, and it does not know how many moves were left when a position
+was visited; so the parallel search, unlike the Solver, can overlook a
+solution. Any solution it finds is replayed through rules.play() in the
+parent before it is returned, so the rules of the game (for Klondike, move()
+and can_play_to()) decide what is legal.
+
+    solver = ParallelSolver( KlondikeRules(), workers=8 )
+    solution = solver.solve( Klondike( seed ), max_depth=300 )
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+__all__ = [ 'BloomFilter', 'ParallelSolver', 'WorkerError' ]
+
+from solitaire_solver import SearchRules
+import hashlib
+import multiprocessing
+import os
+import queue
+import traceback
+from typing import Hashable, List, Optional
+
+class BloomFilter() :
+    '''
+    A set of position keys in shared memory, answering "possibly present"
+    or "certainly absent".
+
+    BloomFilter( bits=1<<26, hashes=4 ) allocates bits/8 bytes of memory
+    that is shared with any process started after it (pass the BloomFilter
+    to the Process). add( key ) returns True if the key was possibly
+    present already, and adds it in any case.
+
+    Keys are hashed by their repr(), so any key whose repr() is the same
+    in every process (tuples of ints and strings, for example) can be used.
+
+    Bits are set without a lock. If two processes add keys at once one of
+    them can lose a bit, which only means some position may be searched
+    twice.
+    '''
+
+    def __init__( self, bits:int = 1 << 26, hashes:int = 4 ) :
+        self.bits = bits
+        self.hashes = hashes
+        self._array = multiprocessing.RawArray( 'B', ( bits + 7 ) // 8 )
+
+    def _indices( self, key:Hashable ) -> List[int] :
+        digest = hashlib.blake2b( repr( key ).encode(), digest_size=16 ).digest()
+        h1 = int.from_bytes( digest[:8], 'little' )
+        h2 = int.from_bytes( digest[8:], 'little' ) | 1
+        return [ ( h1 + j * h2 ) % self.bits for j in range( self.hashes ) ]
+
+    def __contains__( self, key:Hashable ) -> bool :
+        array = self._array
+        for index in self._indices( key ) :
+            if not array[ index >> 3 ] & ( 1 << ( index & 7 ) ) :
+                return False
+        return True
+
+    def add( self, key:Hashable ) -> bool :
+        array = self._array
+        present = True
+        for index in self._indices( key ) :
+            byte, bit = index >> 3, 1 << ( index & 7 )
+            if not array[ byte ] & bit :
+                present = False
+                array[ byte ] |= bit
+        return present
+
+class ParallelSolver() :
+    '''
+    Search for a winning sequence of moves in several processes.
+
+    solver = ParallelSolver( rules, workers=None, split_depth=4,
+                             bloom_bits=1<<26, node_limit=None )
+
+        rules is a SearchRules object; rules and the position to solve must
+        be picklable. workers defaults to the number of CPUs. split_depth
+        is how near the root of a task a worker gives away moves to idle
+        workers. bloom_bits is the size of the shared BloomFilter. If
+        node_limit is given, the search stops when any one worker has
+        visited that many positions.
+
+    solver.solve( position, max_depth=200 ) -> list or None
+
+        Returns a list of moves that wins from position, or None. After
+        solve() returns, solver.nodes is the number of positions visited
+        by all workers, solver.tasks the number of tasks searched, and
+        solver.limited is True if any worker stopped at node_limit.
+
+        An exception raised in a worker is raised again by solve(), with a
+        WorkerError holding the worker's traceback as its cause. If a
+        worker process dies without reporting, solve() stops the others
+        and raises RuntimeError.
+    '''
+
+    def __init__( self, rules:SearchRules, workers:int = None,
+                  split_depth:int = 4, bloom_bits:int = 1 << 26,
+                  node_limit:int = None ) :
+        self.rules = rules
+        self.workers = workers or os.cpu_count() or 1
+        self.split_depth = split_depth
+        self.bloom_bits = bloom_bits
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.tasks = 0
+        self.limited = False
+
+    def _frontier( self, position, max_depth:int ) :
+        '''
+        Expand the tree breadth-first from position until there are a few
+        tasks per worker. Returns ( solution, tasks ) where solution is a
+        winning move list if one turned up, else None.
+        '''
+        rules = self.rules
+        level = [ ( [], position ) ]
+        seen = { rules.key( position ) }
+        for depth in range( max_depth ) :
+            if len( level ) >= 4 * self.workers :
+                break
+            next_level = []
+            for moves, here in level :
+                for move in rules.moves( here ) :
+                    there = rules.play( here, move )
+                    if rules.solved( there ) :
+                        return moves + [ move ], []
+                    key = rules.key( there )
+                    if key not in seen :
+                        seen.add( key )
+                        next_level.append( ( moves + [ move ], there ) )
+            if not next_level :
+                break
+            level = next_level
+        return None, [ moves for moves, here in level ]
+
+    def solve( self, position, max_depth:int = 200 ) -> Optional[List] :
+        self.nodes = 0
+        self.tasks = 0
+        self.limited = False
+        rules = self.rules
+        if rules.solved( position ) :
+            return []
+        solution, tasks = self._frontier( position, max_depth )
+        if solution is None and tasks :
+            solution = self._run_workers( position, tasks, max_depth )
+        if solution is not None :
+            # replay through the rules, which raise on an illegal move
+            here = position
+            for move in solution :
+                here = rules.play( here, move )
+            if not rules.solved( here ) :
+                raise RuntimeError( 'the solution found does not solve the position' )
+        return solution
+
+    def _run_workers( self, position, tasks:List[List], max_depth:int ) -> Optional[List] :
+        task_queue = multiprocessing.Queue()
+        result_queue = multiprocessing.Queue()
+        pending = multiprocessing.Value( 'l', len( tasks ) )
+        idle = multiprocessing.Value( 'l', 0 )
+        found = multiprocessing.Event()
+        bloom = BloomFilter( self.bloom_bits )
+        for task in tasks :
+            task_queue.put( task )
+        processes = [
+            multiprocessing.Process( target=_worker,
+                args=( self.rules, position, task_queue, result_queue,
+                       pending, idle, found, bloom,
+                       max_depth, self.split_depth, self.node_limit ) )
+            for _ in range( self.workers ) ]
+        for process in processes :
+            process.start()
+        solution = None
+        reported = 0
+        try :
+            while reported < len( processes ) :
+                try :
+                    path, nodes, tasks_done, limited, error = result_queue.get( timeout=0.1 )
+                except queue.Empty :
+                    # a worker that exits without reporting has died
+                    for process in processes :
+                        if process.exitcode not in ( None, 0 ) :
+                            raise RuntimeError( 'a solver worker exited with code {}'.format(
+                                process.exitcode ) )
+                    continue
+                reported += 1
+                if error is not None :
+                    exception, trace = error
+                    raise exception from WorkerError( trace )
+                self.nodes += nodes
+                self.tasks += tasks_done
+                self.limited = self.limited or limited
+                if path is not None and solution is None :
+                    solution = path
+        finally :
+            if reported < len( processes ) :
+                found.set() # stop the others
+                for process in processes :
+                    process.terminate()
+            for process in processes :
+                process.join()
+        return solution
+
+class WorkerError( RuntimeError ) :
+    ''' the traceback of an exception raised in a worker, as its cause '''
+    def __str__( self ) :
+        return '\n' + self.args[0]
+
+def _worker( rules:SearchRules, root, task_queue, result_queue,
+             pending, idle, found, bloom:BloomFilter,
+             max_depth:int, split_depth:int, node_limit:int ) :
+    '''
+    The body of one worker process: take tasks from task_queue until the
+    work is done or a solution is found, then report ( solution or None,
+    nodes visited, tasks searched, whether node_limit was hit ) on
+    result_queue. An exception in the search is reported there with its
+    traceback instead.
+    '''
+    # tasks this worker gives away may still be on the queue when it exits
+    task_queue.cancel_join_thread()
+    state = { 'nodes' : 0, 'tasks' : 0, 'limited' : False }
+
+    def give_away( prefix:List, moves:List ) :
+        with pending.get_lock() :
+            pending.value += len( moves )
+        for move in moves :
+            task_queue.put( prefix + [ move ] )
+
+    def search( position, depth:int, ply:int, path:List ) -> bool :
+        if rules.solved( position ) :
+            return True
+        if depth <= 0 or found.is_set() :
+            return False
+        if bloom.add( rules.key( position ) ) and ply > 0 :
+            return False
+        state[ 'nodes' ] += 1
+        if node_limit is not None and state[ 'nodes' ] > node_limit :
+            state[ 'limited' ] = True
+            found.set() # not found, but every worker should stop
+            return False
+        if rules.dead( position ) :
+            return False
+        moves = rules.moves( position )
+        for j in range( len( moves ) ) :
+            # give the untried moves to an idle worker and search this
+            # one as the last here
+            last = ply < split_depth and idle.value > 0 and j + 1 < len( moves )
+            if last :
+                give_away( path, moves[ j+1 : ] )
+            path.append( moves[j] )
+            if search( rules.play( position, moves[j] ), depth-1, ply+1, path ) :
+                return True
+            path.pop()
+            if last :
+                break
+        return False
+
+    def take_tasks() -> Optional[List] :
+        while not found.is_set() :
+            with idle.get_lock() :
+                idle.value += 1
+            try :
+                task = task_queue.get( timeout=0.05 )
+            except queue.Empty :
+                task = None
+            with idle.get_lock() :
+                idle.value -= 1
+            if task is None :
+                if pending.value <= 0 :
+                    break
+                continue
+            position = root
+            for move in task :
+                position = rules.play( position, move )
+            path = list( task )
+            if search( position, max_depth - len( task ), 0, path ) :
+                found.set()
+                return path
+            state[ 'tasks' ] += 1
+            with pending.get_lock() :
+                pending.value -= 1
+        return None
+
+    try :
+        solution = take_tasks()
+    except Exception as exception :
+        found.set()
+        result_queue.put( ( None, state[ 'nodes' ], state[ 'tasks' ], state[ 'limited' ],
+                            ( exception, traceback.format_exc() ) ) )
+        return
+    if solution is not None :
+        state[ 'tasks' ] += 1
+    result_queue.put( ( solution, state[ 'nodes' ], state[ 'tasks' ], state[ 'limited' ], None ) )
+
+'''
+Test code
+'''
+
+if __name__ == '__main__' :
+
+    B = BloomFilter( bits=1 << 12 )
+    assert not B.add( ( 1, 2, 3 ) )
+    assert B.add( ( 1, 2, 3 ) )
+    assert ( 1, 2, 3 ) in B and ( 3, 2, 1 ) not in B
+
+    # a worker's exception is raised in the parent, and a worker that
+    # dies stops the search rather than hanging it
+    class Counting( SearchRules ) :
+        ''' positions are counts; the search fails below 6 moves '''
+        def __init__( self, fail ) :
+            self.fail = fail
+        def moves( self, position ) :
+            return [ 1, 2, 3 ]
+        def play( self, position, move ) :
+            if len( position ) > 5 :
+                if self.fail == 'raise' :
+                    raise KeyError( 'deep' )
+                os._exit( 3 )
+            return position + ( move, )
+        def key( self, position ) :
+            return position
+        def solved( self, position ) :
+            return False
+    try :
+        ParallelSolver( Counting( 'raise' ), workers=2 ).solve( (), max_depth=20 )
+        assert False, 'the worker error was lost'
+    except KeyError as error :
+        assert isinstance( error.__cause__, WorkerError ) and 'deep' in str( error.__cause__ )
+    try :
+        ParallelSolver( Counting( 'exit' ), workers=2 ).solve( (), max_depth=20 )
+        assert False, 'the dead worker was not noticed'
+    except RuntimeError as error :
+        assert 'code 3' in str( error )
+
+    from klondike import Klondike, KlondikeRules
+    rules = KlondikeRules()
+    S = ParallelSolver( rules, workers=2, split_depth=3 )
+    solution = S.solve( Klondike( 319649 ), max_depth=300 )
+    assert solution is not None
+    assert S.tasks >= 1 and S.nodes > 0
+    game = Klondike( 319649 )
+    for command in solution :
+        game.play( command )
+    assert game.game_over()
+
+    # moves that turn the deck as far as a playable stock card
+    stock_rules = KlondikeRules( stock_moves=True )
+    solution = ParallelSolver( stock_rules, workers=2, split_depth=3 ).solve(
+        Klondike( 319649 ), max_depth=300 )
+    assert solution is not None
+    game = Klondike( 319649 )
+    for command in solution :
+        game = stock_rules.play( game, command )
+    assert game.game_over()
+
+    # safe plays to the foundations made after every move
+    auto_rules = KlondikeRules( auto_play=True )
+    solution = ParallelSolver( auto_rules, workers=2, split_depth=3 ).solve(
+        Klondike( 319649 ), max_depth=300 )
+    assert solution is not None
+    game = Klondike( 319649 )
+    for command in solution :
+        game = auto_rules.play( game, command )
+    assert game.game_over()
+
+    # dead positions are refuted without being searched
+    lost = Klondike( 49 )
+    assert ParallelSolver( KlondikeRules(), workers=1 ).solve( lost ) is None
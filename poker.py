@@ -0,0 +1,417 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+
+Module poker ranks poker hands of 5 to 7 cards and works out the equity of
+Texas Hold'em hands by dealing out every board, or many random boards, on
+a pool of worker processes.
+
+A hand is ranked by looking up tables made once when the module is loaded,
+not by comparing Cards. Each card position p (suit p // 13, rank p % 13,
+the Deuce 0 and the Ace 12) has two table entries: a bit, 1 << p, and a
+rank key, 5 ** rank. The bits of a hand, or-ed together, hold each suit's
+cards as 13 bits, and a suit with 5 or more bits is looked up in FLUSHES,
+8192 entries by bit pattern. Otherwise the rank keys of a hand, added up,
+count the cards of each rank as a base 5 digit, and that number is looked
+up among the 74,000 or so rank multisets of 5 to 7 cards. A flush in 7
+cards can have no full house or four of a kind with it, so a hand with a
+flush is ranked by its flush alone.
+
+The value of a hand is an int, higher for a better hand, equal for hands
+that tie: the category (0 high card to 8 straight flush) times 2**20 plus
+the ranks that decide ties, 4 bits each, most important first. There are
+7462 different values of 5-card hands.
+
+    evaluate( cards ) -> int, the value of the best 5 cards of 5, 6 or 7,
+        given as Cards, positions, or names such as 'SA' (a Pile is fine)
+    evaluate_array( array ) -> the values of a (N, k) numpy array of
+        positions, k 5 to 7, as a (N,) int32 array
+    category( value ) -> 'Full house', etc.
+
+evaluate() takes a few microseconds; evaluate_array() does the same table
+lookups over whole arrays, a few million 7-card hands a second in one
+process, so all 1,712,304 boards of two hands before the flop are dealt in
+about a second.
+
+equity( hands, board=(), dead=() ) compares two or more Hold'em hands of
+two cards each, with no board or a partial board. Without trials it deals
+every board that can come, split over worker processes by the lowest
+card added; with trials it deals that many random boards. A pot that ties
+is shared. Returns an Equity.
+
+    result = equity( [ [ 'SA', 'HA' ], [ 'DK', 'CK' ] ] )
+    print( result.equity() )     # about [ 0.82, 0.18 ]
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+from __future__ import annotations
+
+__all__ = [ 'CATEGORIES', 'evaluate', 'evaluate_array', 'category',
+            'Equity', 'equity' ]
+
+from suit_card_deck import card_position
+import itertools
+import math
+import multiprocessing
+import numpy
+from typing import Iterable, List, Sequence
+
+CATEGORIES = ( 'High card', 'One pair', 'Two pair', 'Three of a kind',
+               'Straight', 'Flush', 'Full house', 'Four of a kind',
+               'Straight flush' )
+HIGH_CARD, ONE_PAIR, TWO_PAIR, TRIPS, STRAIGHT, FLUSH, FULL_HOUSE, \
+QUADS, STRAIGHT_FLUSH = range( 9 )
+
+def _value( kind:int, ranks:Sequence[int] ) -> int :
+    value = kind
+    for j in range( 5 ) :
+        value = ( value << 4 ) | ( ranks[j] if j < len( ranks ) else 0 )
+    return value
+
+def _straight_top( mask:int ) -> int :
+    ''' the top rank of the highest straight in a 13-bit rank mask, or -1 '''
+    for top in range( 12, 3, -1 ) :
+        run = 0x1F << ( top - 4 )
+        if mask & run == run :
+            return top
+    return 3 if mask & 0x100F == 0x100F else -1 # the wheel, A-2-3-4-5
+
+def _ranks_of( mask:int ) -> List[int] :
+    return [ r for r in range( 12, -1, -1 ) if mask >> r & 1 ]
+
+def _rank_value( counts:Sequence[int] ) -> int :
+    ''' the value of the best 5 cards of a multiset of ranks, without flushes '''
+    ranks = [ r for r in range( 12, -1, -1 ) if counts[r] ]
+    quads = [ r for r in ranks if counts[r] == 4 ]
+    trips = [ r for r in ranks if counts[r] >= 3 ]
+    pairs = [ r for r in ranks if counts[r] >= 2 ]
+    if quads :
+        return _value( QUADS, [ quads[0] ] + [ r for r in ranks if r != quads[0] ][:1] )
+    if trips and len( pairs ) > 1 :
+        return _value( FULL_HOUSE, [ trips[0] ] + [ r for r in pairs if r != trips[0] ][:1] )
+    top = _straight_top( sum( [ 1 << r for r in ranks ] ) )
+    if top >= 0 :
+        return _value( STRAIGHT, [ top ] )
+    if trips :
+        return _value( TRIPS, [ trips[0] ] + [ r for r in ranks if r != trips[0] ][:2] )
+    if len( pairs ) > 1 :
+        return _value( TWO_PAIR, pairs[:2] + [ r for r in ranks if r not in pairs[:2] ][:1] )
+    if pairs :
+        return _value( ONE_PAIR, pairs[:1] + [ r for r in ranks if r != pairs[0] ][:3] )
+    return _value( HIGH_CARD, ranks[:5] )
+
+def _poker_tables() :
+    '''
+    The tables by card position, CARD_BITS and RANK_KEYS; POPCOUNT and
+    FLUSHES by 13-bit mask; and the rank multisets of 5 to 7 cards, as a
+    dict of key to value and as sorted numpy arrays of keys and values.
+    '''
+    card_bits = [ 1 << p for p in range( 52 ) ]
+    rank_keys = [ 5 ** ( p % 13 ) for p in range( 52 ) ]
+    popcount = [ bin( mask ).count( '1' ) for mask in range( 8192 ) ]
+    flushes = [ 0 ] * 8192
+    for mask in range( 8192 ) :
+        if popcount[ mask ] >= 5 :
+            top = _straight_top( mask )
+            flushes[ mask ] = _value( STRAIGHT_FLUSH, [ top ] ) if top >= 0 \
+                              else _value( FLUSH, _ranks_of( mask )[:5] )
+    multisets = dict()
+    counts = [ 0 ] * 13
+
+    def fill( rank:int, cards:int, key:int ) :
+        if rank == 13 :
+            if cards >= 5 :
+                multisets[ key ] = _rank_value( counts )
+            return
+        for n in range( min( 4, 7 - cards ) + 1 ) :
+            counts[ rank ] = n
+            fill( rank + 1, cards + n, key + n * 5 ** rank )
+        counts[ rank ] = 0
+
+    fill( 0, 0, 0 )
+    keys = numpy.array( sorted( multisets ), dtype=numpy.int64 )
+    values = numpy.array( [ multisets[ k ] for k in keys.tolist() ], dtype=numpy.int32 )
+    return card_bits, rank_keys, popcount, flushes, multisets, keys, values
+
+CARD_BITS, RANK_KEYS, POPCOUNT, FLUSHES, MULTISETS, MULTISET_KEYS, MULTISET_VALUES = _poker_tables()
+_CARD_BITS = numpy.array( CARD_BITS, dtype=numpy.int64 )
+_RANK_KEYS = numpy.array( RANK_KEYS, dtype=numpy.int64 )
+_POPCOUNT = numpy.array( POPCOUNT, dtype=numpy.int8 )
+_FLUSHES = numpy.array( FLUSHES, dtype=numpy.int32 )
+
+def evaluate( cards:Iterable ) -> int :
+    '''
+    The value of the best 5 cards among 5 to 7 cards, each a Card, a
+    position, or a name as for suit_card_deck.card_position(). Raises
+    ValueError for anything but 5 to 7 different cards.
+    '''
+    bits = 0
+    key = 0
+    count = 0
+    for card in cards :
+        p = card_position( card )
+        if bits & CARD_BITS[ p ] :
+            raise ValueError( 'A card is given twice' )
+        bits |= CARD_BITS[ p ]
+        key += RANK_KEYS[ p ]
+        count += 1
+    if not 5 <= count <= 7 :
+        raise ValueError( 'Need 5 to 7 cards, not {}'.format( count ) )
+    for shift in ( 0, 13, 26, 39 ) :
+        suited = ( bits >> shift ) & 0x1FFF
+        if POPCOUNT[ suited ] >= 5 :
+            return FLUSHES[ suited ]
+    return MULTISETS[ key ]
+
+def evaluate_array( cards:numpy.ndarray ) -> numpy.ndarray :
+    '''
+    The values of the rows of a (N, k) array of card positions, k 5 to 7,
+    no position twice in a row, as a (N,) int32 array. Raises ValueError
+    for any other array.
+    '''
+    cards = numpy.asarray( cards, dtype=numpy.intp )
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7 :
+        raise ValueError( 'Need an (N, k) array, k 5 to 7' )
+    if cards.size and ( cards.min() < 0 or cards.max() > 51 ) :
+        raise ValueError( 'A card position is not 0 to 51' )
+    if ( _CARD_BITS[ cards ].sum( axis=1 )
+         != numpy.bitwise_or.reduce( _CARD_BITS[ cards ], axis=1 ) ).any() :
+        raise ValueError( 'A card is given twice in a row' )
+    return _evaluate_rows( cards )
+
+def _evaluate_rows( cards:numpy.ndarray ) -> numpy.ndarray :
+    ''' evaluate_array() of rows already known to be good '''
+    keys = _RANK_KEYS[ cards ].sum( axis=1 )
+    values = MULTISET_VALUES[ numpy.searchsorted( MULTISET_KEYS, keys ) ]
+    bits = _CARD_BITS[ cards ].sum( axis=1 ) # no bit twice, so the sum is the or
+    for shift in ( 0, 13, 26, 39 ) :
+        suited = ( bits >> shift ) & 0x1FFF
+        flush = _POPCOUNT[ suited ] >= 5
+        if flush.any() :
+            values[ flush ] = _FLUSHES[ suited[ flush ] ]
+    return values
+
+def category( value:int ) -> str :
+    return CATEGORIES[ value >> 20 ]
+
+class Equity() :
+    '''
+    The result of equity(): boards, the number of boards dealt; and for
+    each hand, in the order given, wins, the boards it won alone, ties, the
+    boards on which it shared the pot, and shares, its wins plus its part
+    of each shared pot. equity() is shares / boards for each hand.
+    '''
+
+    __slots__ = ( 'boards', 'wins', 'ties', 'shares' )
+
+    def __init__( self, hands:int ) :
+        self.boards = 0
+        self.wins = [ 0 ] * hands
+        self.ties = [ 0 ] * hands
+        self.shares = [ 0.0 ] * hands
+
+    def merge( self, other:Equity ) :
+        self.boards += other.boards
+        for j in range( len( self.wins ) ) :
+            self.wins[j] += other.wins[j]
+            self.ties[j] += other.ties[j]
+            self.shares[j] += other.shares[j]
+
+    def equity( self ) -> List[float] :
+        return [ s / self.boards if self.boards else 0.0 for s in self.shares ]
+
+def _showdown( hands:numpy.ndarray, board:numpy.ndarray, boards:numpy.ndarray ) -> Equity :
+    '''
+    Score hands, an (H, 2) array of hole cards, on each row of boards,
+    an (M, j) array of cards added to the (b,) cards of board.
+    '''
+    count = len( boards )
+    fixed = numpy.broadcast_to( board, ( count, len( board ) ) )
+    values = numpy.stack( [
+        _evaluate_rows( numpy.hstack( [ numpy.broadcast_to( hole, ( count, 2 ) ), fixed, boards ] ).astype( numpy.intp ) )
+        for hole in hands ] )
+    winners = values == values.max( axis=0 )
+    sharing = winners.sum( axis=0 )
+    result = Equity( len( hands ) )
+    result.boards = count
+    result.wins = [ int( n ) for n in ( winners & ( sharing == 1 ) ).sum( axis=1 ) ]
+    result.ties = [ int( n ) for n in ( winners & ( sharing > 1 ) ).sum( axis=1 ) ]
+    result.shares = [ float( s ) for s in ( winners / sharing ).sum( axis=1 ) ]
+    return result
+
+def _enumerate_task( task ) -> Equity :
+    ''' every board whose lowest added card is first '''
+    hands, board, first, rest, need = task
+    rows = math.comb( len( rest ), need )
+    combos = numpy.fromiter( itertools.chain.from_iterable( itertools.combinations( rest, need ) ),
+                             dtype=numpy.uint8, count=rows * need ).reshape( rows, need )
+    boards = numpy.hstack( [ numpy.full( ( rows, 1 ), first, dtype=numpy.uint8 ), combos ] )
+    return _showdown( hands, board, boards )
+
+def _sample_task( task ) -> Equity :
+    ''' trials random boards from rng_seed '''
+    hands, board, remaining, need, trials, rng_seed = task
+    rng = numpy.random.default_rng( rng_seed )
+    rows = numpy.tile( remaining, ( trials, 1 ) )
+    boards = rng.permuted( rows, axis=1 )[ :, :need ]
+    return _showdown( hands, board, boards )
+
+def equity( hands:Sequence[Iterable], board:Iterable = (), dead:Iterable = (),
+            trials:int = None, seed:int = None, workers:int = None,
+            chunk:int = 100000 ) -> Equity :
+    '''
+    The equity of two or more Hold'em hands, each two cards, given the
+    cards of the board so far (0 to 5) and dead cards known to be out of
+    play, all as for evaluate(). Without trials every board that can come
+    is dealt; with trials, that many random boards from
+    numpy.random.default_rng( seed ), chunk boards to a task. The tasks run
+    on a pool of worker processes (workers defaults to the number of CPUs;
+    1 means run in this process). Raises ValueError for a hand that is not
+    two cards, more than 5 board cards, or a card given twice.
+    '''
+    holes = [ [ card_position( c ) for c in hand ] for hand in hands ]
+    fixed = [ card_position( c ) for c in board ]
+    out = [ card_position( c ) for c in dead ]
+    if len( holes ) < 2 or any( len( hole ) != 2 for hole in holes ) :
+        raise ValueError( 'Need two or more hands of two cards' )
+    if len( fixed ) > 5 :
+        raise ValueError( 'A board has at most 5 cards' )
+    used = [ p for hole in holes for p in hole ] + fixed + out
+    if len( set( used ) ) < len( used ) :
+        raise ValueError( 'A card is given twice' )
+    hands_array = numpy.array( holes, dtype=numpy.uint8 )
+    board_array = numpy.array( fixed, dtype=numpy.uint8 )
+    remaining = [ p for p in range( 52 ) if p not in used ]
+    need = 5 - len( fixed )
+    if need == 0 :
+        return _showdown( hands_array, board_array, numpy.zeros( ( 1, 0 ), dtype=numpy.uint8 ) )
+    if trials is None :
+        function = _enumerate_task
+        tasks = [ ( hands_array, board_array, first, remaining[ j + 1 : ], need - 1 )
+                  for j, first in enumerate( remaining[ : len( remaining ) - need + 1 ] ) ]
+    else :
+        function = _sample_task
+        rng_seeds = numpy.random.SeedSequence( seed ).spawn( ( trials + chunk - 1 ) // chunk )
+        remaining_array = numpy.array( remaining, dtype=numpy.uint8 )
+        tasks = [ ( hands_array, board_array, remaining_array, need,
+                    min( chunk, trials - j * chunk ), rng_seed )
+                  for j, rng_seed in enumerate( rng_seeds ) ]
+    result = Equity( len( holes ) )
+    if workers == 1 :
+        for task in tasks :
+            result.merge( function( task ) )
+        return result
+    with multiprocessing.Pool( workers ) as pool :
+        for part in pool.imap_unordered( function, tasks ) :
+            result.merge( part )
+    return result
+
+'''
+Test code
+'''
+
+if __name__ == '__main__' :
+
+    import random
+    from suit_card_deck import Card, Deck
+
+    assert len( MULTISETS ) == len( MULTISET_KEYS ) and ( numpy.diff( MULTISET_KEYS ) > 0 ).all()
+
+    royal = evaluate( [ 'SA', 'SK', 'SQ', 'SJ', 'ST' ] )
+    wheel = evaluate( [ 'SA', 'H2', 'D3', 'C4', 'S5' ] )
+    six_high = evaluate( [ 'S6', 'H2', 'D3', 'C4', 'S5' ] )
+    steel_wheel = evaluate( [ 'CA', 'C2', 'C3', 'C4', 'C5' ] )
+    assert category( royal ) == 'Straight flush' and category( steel_wheel ) == 'Straight flush'
+    assert steel_wheel < royal and category( wheel ) == 'Straight' and wheel < six_high
+    aces_up = evaluate( [ 'SA', 'HA', 'D3', 'C3', 'S9' ] )
+    kings_full = evaluate( [ 'SK', 'HK', 'DK', 'C3', 'S3' ] )
+    assert category( aces_up ) == 'Two pair' and category( kings_full ) == 'Full house'
+    assert aces_up < kings_full < royal
+    # suits do not matter, and the kicker does
+    assert evaluate( [ 'SA', 'HA', 'D3', 'C3', 'S9' ] ) == evaluate( [ 'CA', 'DA', 'S3', 'H3', 'H9' ] )
+    assert evaluate( [ 'SA', 'HA', 'D3', 'C3', 'S9' ] ) > evaluate( [ 'CA', 'DA', 'S3', 'H3', 'H8' ] )
+    # Cards, positions and names are the same
+    assert evaluate( [ Card( 51 ), Card( 50 ), 49, 'SJ', 'ST' ] ) == royal
+    assert evaluate( numpy.array( [ 51, 50, 49, 48, 47 ], dtype=numpy.uint8 ) ) == royal
+    # a 7-card flush beats the straight in it, and quads ignore the flush draw
+    assert category( evaluate( [ 'H2', 'H5', 'H9', 'HK', 'HJ', 'S3', 'D4' ] ) ) == 'Flush'
+    assert category( evaluate( [ 'H9', 'S9', 'D9', 'C9', 'HK', 'HJ', 'H2' ] ) ) == 'Four of a kind'
+
+    # every 5-card hand: the counts of each category and 7462 distinct values
+    allfive = numpy.fromiter( itertools.chain.from_iterable( itertools.combinations( range( 52 ), 5 ) ),
+                              dtype=numpy.uint8 ).reshape( -1, 5 )
+    values = evaluate_array( allfive )
+    assert len( values ) == 2598960 and len( numpy.unique( values ) ) == 7462
+    counts = numpy.bincount( values >> 20, minlength=9 )
+    assert list( counts ) == [ 1302540, 1098240, 123552, 54912, 10200, 5108, 3744, 624, 40 ]
+
+    # 7 cards: the table agrees with the best of the 21 five-card hands, and
+    # evaluate_array agrees with evaluate
+    rng = random.Random( 11 )
+    sevens = [ rng.sample( range( 52 ), 7 ) for _ in range( 3000 ) ]
+    for seven in sevens[:500] :
+        assert evaluate( seven ) == max( evaluate( five ) for five in itertools.combinations( seven, 5 ) )
+    assert list( evaluate_array( numpy.array( sevens ) ) ) == [ evaluate( s ) for s in sevens ]
+    assert evaluate_array( numpy.array( [ s[:6] for s in sevens[:50] ] ) ).tolist() == \
+           [ evaluate( s[:6] ) for s in sevens[:50] ]
+    deck = Deck()
+    deck.shuffle()
+    assert evaluate( deck.deal_pile( 7 ) ) > 0
+    # anything but 5 to 7 different cards is refused
+    for bad in ( [ 52, 1, 2, 3, 4 ], [ -1, 1, 2, 3, 4 ], [ 'SA', 'SK', 'SQ', 'SJ', 'SA' ],
+                 [ 0, 1, 2, 3 ], list( range( 8 ) ), [ 'SA', 'SK', 'SQ', 'SJ', 'XX' ] ) :
+        try :
+            evaluate( bad )
+            assert False
+        except ValueError :
+            pass
+    for bad in ( [ [ 0, 1, 2, 3, 52 ] ], [ [ 0, 1, 2, 3, 0 ] ], [ [ 0, 1, 2, 3 ] ], [ 0, 1, 2, 3, 4 ] ) :
+        try :
+            evaluate_array( numpy.array( bad ) )
+            assert False
+        except ValueError :
+            pass
+
+    # exhaustive equity, in one process and on a pool
+    river = equity( [ [ 'SA', 'HA' ], [ 'DK', 'CK' ] ], board=[ 'SK', 'D7', 'C2', 'H9', 'S3' ] )
+    assert river.boards == 1 and river.equity() == [ 0.0, 1.0 ]
+    split = equity( [ [ 'SA', 'HK' ], [ 'DA', 'CK' ] ], board=[ 'S2', 'D7', 'C9' ], workers=1 )
+    assert split.boards == math.comb( 45, 2 )
+    assert split.ties[0] == split.ties[1] and split.ties[0] > 900
+    assert abs( sum( split.equity() ) - 1.0 ) < 1e-9
+    flop = equity( [ [ 'SA', 'HA' ], [ 'DK', 'CK' ] ], board=[ 'S2', 'D7', 'C9' ], workers=1 )
+    pooled = equity( [ [ 'SA', 'HA' ], [ 'DK', 'CK' ] ], board=[ 'S2', 'D7', 'C9' ], workers=2 )
+    assert flop.boards == 990 and flop.wins == pooled.wins and flop.ties == pooled.ties
+    assert flop.wins[1] == 83 # a King comes and no Ace: 2 * 43 + 1 - 4
+
+    preflop = equity( [ [ 'SA', 'HA' ], [ 'DK', 'CK' ] ], workers=2 )
+    assert preflop.boards == math.comb( 48, 5 )
+    assert abs( preflop.equity()[0] - 0.8126 ) < 0.0001 # AA against KK, no suit in common
+    suited = equity( [ [ 'SA', 'HA' ], [ 'SK', 'HK' ] ], workers=1 )
+    assert abs( suited.equity()[0] - 0.8264 ) < 0.0001
+
+    # random boards come close to all boards, and the seed repeats them
+    sampled = equity( [ [ 'SA', 'HA' ], [ 'DK', 'CK' ] ], trials=50000, seed=4, workers=1, chunk=20000 )
+    assert sampled.boards == 50000
+    assert abs( sampled.equity()[0] - preflop.equity()[0] ) < 0.01
+    again = equity( [ [ 'SA', 'HA' ], [ 'DK', 'CK' ] ], trials=50000, seed=4, workers=2, chunk=20000 )
+    assert again.wins == sampled.wins
+
+    three = equity( [ [ 'SA', 'HA' ], [ 'DK', 'CK' ], [ 'S7', 'S8' ] ], trials=20000, seed=1, workers=1 )
+    assert three.equity()[0] > three.equity()[2] > 0.1
+
+    for bad in ( dict( hands=[ [ 'SA', 'HA' ] ] ), dict( hands=[ [ 'SA' ], [ 'HA', 'HK' ] ] ),
+                 dict( hands=[ [ 'SA', 'HA' ], [ 'SA', 'HK' ] ] ),
+                 dict( hands=[ [ 'SA', 'HA' ], [ 'DK', 'CK' ] ], board=[ 'S2' ] * 6 ) ) :
+        try :
+            equity( **bad )
+            assert False
+        except ValueError :
+            pass
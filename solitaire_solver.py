@@ -0,0 +1,396 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+Module solitaire_solver defines a search engine for solitaire (patience)
+games that does not depend on the rules of any one game.
+
+A game makes itself searchable by supplying a subclass of SearchRules, which
+tells the engine how to list the moves in a position, how to make a move,
+how to reduce a position to a hashable key, and how to recognize a won
+position. The engine never looks inside a position; it only passes positions
+back to the rules. Positions are normally game objects built on the Pile and
+Card classes of suit_card_deck, for example a Klondike or a FreeCell object.
+
+The Solver class runs a depth-first search under an iterative-deepening
+depth limit, remembering refuted positions in a TranspositionTable so that
+a position reached again by a different order of moves is not searched
+twice, and never returning to a position already on the path being
+searched, since a cycle of moves cannot lead anywhere new.
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+__all__ = [ 'SearchRules', 'TranspositionTable', 'Solver' ]
+
+from typing import Collection, FrozenSet, Hashable, List, Optional, Tuple
+
+class SearchRules():
+    '''
+    The interface between the Solver and the rules of one game. Subclass
+    this and override every method.
+
+    moves( position ) -> list of moves, best first
+
+        Every legal move in the position. The Solver tries them in the order
+        given, so putting the most promising moves first makes it faster.
+        A move can be any object the play() method understands.
+
+    play( position, move ) -> position
+
+        The position that results from making move in position. The
+        argument position must not be modified, because the Solver will
+        try the other moves from it.
+
+    key( position ) -> hashable
+
+        A value that is equal for two positions exactly when the positions
+        are the same for the purpose of the search. A smaller key makes a
+        smaller transposition table.
+
+    solved( position ) -> bool
+
+        True when the game has been won in position.
+
+    dead( position ) -> bool
+
+        True when position can be proved lost without searching it, so the
+        Solver refutes it at once. It must never be True for a position
+        from which a win is possible. Overriding it is optional; by
+        default no position is dead.
+    '''
+
+    def moves( self, position ) -> List :
+        raise NotImplementedError
+
+    def play( self, position, move ) :
+        raise NotImplementedError
+
+    def key( self, position ) -> Hashable :
+        raise NotImplementedError
+
+    def solved( self, position ) -> bool :
+        return False
+
+    def dead( self, position ) -> bool :
+        return False
+
+class TranspositionTable():
+    '''
+    Remembers positions that have been searched without finding a win.
+
+    For each position key the table holds the greatest depth to which that
+    position was searched and refuted. A later visit to the same position
+    with no more than that depth remaining cannot succeed, so the search
+    is cut off there.
+
+    A refutation can also depend on the line of play that led to the
+    position: the search never returns to a position on that line, so some
+    moves were refused only because they led back to it. Such an entry
+    carries the keys of those positions, its needs, and holds only while
+    each of them is on the line being searched or is refuted in the table
+    in its turn, since either way a move to it cannot lead to a win.
+
+    The table holds at most capacity entries. When it is full, new
+    positions are not stored, but existing entries can still be replaced.
+
+    lookup( key, depth, on_path=() ) -> None, or ( depth, needs ) if an
+        entry refutes key to depth or more and its needs are met, where
+        depth is the least depth of the entries that refutation rests on
+        and needs are the keys in on_path that it needs
+
+    refuted( key, depth, on_path=() ) -> bool, True if lookup() finds one
+
+    store( key, depth, needs=frozenset() ) record that key was refuted to
+        depth while the positions needs were on the line
+
+    hits, stores: counts of successful lookups and of entries written
+    '''
+
+    __slots__ = ( '_table', 'capacity', 'hits', 'stores' )
+
+    NO_NEEDS = frozenset()
+
+    def __init__( self, capacity:int = 1 << 22 ) :
+        self._table = dict()
+        self.capacity = capacity
+        self.hits = 0
+        self.stores = 0
+
+    def __len__( self ) -> int :
+        return len( self._table )
+
+    def lookup( self, key:Hashable, depth:int,
+                on_path:Collection = () ) -> Optional[Tuple[int,FrozenSet]] :
+        entry = self._table.get( key )
+        if entry is None or entry[0] < depth :
+            return None
+        proof = [ entry[0], set() ]
+        if not self._met( entry[1], depth - 1, on_path, { key }, dict(), proof ) :
+            return None
+        self.hits += 1
+        return proof[0], frozenset( proof[1] )
+
+    def _met( self, needs:FrozenSet, depth:int, on_path:Collection,
+              checking:set, met:dict, proof:list ) -> bool :
+        '''
+        True if every one of needs is on the line, or is itself refuted
+        to depth by an entry whose needs are met in turn. checking holds
+        the keys whose needs are being checked, and met maps the keys
+        found met so far to the depth they were met to. A need that is
+        being checked closes a cycle, which is met only if the need was
+        refuted at any depth: positions refuted at any depth that need
+        only each other cannot lead to a win, since the last of them on a
+        winning line would have found it. proof collects the least depth
+        of the entries used and the needs found on the line.
+        '''
+        for need in needs :
+            if need in on_path :
+                proof[1].add( need )
+                continue
+            if met.get( need, -1 ) >= depth :
+                continue
+            entry = self._table.get( need )
+            if entry is None or entry[0] < depth :
+                return False
+            if need in checking :
+                if entry[0] < DEAD :
+                    return False
+                continue
+            checking.add( need )
+            if not self._met( entry[1], depth - 1, on_path, checking, met, proof ) :
+                return False
+            checking.discard( need )
+            met[ need ] = depth
+            proof[0] = min( proof[0], entry[0] )
+        return True
+
+    def refuted( self, key:Hashable, depth:int, on_path:Collection = () ) -> bool :
+        return self.lookup( key, depth, on_path ) is not None
+
+    def store( self, key:Hashable, depth:int, needs:FrozenSet = NO_NEEDS ) :
+        table = self._table
+        old = table.get( key )
+        if old is None :
+            if len( table ) >= self.capacity :
+                return
+        elif old[0] >= depth and old[1] <= needs :
+            return # the old entry holds wherever the new one would
+        table[ key ] = ( depth, needs )
+        self.stores += 1
+
+    def clear( self ) :
+        self._table.clear()
+        self.hits = 0
+        self.stores = 0
+
+# the depth stored for a position refuted at any depth
+DEAD = 1 << 30
+
+class Solver():
+    '''
+    Search for a winning sequence of moves, using the rules of one game.
+
+    solver = Solver( rules, table=None, node_limit=None )
+
+        rules is a SearchRules object. If table is omitted a new, empty
+        TranspositionTable is made. The search gives up after visiting
+        node_limit positions, if one is given.
+
+    solver.solve( position, max_depth=200, first_depth=16 ) -> list or None
+
+        Returns the list of moves that wins from position, or None when no
+        win was found. The search is repeated with the depth limit doubled
+        each time, starting at first_depth and ending at max_depth, so a
+        short solution is found without searching deeply, and the table
+        entries from each iteration save work in the next.
+
+        After solve() returns, solver.nodes is the number of positions
+        visited, solver.dead the number of them that rules.dead() refuted,
+        and solver.limited is True if the node_limit stopped it.
+    '''
+
+    def __init__( self, rules:SearchRules,
+                  table:TranspositionTable = None,
+                  node_limit:int = None ) :
+        self.rules = rules
+        self.table = TranspositionTable() if table is None else table
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.dead = 0
+        self.limited = False
+        self._on_path = set() # the keys of the positions on the line searched
+        self._needs = set()
+        self._bounded = False
+
+    def solve( self, position,
+               max_depth:int = 200, first_depth:int = 16 ) -> Optional[List] :
+        self.nodes = 0
+        self.dead = 0
+        self.limited = False
+        self._on_path = set()
+        self._needs = set()
+        self._bounded = False
+        depth = min( max( 1, first_depth ), max_depth )
+        while True :
+            path = []
+            try :
+                if self._search( position, depth, path ) :
+                    return path
+            except _NodeLimit :
+                self.limited = True
+                return None
+            if depth >= max_depth :
+                return None
+            depth = min( 2 * depth, max_depth )
+
+    def _search( self, position, depth:int, path:List ) -> bool :
+        '''
+        Depth-first search from position with depth moves remaining.
+        On success, path holds the winning moves and True is returned.
+
+        A move back to a position on the line being searched is cut off.
+        A failure that depends on such a cut to a position above this one
+        holds only while that position is on the line, so it is stored in
+        the table with the keys of the positions cut to as its needs.
+        self._needs collects the keys cut to, or needed by the table
+        entries used, in the positions searched since it was last reset.
+
+        In the same way, self._bounded records whether the depth limit cut
+        off any of those positions. A failure that the depth limit played
+        no part in holds at any depth, so it is stored as DEAD, and a
+        position reached again by a shorter line is not searched again.
+        '''
+        rules = self.rules
+        if rules.solved( position ) :
+            return True
+        if depth <= 0 :
+            self._bounded = True
+            return False
+        key = rules.key( position )
+        on_path = self._on_path
+        if key in on_path :
+            self._needs.add( key )
+            return False
+        entry = self.table.lookup( key, depth, on_path )
+        if entry is not None :
+            self._needs |= entry[1]
+            if entry[0] < DEAD :
+                self._bounded = True
+            return False
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit :
+            raise _NodeLimit()
+        if rules.dead( position ) :
+            self.dead += 1
+            self.table.store( key, DEAD )
+            return False
+        on_path.add( key )
+        needs_above = self._needs
+        self._needs = needs = set()
+        bounded_above = self._bounded
+        self._bounded = False
+        for move in rules.moves( position ) :
+            path.append( move )
+            if self._search( rules.play( position, move ), depth-1, path ) :
+                return True
+            path.pop()
+        on_path.discard( key )
+        needs.discard( key )
+        self.table.store( key, depth if self._bounded else DEAD, frozenset( needs ) )
+        needs_above |= needs
+        self._needs = needs_above
+        self._bounded = self._bounded or bounded_above
+        return False
+
+class _NodeLimit( Exception ) :
+    ''' raised inside Solver._search to unwind when node_limit is reached '''
+    pass
+
+'''
+Test code: a toy game in which a counter must be moved to a target
+value by adding 1 or 3, with the moves listed worst first.
+'''
+
+if __name__ == '__main__' :
+
+    class CountRules( SearchRules ) :
+        def moves( self, position ) :
+            return [ 1, 3 ] if position < 10 else []
+        def play( self, position, move ) :
+            return position + move
+        def key( self, position ) :
+            return position
+        def solved( self, position ) :
+            return position == 10
+
+    S = Solver( CountRules() )
+    path = S.solve( 0, first_depth=1 )
+    assert sum( path ) == 10
+    assert len( path ) == 4 # iterative deepening finds the shortest
+    assert S.solve( 11 ) is None
+    S = Solver( CountRules(), node_limit=3 )
+    assert S.solve( 0, first_depth=20 ) is None
+    assert S.limited
+
+    class PitRules( CountRules ) : # 7 is a pit no path may cross
+        def dead( self, position ) :
+            return position == 7
+
+    S = Solver( PitRules() )
+    path = S.solve( 0, first_depth=1 )
+    assert sum( path ) == 10 and S.dead > 0
+    assert 7 not in [ sum( path[ : j ] ) for j in range( len( path ) + 1 ) ]
+    assert S.table.refuted( 7, 1000 )
+
+    class LoopRules( SearchRules ) : # 0 -> 1, 1 -> 0 or 2, and no win
+        def moves( self, position ) :
+            return [ [ 1 ], [ 0, 2 ], [] ][ position ]
+        def play( self, position, move ) :
+            return move
+        def key( self, position ) :
+            return position
+        def solved( self, position ) :
+            return False
+
+    # 1 failed only because 0 was on the line, so it needs 0; it is
+    # refuted anywhere only because 0 has been refuted since
+    S = Solver( LoopRules() )
+    assert S.solve( 0, max_depth=5, first_depth=5 ) is None
+    assert S.table.refuted( 0, 5 ) and S.table.refuted( 2, 3 )
+    assert S.table.lookup( 1, 4, { 0 } )[1] == { 0 }
+    assert S.table.lookup( 1, 4 )[1] == set()
+    T = TranspositionTable()
+    T.store( 1, 4, frozenset( [ 0 ] ) )
+    assert T.refuted( 1, 4, { 0 } ) and not T.refuted( 1, 4 )
+    T.store( 0, 3 )
+    assert T.refuted( 1, 4 ) and not T.refuted( 1, 5 )
+    T.store( 0, 5, frozenset( [ 1 ] ) ) # a cycle of needs proves nothing
+    assert not T.refuted( 1, 4 )
+    T.store( 0, DEAD, frozenset( [ 1 ] ) ) # unless both hold at any depth
+    assert not T.refuted( 1, 4 )
+    T.store( 1, DEAD, frozenset( [ 0 ] ) )
+    assert T.refuted( 1, 4 ) and T.refuted( 0, 4 )
+
+    T = TranspositionTable( capacity=2 )
+    T.store( 'a', 3 )
+    T.store( 'b', 1 )
+    T.store( 'c', 5 ) # table full, not stored
+    assert len(T) == 2
+    assert T.refuted( 'a', 2 ) and T.refuted( 'a', 3 )
+    assert not T.refuted( 'a', 4 )
+    assert not T.refuted( 'c', 1 )
+    T.store( 'b', 4 ) # deepen existing entry
+    assert T.refuted( 'b', 4 )
+    assert T.hits == 3
+    T.store( 'a', 6, frozenset( 'x' ) ) # deeper, but only with x on the line
+    assert T.refuted( 'a', 6, 'xy' ) and not T.refuted( 'a', 6, 'y' )
+    T.store( 'a', 5, frozenset( 'xy' ) ) # the old entry holds wherever this would
+    assert not T.refuted( 'a', 6, 'y' )
+    T.store( 'a', 2 ) # replaces it, since it holds with nothing on the line
+    assert T.refuted( 'a', 2 ) and not T.refuted( 'a', 6, 'x' )
@@ -24,10 +24,11 @@ The __all__ global defines the set of names that are returned by
 from suit_card_deck import *
 
 '''
-__all__ = [ 'Suit', 'Card', 'Rank', 'Deck', 'Pile', 'Hand',
+__all__ = [ 'Suit', 'Card', 'Rank', 'Deck', 'Pile', 'PileView', 'Hand',
            'CLUB', 'DIAMOND', 'HEART', 'SPADE',
            'EmptyDeckError',
-           'MismatchedDeckError', 'PilingError' ]
+           'MismatchedDeckError', 'PilingError',
+           'sort_hands', 'argsort_hands', 'card_position' ]
 
 '''
 Declare the exceptions raised herein.
@@ -51,10 +52,21 @@ class PilingError( ValueError ) :
     IntEnum for card ranks
     random for shuffle
     typing for typing
+    itertools, os and weakref for pickling, see _deck_id()
+    numbers for card_position(), which takes numpy's integers too
+    numpy if it is available, for argsort_hands
 '''
 from enum import IntEnum
+import itertools
+import numbers
+import os
 import random
-from typing import List
+import weakref
+from typing import List, Tuple
+try :
+    import numpy # optional, used only by argsort_hands()
+except ImportError :
+    numpy = None
 
 class Suit():
 
@@ -168,6 +180,15 @@ class Card():
     position(): int from 0..51, the raw standing of this card in an
         unshuffled deck of 52, from which suit, rank etc are derived
 
+    sort_key( order='position' ) -> int from 0..51, the place of this card
+        when a deck is sorted in the named order:
+            'position' : clubs to spades, deuce to Ace, same as position()
+            'rank' : by rank, deuce to Ace, and by suit within a rank
+            'bridge' : spades, hearts, clubs, diamonds, each from Ace down
+            'low_ace' : clubs to spades, Ace to King
+            'klondike' : by rank, Ace to King, and within a rank in
+                alternating colors, clubs, hearts, spades, diamonds
+
     __str__(): a suit symbol plus name, as "♣9" or "♥Q"
 
     __repr__(): string "Card(n)" where n == position()
@@ -180,7 +201,12 @@ class Card():
     it is legal also to compare a rank() to an int in the range 2..14.
 
     If you want the Suit to figure in the comparison of two Cards (as in
-    Bridge or Hearts), the suit must be tested separately.
+    Bridge or Hearts), the suit must be tested separately, or compare
+    their sort_key() values.
+
+    A Card is never equal to an object that is neither a Card nor an int
+    rank, so a Card can be looked up in a list of mixed objects; ordering
+    comparisons with such objects raise ValueError.
 
     Card objects are hashable, so can be used as keys in a set or dict. The
     hash value is the card's position in an unshuffled deck, e.g. 13 for the
@@ -189,6 +215,9 @@ class Card():
     Decks; but a set will only contain one instance of a given card from a
     given Deck.
 
+    A Card pickles as its position and the identifier of its Deck, not as
+    the whole Deck; see _deck_id() below.
+
     '''
 
     Suits = ( CLUB, DIAMOND, HEART, SPADE ) # references globals above
@@ -196,7 +225,19 @@ class Card():
     Names = ( '2', '3', '4', '5', '6', '7', '8',
               '9', 'T', 'J', 'Q', 'K', 'A' )
 
-    #__slots__ = ['_s', '_p', '_deck' ]
+    # Integer sort keys for each order, indexed by position(); see
+    # sort_key(). The bridge order takes the suits in alternating colors,
+    # spades, hearts, clubs, diamonds, and the klondike order takes them
+    # black, red, black, red within each rank.
+    SortKeys = {
+        'position' : tuple( range(52) ),
+        'rank' : tuple( 4*p + s for s in range(4) for p in range(13) ),
+        'bridge' : tuple( 13*(2,3,1,0)[s] + 12-p for s in range(4) for p in range(13) ),
+        'low_ace' : tuple( 13*s + (p+1)%13 for s in range(4) for p in range(13) ),
+        'klondike' : tuple( 4*((p+1)%13) + (0,3,1,2)[s] for s in range(4) for p in range(13) )
+        }
+
+    __slots__ = ( '_pos', '_s', '_p', '_deck' )
 
     def __init__( self, position, deck = None ) :
         assert 0 <= position <= 51
@@ -244,40 +285,49 @@ class Card():
 
     def __lt__( self, other ) -> bool :
         if isinstance( other, Card ) :
-            return self.rank() < other.rank()
+            return self._p < other._p
         elif isinstance( other, int) and 1 < other < 15 :
-            return self.rank() < Rank( other )
+            return 2+self._p < other
         else :
             raise ValueError("Cannot compare Card and non-Card")
 
     def __eq__( self, other ) -> bool :
         if isinstance( other, Card ) :
-            return self.rank() == other.rank()
+            return self._p == other._p
         elif isinstance( other, int) and 1 < other < 15 :
-            return self.rank() == Rank( other )
+            return 2+self._p == other
         else :
-            raise ValueError("Cannot compare Card and non-Card")
+            return NotImplemented # so a Card is simply unequal to others
 
     def __gt__( self, other ) -> bool :
         if isinstance( other, Card ) :
-            return self.rank() > other.rank()
+            return self._p > other._p
         elif isinstance( other, int) and 1 < other < 15 :
-            return self.rank() > Rank( other )
+            return 2+self._p > other
         else :
             raise ValueError("Cannot compare Card and non-Card")
 
     def __le__( self, other ) -> bool :
-        return self.__lt__( other ) or self.__eq__( other )
+        return not self.__gt__( other )
 
     def __ge__( self, other ) -> bool :
-        return self.__gt__( other ) or self.__eq__( other )
+        return not self.__lt__( other )
 
     def __ne__( self, other ) -> bool :
-        return self.__gt__( other ) or self.__lt__( other )
+        equal = self.__eq__( other )
+        return equal if equal is NotImplemented else not equal
+
+    def sort_key( self, order:str = 'position' ) -> int :
+        return Card.SortKeys[ order ][ self._pos ]
 
     def __hash__( self ) :
         return self._pos +id(self._deck)
 
+    def __reduce__( self ) :
+        if self._deck is None :
+            return ( Card, ( self._pos, ) )
+        return ( _card, ( _deck_id( self._deck ), self._pos ) )
+
 class Pile() :
     '''
     The class of a set of 0 or more cards deposited in some order.
@@ -311,13 +361,32 @@ class Pile() :
     with the returned Cards other than test or display them (for example if you
     put them back in a deck or in another Pile) you risk raising errors later.
 
-    sort( reverse=False ) -> int
+    A Pile iterates over its cards from top to bottom, and reversed( apile )
+    from bottom to top, without copying them. To look at part of a Pile
+    without the list a slice makes, ask for a PileView:
+
+    top( n ) -> PileView, the top n cards, apile[0:n]
+
+    bottom( n ) -> PileView, the bottom n cards, apile[-n:]
+
+    view( start=0, stop=None ) -> PileView, apile[start:stop]
+
+    sort( reverse=False, order='position' ) -> int
 
         Sorts the cards in the pile into ascending or descending
-        (reverse==True) order, by rank within suit. This is a change in the
-        state of the pile, assuming it was initially dealt at random. Use it
-        to, for example, arrange a hand for display. Returns the number of
-        cards in the pile.
+        (reverse==True) order, by default by rank within suit. The order can
+        be any of the names accepted by Card.sort_key(), for example
+        'bridge' to arrange a bridge hand. This is a change in the state of
+        the pile, assuming it was initially dealt at random. Use it to, for
+        example, arrange a hand for display. Returns the number of cards in
+        the pile.
+
+    copy() -> Pile
+
+        Returns a new Pile with the same flag holding the same Card objects
+        in the same sequence. The Cards are shared, not copied, so this is
+        cheap; it is meant for game positions that are copied while
+        searching for a move.
 
     turn_over() -> int
 
@@ -346,9 +415,15 @@ class Pile() :
         containing those cards. If there are not n cards in the pile, raises
         PilingError.
 
+    The Pile supports the in operator: card in apile is True when apile
+    holds a Card of the same position (so, same suit and rank).
+
     The Pile does not support comparison. It does support default hashing
     so you can have a dictionary or set of Piles.
 
+    A Pile whose cards all come from one Deck pickles as its flag, the
+    Deck's identifier and one byte per card.
+
     '''
 
     __slots__ = ( "_cards", "_flag" )
@@ -364,13 +439,56 @@ class Pile() :
         ''' implement indexing '''
         return self._cards.__getitem__( key )
 
+    def __iter__( self ) :
+        return iter( self._cards )
+
+    def __reversed__( self ) :
+        return reversed( self._cards )
+
+    def __contains__( self, card ) -> bool :
+        if isinstance( card, Card ) :
+            position = card._pos
+            for c in self._cards :
+                if c._pos == position :
+                    return True
+        return False
+
     def flag( self ) -> object :
         return self._flag
 
-    def sort( self, reverse:bool = False ) -> int :
-        self._cards.sort( key = Card.position, reverse=reverse )
+    def top( self, n:int ) -> PileView :
+        return PileView( self, 0, max( 0, min( n, len( self._cards ) ) ) )
+
+    def bottom( self, n:int ) -> PileView :
+        size = len( self._cards )
+        return PileView( self, size - max( 0, min( n, size ) ), size )
+
+    def view( self, start:int = 0, stop:int = None ) -> PileView :
+        start, stop, _ = slice( start, stop ).indices( len( self._cards ) )
+        return PileView( self, start, max( start, stop ) )
+
+    def sort( self, reverse:bool = False, order:str = 'position' ) -> int :
+        if order == 'position' :
+            self._cards.sort( key = Card.position, reverse=reverse )
+        else :
+            keys = Card.SortKeys[ order ]
+            self._cards.sort( key = lambda card : keys[ card._pos ], reverse=reverse )
         return len( self._cards )
 
+    def copy( self ) -> Pile :
+        new_pile = Pile( self._flag )
+        new_pile._cards = self._cards[:]
+        return new_pile
+
+    def __reduce__( self ) :
+        cards = self._cards
+        if cards and cards[0]._deck is not None :
+            home = cards[0]._deck
+            if all( card._deck is home for card in cards ) :
+                return ( _pile, ( type( self ), self._flag, _deck_id( home ),
+                                  bytes( [ card._pos for card in cards ] ) ) )
+        return ( _pile, ( type( self ), self._flag, None, cards ) )
+
     def turn_over( self ) :
         self._cards = list( reversed( self._cards ) )
         return len( self._cards )
@@ -471,6 +589,69 @@ class Pile() :
         else:
             raise PilingError( "Cannot take more cards than exist in a Pile" )
 
+class PileView() :
+    '''
+    A read-only window on the cards apile[start:stop] of a Pile, made by
+    its top(), bottom() and view() methods. A view holds the Pile and its
+    bounds, not a list of the cards, so making one does not copy, and
+    neither do indexing, iterating or len() on it.
+
+    len( view ), view[n] (the Nth card of the view, counting from its
+    first, negative from its last), view[x:y] (a narrower PileView),
+    iteration, reversed( view ) and card in view work as they would on
+    the list apile[start:stop].
+
+    The bounds are fixed when the view is made, and the cards are read
+    when the view is used, so after the Pile changes, the view shows what
+    is then at those places, and no more than the Pile holds. Make views
+    to test or display cards, and make them again after a move.
+    '''
+
+    __slots__ = ( '_pile', '_start', '_stop' )
+
+    def __init__( self, pile:Pile, start:int, stop:int ) :
+        self._pile = pile
+        self._start = start
+        self._stop = stop
+
+    def _end( self ) -> int :
+        return max( self._start, min( self._stop, len( self._pile._cards ) ) )
+
+    def __len__( self ) -> int :
+        return self._end() - self._start
+
+    def __getitem__( self, key ) :
+        if isinstance( key, slice ) :
+            places = range( self._start, self._end() )[ key ]
+            if places.step != 1 :
+                raise ValueError( 'a PileView slice cannot have a step' )
+            return PileView( self._pile, places.start, max( places.start, places.stop ) )
+        end = self._end()
+        index = key + end if key < 0 else key + self._start
+        if not self._start <= index < end :
+            raise IndexError( 'PileView index out of range' )
+        return self._pile._cards[ index ]
+
+    def __iter__( self ) :
+        return itertools.islice( self._pile._cards, self._start, self._end() )
+
+    def __reversed__( self ) :
+        cards = self._pile._cards
+        size = len( cards )
+        return itertools.islice( reversed( cards ), max( 0, size - self._end() ),
+                                 max( 0, size - self._start ) )
+
+    def __contains__( self, card ) -> bool :
+        if isinstance( card, Card ) :
+            position = card._pos
+            for c in self :
+                if c._pos == position :
+                    return True
+        return False
+
+    def __repr__( self ) :
+        return 'PileView([{}])'.format( ', '.join( str( card ) for card in self ) )
+
 class Hand( Pile ): # an alias
     pass
 
@@ -504,6 +685,22 @@ class Deck():
     A card that has been dealt from this deck can be returned to the
     deck, where it is put on the bottom. This decrements _top.
 
+    order() returns the positions of the undealt Cards, top first, and
+    arrange( positions ) puts the undealt Cards in the order given, for
+    example to deal a known deal from a new Deck.
+
+    A Deck can be copied with copy(). The copy has its own access array
+    and top, so it deals independently, but it shares the 52 Card objects
+    with the original, and either one accepts back Cards dealt by the
+    other. This makes copying a game position cheap.
+
+    A Deck is not safe to deal from in more than one thread at once, as
+    deal() reads and then advances _top. Give each thread its own copy().
+
+    A Deck pickles as the identifier of its Cards, its access array as
+    bytes, and its top. See _deck_id() for how Cards find their Deck again
+    when they are unpickled.
+
     All the cards of a Pile can be returned to the Deck from which the Pile
     was dealt. The cards are added to the bottom of the Deck. Note this
     operation has the side-effect that it empties the Pile.
@@ -526,7 +723,7 @@ class Deck():
     times argument to shuffle, defaulting to once.
 
     '''
-    __slots__ = ( '_access', '_cards', '_top' )
+    __slots__ = ( '_access', '_cards', '_top', '_id', '__weakref__' )
     ex_text_1 = 'Cannot deal from empty deck'
     ex_text_2 = 'shuffling empty deck'
     ex_text_3 = 'Cannot return a card to a different deck'
@@ -544,6 +741,7 @@ class Deck():
         self._access = list( range(52) )
         self._cards = [ Card(p, self) for p in self._access ]
         self._top = 0
+        self._id = None # given when first pickled, see _deck_id()
 
     def _cards_left ( self ) :
         '''factor out a simple calculation'''
@@ -552,6 +750,21 @@ class Deck():
     def __len__ ( self ) :
         return self._cards_left()
 
+    def copy( self ) -> Deck :
+        '''
+        Return a Deck that will deal the same sequence of Cards from the
+        same point as this one, sharing this Deck's Card objects.
+        '''
+        new_deck = Deck.__new__( Deck )
+        new_deck._access = list( self._access )
+        new_deck._cards = self._cards
+        new_deck._top = self._top
+        new_deck._id = None
+        return new_deck
+
+    def __reduce__( self ) :
+        return ( _deck, ( _deck_id( self ), bytes( self._access ), self._top ) )
+
     def deal( self ) -> Card :
         '''
         Return the topmost card of the Deck.
@@ -583,6 +796,28 @@ class Deck():
         self.deal_to_pile(count,pile)
         return pile
 
+    def order( self ) -> List[int] :
+        ''' the positions of the undealt Cards, top first '''
+        return self._access[ self._top : ]
+
+    def arrange( self, positions ) -> int :
+        '''
+        Put the undealt Cards in the order given by positions, a sequence
+        of their card positions, top first.
+
+        Args:
+            positions: the positions (0..51) of the undealt Cards, each once
+        Returns:
+            int: number of Cards in the Deck
+        Raises:
+            ValueError when positions are not exactly the undealt Cards
+        '''
+        order = [ int( p ) for p in positions ]
+        if sorted( order ) != sorted( self._access[ self._top : ] ) :
+            raise ValueError( 'arrange() takes the positions of the undealt cards' )
+        self._access[ self._top : ] = order
+        return len( order )
+
     def shuffle( self, times:int = 1 ) :
         '''
         Permute the access array for the undealt portion of the Deck
@@ -667,7 +902,9 @@ class Deck():
             int: number of Cards now in Deck
         '''
 
-        if card._deck is not self :
+        # A Card belongs to this Deck (or a copy of it) when it is the very
+        # Card object at its position in our list of Cards.
+        if self._cards[ card._pos ] is not card :
             raise MismatchedDeckError( Deck.ex_text_3 )
 
         # Has it been dealt?
@@ -703,6 +940,119 @@ class Deck():
             self.put_back_card( pile.remove() )
         return self._cards_left()
 
+'''
+Pickling.
+
+Every Card made by a Deck refers to that Deck, so by default pickling one
+Card would pickle the Deck and all 52 of its Cards. Instead, the Deck that
+made a set of Cards (the "home" Deck, which its copies share the Cards of)
+is given an identifier the first time any of them is pickled, and is
+registered under it. A Card pickles as ( identifier, position ), a Pile as
+the identifier and its positions, a Deck as the identifier and its access
+array.
+
+When they are unpickled, the identifier is looked up in the registry of the
+receiving process. If the home Deck is there, the Cards are its own Card
+objects, so Cards sent to a worker process and back are the very Cards
+that were sent, and can be put back in their Deck. If not, a new home Deck
+is made and registered under the identifier, and everything unpickled
+later with the same identifier shares its Cards, as a Deck and the Piles
+dealt from it would. An unpickled Deck is that new home Deck, or a copy()
+of the one already registered.
+
+The same applies to copy.copy() and copy.deepcopy(), which use these
+methods: a copied Card is the same Card, and a copied Pile or Deck shares
+its Cards with the original, as Pile.copy() and Deck.copy() do.
+
+The registry holds its Decks weakly, so it keeps no Deck alive. The
+identifier includes the process id, so Decks made in different processes,
+including forked workers, do not share one.
+'''
+
+_decks = weakref.WeakValueDictionary() # identifier -> home Deck
+_deck_numbers = itertools.count( 1 )
+
+def _deck_id( deck:Deck ) -> int :
+    ''' the identifier of the home Deck of deck's Cards, given if need be '''
+    home = deck._cards[0]._deck
+    if home._id is None :
+        home._id = ( os.getpid() << 32 ) | next( _deck_numbers )
+        _decks[ home._id ] = home
+    return home._id
+
+def _home_deck( deck_id:int ) -> Tuple[Deck, bool] :
+    ''' the home Deck registered as deck_id, and True if it was just made '''
+    home = _decks.get( deck_id )
+    if home is not None :
+        return home, False
+    home = Deck()
+    home._id = deck_id
+    _decks[ deck_id ] = home
+    return home, True
+
+def _card( deck_id:int, position:int ) -> Card :
+    return _home_deck( deck_id )[0]._cards[ position ]
+
+def _pile( pile_class:type, flag:object, deck_id:int, cards ) -> Pile :
+    pile = pile_class( flag )
+    if deck_id is None :
+        pile._cards = list( cards )
+    else :
+        home_cards = _home_deck( deck_id )[0]._cards
+        pile._cards = [ home_cards[ p ] for p in cards ]
+    return pile
+
+def _deck( deck_id:int, access:bytes, top:int ) -> Deck :
+    home, made = _home_deck( deck_id )
+    deck = home if made else home.copy()
+    deck._access = list( access )
+    deck._top = top
+    return deck
+
+def sort_hands( hands:List[Pile], reverse:bool = False, order:str = 'position' ) -> int :
+    '''
+    Sort each of a list of Piles as by Pile.sort(). Returns the total number
+    of cards sorted.
+    '''
+    count = 0
+    for hand in hands :
+        count += hand.sort( reverse, order )
+    return count
+
+def argsort_hands( hands, reverse:bool = False, order:str = 'position' ) :
+    '''
+    Given many hands, each a sequence of card positions (0..51), return for
+    each hand the indices that would arrange it in the named order, as from
+    Card.sort_key(). The hands need not be the same length.
+
+    When numpy is installed and hands is a two-dimensional numpy array (one
+    hand per row) the whole array is sorted at once and the result is an
+    array of the same shape. Otherwise the result is a list of lists.
+    '''
+    keys = Card.SortKeys[ order ]
+    if numpy is not None and isinstance( hands, numpy.ndarray ) :
+        indices = numpy.argsort( numpy.asarray( keys )[ hands ], axis=-1, kind='stable' )
+        return indices[ ..., ::-1 ] if reverse else indices
+    return [ sorted( range( len(hand) ), key = lambda j : keys[ hand[j] ], reverse=reverse )
+             for hand in hands ]
+
+def card_position( card ) -> int :
+    '''
+    The position of a Card, of a position (any integer, numpy's too), or
+    of a name such as 'SA' or 'HT', suit initial then card name. Raises
+    ValueError for anything else.
+    '''
+    if isinstance( card, Card ) :
+        return card.position()
+    if isinstance( card, numbers.Integral ) and 0 <= card <= 51 :
+        return int( card )
+    if isinstance( card, str ) and len( card ) == 2 :
+        initials = [ suit.initial() for suit in Card.Suits ]
+        suit, name = card[0].upper(), card[1].upper()
+        if suit in initials and name in Card.Names :
+            return initials.index( suit ) * 13 + Card.Names.index( name )
+    raise ValueError( 'Not a card: ' + repr( card ) )
+
 '''
 Test code, pure tedium
 '''
@@ -762,6 +1112,21 @@ if __name__ == '__main__' :
     assert not C[0] > C[1] # test that they do return false
     assert not C[5] > 8
     assert not C[0] == C[1]
+    assert C[0] != C[1] and not C[0] != C[13]
+    assert C[0] != None and not C[0] == 'x' # non-Cards are simply unequal
+    assert C[3] in [ None, 'x', C[3] ]
+    try :
+        x = C[0] < 'x'
+        assert False
+    except ValueError :
+        pass
+    for order, keys in Card.SortKeys.items() :
+        assert sorted( keys ) == list( range(52) ), order
+    assert C[12].sort_key( 'rank' ) == 48 # club Ace
+    assert C[51].sort_key( 'bridge' ) == 0 # spade Ace
+    assert C[13].sort_key( 'bridge' ) == 51 # diamond deuce
+    assert C[12].sort_key( 'low_ace' ) == 0 and C[0].sort_key( 'low_ace' ) == 1
+    assert C[12].sort_key( 'klondike' ) == 0 and C[38].sort_key( 'klondike' ) == 1 # ♣A, ♥A
     '''
     Testing Deck, Bugs: 1 2
     '''
@@ -841,6 +1206,20 @@ if __name__ == '__main__' :
     except MismatchedDeckError as e :
         assert str(e) == Deck.ex_text_4
 
+    D1 = Deck()
+    D1.shuffle()
+    C1 = D1.deal()
+    D2 = D1.copy()
+    assert len(D2) == 51 and D2._cards is D1._cards
+    assert D2.deal() is D1.deal() # same sequence, same Cards
+    assert 51 == D2.put_back_card( C1 ) # copy accepts the original's Card
+    assert len(D1) == 50
+    try :
+        D2.put_back_card( Deck().deal() )
+        assert False
+    except MismatchedDeckError as e :
+        assert str(e) == Deck.ex_text_3
+
     D1 = Deck()
     D2 = Deck()
     random.seed(4095)
@@ -856,6 +1235,18 @@ if __name__ == '__main__' :
         c2 = D2.deal()
         assert c1 == c2 and c1.suit() == c2.suit()
     D3 = Deck()
+    # stacking a deck: all 52, then the rest of a dealt one
+    assert D3.arrange( range( 51, -1, -1 ) ) == 52
+    assert D3.deal().position() == 51 and D3.order() == list( range( 50, -1, -1 ) )
+    D3.arrange( [ 0 ] + list( range( 1, 51 ) ) )
+    assert [ D3.deal().position() for _ in range(3) ] == [ 0, 1, 2 ] and len( D3 ) == 48
+    for bad in ( [ 51 ] + list( range( 4, 51 ) ), list( range( 3, 50 ) ), [ 3 ] * 48 ) :
+        try :
+            D3.arrange( bad )
+            assert False, 'arrange() accepted cards that are not undealt'
+        except ValueError :
+            pass
+    assert D3.order() == list( range( 3, 51 ) )
     '''
     Testing Pile and Deck
     '''
@@ -962,3 +1353,105 @@ if __name__ == '__main__' :
     dump_pile(P2, 'turned')
     for j in range(1,13) :
         assert P2[j].position() > P2[j-1].position()
+    assert P2[0] in P2 and Card( P2[0].position() ) in P2
+    assert not ( D2.deal() in P2 ) and not ( 'x' in P2 )
+    for order in Card.SortKeys :
+        P2.sort( order=order )
+        for j in range(1,13) :
+            assert P2[j].sort_key( order ) > P2[j-1].sort_key( order )
+        P2.sort( reverse=True, order=order )
+        for j in range(1,13) :
+            assert P2[j].sort_key( order ) < P2[j-1].sort_key( order )
+    hands = [ [ c.position() for c in P2 ], [ 51, 0, 12 ] ]
+    assert argsort_hands( hands, order='low_ace' )[1] == [ 2, 1, 0 ]
+    indices = argsort_hands( hands, order='bridge' )[0]
+    P2.sort( order='bridge' )
+    assert [ hands[0][j] for j in indices ] == [ c.position() for c in P2 ]
+    if numpy is not None :
+        array = numpy.array( [ hands[1], [ 13, 26, 39 ] ] )
+        assert argsort_hands( array, order='rank' ).tolist() == [ [1,2,0], [0,1,2] ]
+        assert argsort_hands( array, True, 'rank' ).tolist() == [ [0,2,1], [2,1,0] ]
+    assert 13 == sort_hands( [ P2 ] )
+
+    assert card_position( 'SA' ) == 51 and card_position( 'c2' ) == 0
+    assert card_position( 'HT' ) == 34 and card_position( Card( 7 ) ) == 7
+    for bad in ( 'XA', 'S1', 52, 'SAK' ) :
+        try :
+            card_position( bad )
+            assert False
+        except ValueError :
+            pass
+    if numpy is not None :
+        assert card_position( numpy.int64( 0 ) ) == 0 and card_position( numpy.uint8( 51 ) ) == 51
+        assert type( card_position( numpy.uint8( 51 ) ) ) is int
+    assert P2[0].position() < P2[1].position()
+    P3 = P2.copy()
+    assert len(P3) == 13 and P3.flag() is P2.flag()
+    assert P3[0] is P2[0] # same Card objects
+    P3.remove()
+    assert len(P3) == 12 and len(P2) == 13
+
+    '''
+    Testing iteration and views
+    '''
+    cards = P2[:]
+    assert list( P2 ) == cards and list( reversed( P2 ) ) == cards[::-1]
+    for start, stop in ( (0,13), (0,5), (3,9), (-4,None), (5,-2), (9,3), (20,30), (-20,2) ) :
+        V = P2.view( start, stop )
+        part = cards[ start : stop ]
+        assert len( V ) == len( part ) and list( V ) == part
+        assert list( reversed( V ) ) == part[::-1]
+        assert [ V[j] for j in range( -len( part ), len( part ) ) ] == part + part
+        assert list( V[1:-1] ) == part[1:-1] and list( V[-2:] ) == part[-2:]
+        assert all( card in V for card in part )
+        assert not any( card in V for card in cards if card not in part )
+        for bad in ( len( part ), -len( part ) - 1 ) :
+            try :
+                V[ bad ]
+                assert False, 'view index out of range accepted'
+            except IndexError :
+                pass
+    assert list( P2.top( 4 ) ) == cards[:4] and list( P2.top( 40 ) ) == cards
+    assert list( P2.bottom( 4 ) ) == cards[-4:] and len( P2.bottom( 0 ) ) == 0
+    assert len( P2.top( -1 ) ) == 0 and len( Pile().view() ) == 0
+    # the bounds stay, the cards are read when used
+    V = P2.top( 3 )
+    P2.remove()
+    assert list( V ) == cards[1:4]
+    V = P2.bottom( 2 )
+    for j in range(12) : P2.remove()
+    assert len( V ) == 0 and list( V ) == [] and list( reversed( V ) ) == []
+    P2.receive( cards[0] )
+    assert str( P2.view() ) == 'PileView([{}])'.format( cards[0] )
+
+    '''
+    Testing pickling
+    '''
+    import pickle
+    D4 = Deck()
+    D4.shuffle()
+    P4 = D4.deal_pile( 13 )
+    C4 = D4.deal()
+    assert len( pickle.dumps( C4 ) ) < 100 and len( pickle.dumps( P4 ) ) < 150
+    assert len( pickle.dumps( D4 ) ) < 200
+    assert pickle.loads( pickle.dumps( C4 ) ) is C4 # the same Card comes back
+    P5 = pickle.loads( pickle.dumps( P4 ) )
+    assert P5 is not P4 and all( P5[j] is P4[j] for j in range(13) )
+    D5 = pickle.loads( pickle.dumps( D4 ) )
+    assert D5._cards is D4._cards and len( D5 ) == 38
+    assert D5.deal() is D4.deal()
+    D4.put_back_pile( P5 )
+    assert len( D4 ) == 50
+    assert pickle.loads( pickle.dumps( Card( 7 ) ) ) == Card( 7 )
+    H4 = pickle.loads( pickle.dumps( Hand( 'N' ) ) )
+    assert type( H4 ) is Hand and H4.flag() == 'N' and len( H4 ) == 0
+
+    # as in a process that has not seen D4: the Cards find a new Deck in common
+    data = pickle.dumps( ( D4, D4.deal_pile( 5 ), D4.deal() ) )
+    _decks.clear()
+    D6, P6, C6 = pickle.loads( data )
+    assert D6._cards is not D4._cards and C6 is D6._cards[ C6.position() ]
+    assert D6._access == D4._access and len( D6 ) == len( D4 ) == 44
+    D6.put_back_pile( P6 )
+    D6.put_back_card( C6 )
+    assert len( D6 ) == 50
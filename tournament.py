@@ -0,0 +1,316 @@
+#!/usr/bin/python
+# -*- coding: UTF8 -*-
+'''
+
+Module tournament compares automatic Klondike players on the same deals.
+
+A player is any object with a method choose( game ) that returns a command
+for game.play(), or None to give up, as klondike_mcts.MCTSPlayer does. Two
+simple players are defined here: GreedyPlayer, which plays to the
+foundations, then moves that turn up a card or take a card from the pack,
+else turns the deck; and RandomPlayer, which picks any legal move.
+
+Every player plays every seed, so the players are compared on the same
+deals. For each pair of players the difference of their results on each
+seed (1, 0 or -1) is a paired sample, and its mean, the difference in win
+rate, has a much smaller standard error than the difference of two win
+rates measured on different deals.
+
+    standings = run_tournament( { 'greedy' : GreedyPlayer(),
+                                  'mcts' : MCTSPlayer( time_limit=0.1 ) },
+                                seeds=range( 1, 5001 ), workers=8 )
+    print( standings.report() )
+
+Seeds are played in batches on a pool of worker processes. The batches are
+taken in order, and after each the tournament stops early if it has played
+at least min_games and every pair's confidence interval, the mean difference
+plus or minus z standard errors, leaves out zero. Looking again after every
+batch makes a chance difference more likely to be taken for a real one, so z
+defaults to 3 rather than the 1.96 of a single look.
+
+A game ends when it is won, when the player returns None, after max_moves
+moves, or after stall_limit moves in a row in which no card reaches a
+foundation and no face-down card is turned up.
+
+    LICENSE
+
+This work is licensed under the Creative Commons
+Attribution-NonCommercial-ShareAlike 4.0 International License.
+To view a copy of this license, visit
+http://creativecommons.org/licenses/by-nc-sa/4.0/.
+
+'''
+
+from __future__ import annotations
+
+__all__ = [ 'GreedyPlayer', 'RandomPlayer', 'play_game', 'PlayerRecord',
+            'PairedDifference', 'Standings', 'run_tournament' ]
+
+from klondike import Klondike
+import itertools
+import math
+import multiprocessing
+import random
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class GreedyPlayer() :
+    '''
+    Play the first move to a foundation, else the first move that brings
+    a card out of the pack or carries all the face-up cards of a pile off
+    its face-down cards, else turn the deck.
+    '''
+
+    def choose( self, game:Klondike ) -> Optional[str] :
+        moves = game.legal_moves()
+        for command in moves :
+            if command[1] in 'CDHS' :
+                return command
+        for command in moves :
+            if command[0] == 'P' :
+                return command
+            if command != 'NN' :
+                source = '1234567'.index( command[0] )
+                pile = game.tableau[ source ]
+                faceup = game.faceup_count[ source ]
+                dest = game.tableau[ '1234567'.index( command[1] ) ]
+                if len( pile ) > faceup and game.can_play_to( pile[ faceup-1 ], dest ) :
+                    return command
+        return 'NN' if 'NN' in moves else None
+
+class RandomPlayer() :
+    '''
+    Play any legal move, chosen with the random module, which Klondike( seed )
+    has seeded, so a game can be repeated.
+    '''
+
+    def choose( self, game:Klondike ) -> Optional[str] :
+        moves = game.legal_moves()
+        return random.choice( moves ) if moves else None
+
+def _progress( game:Klondike ) -> int :
+    ''' cards on the foundations plus face-down cards turned up so far '''
+    return game.foundation_cards + 21 - game.face_down_total
+
+def play_game( player, seed:int, max_moves:int = 1000,
+               stall_limit:int = 100 ) -> Tuple[bool, int, float] :
+    '''
+    Play Klondike( seed ) with player. Returns ( won, decisions, seconds ),
+    decisions being the number of calls of player.choose() and seconds the
+    time spent in them.
+    '''
+    game = Klondike( seed )
+    decisions = 0
+    seconds = 0.0
+    best = _progress( game )
+    stalled = 0
+    while not game.game_over() and decisions < max_moves and stalled < stall_limit :
+        start = time.perf_counter()
+        command = player.choose( game )
+        seconds += time.perf_counter() - start
+        decisions += 1
+        if command is None :
+            break
+        game.play( command )
+        progress = _progress( game )
+        if progress > best :
+            best = progress
+            stalled = 0
+        else :
+            stalled += 1
+    return game.game_over(), decisions, seconds
+
+class PlayerRecord() :
+    '''
+    The games, wins, decisions and seconds of decision time of one player.
+    '''
+
+    __slots__ = ( 'games', 'wins', 'decisions', 'seconds' )
+
+    def __init__( self ) :
+        self.games = 0
+        self.wins = 0
+        self.decisions = 0
+        self.seconds = 0.0
+
+    def add( self, won:bool, decisions:int, seconds:float ) :
+        self.games += 1
+        self.wins += 1 if won else 0
+        self.decisions += decisions
+        self.seconds += seconds
+
+    def win_rate( self ) -> float :
+        return self.wins / self.games if self.games else 0.0
+
+    def decisions_per_second( self ) -> float :
+        return self.decisions / self.seconds if self.seconds else 0.0
+
+class PairedDifference() :
+    '''
+    Running mean and variance of the per-seed differences between two
+    players, 1 when only the first won, -1 when only the second did, else 0.
+
+    interval( z ) -> ( low, high ), the mean plus or minus z standard errors
+    significant( z ) -> True when that interval leaves out zero
+    '''
+
+    __slots__ = ( 'count', 'mean', '_m2' )
+
+    def __init__( self ) :
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add( self, difference:int ) :
+        self.count += 1
+        delta = difference - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * ( difference - self.mean )
+
+    def stderr( self ) -> float :
+        if self.count < 2 :
+            return 0.0
+        return math.sqrt( self._m2 / ( self.count - 1 ) / self.count )
+
+    def interval( self, z:float ) -> Tuple[float, float] :
+        margin = z * self.stderr()
+        return self.mean - margin, self.mean + margin
+
+    def significant( self, z:float ) -> bool :
+        low, high = self.interval( z )
+        return low > 0 or high < 0
+
+class Standings() :
+    '''
+    The result of a tournament: records, a PlayerRecord per player name;
+    pairs, a PairedDifference for each pair ( first, second ) of names in
+    the order given; games, the number of seeds played; and stopped_early,
+    True if the tournament ended because every difference was significant.
+    report() formats them as a table.
+    '''
+
+    def __init__( self, names:List[str], z:float ) :
+        self.names = names
+        self.z = z
+        self.records = { name : PlayerRecord() for name in names }
+        self.pairs = { pair : PairedDifference()
+                       for pair in itertools.combinations( names, 2 ) }
+        self.games = 0
+        self.stopped_early = False
+
+    def add( self, results:Dict[str, Tuple[bool, int, float]] ) :
+        ''' the results of every player on one seed '''
+        self.games += 1
+        for name, result in results.items() :
+            self.records[ name ].add( *result )
+        for ( first, second ), pair in self.pairs.items() :
+            pair.add( int( results[ first ][0] ) - int( results[ second ][0] ) )
+
+    def significant( self ) -> bool :
+        return all( pair.significant( self.z ) for pair in self.pairs.values() )
+
+    def report( self ) -> str :
+        lines = [ '{} games'.format( self.games )
+                  + ( ', stopped early' if self.stopped_early else '' ) ]
+        for name in self.names :
+            record = self.records[ name ]
+            lines.append( '{:<12} won {:6.2%}  {:10.1f} decisions/sec'.format(
+                name, record.win_rate(), record.decisions_per_second() ) )
+        for ( first, second ), pair in self.pairs.items() :
+            low, high = pair.interval( self.z )
+            lines.append( '{} - {}: {:+.2%} ({:+.2%} to {:+.2%}){}'.format(
+                first, second, pair.mean, low, high,
+                ' *' if pair.significant( self.z ) else '' ) )
+        return '\n'.join( lines )
+
+def _play_batch( task ) -> List[ Dict[str, Tuple[bool, int, float]] ] :
+    ''' play every seed of a batch with every player, results in seed order '''
+    players, seeds, max_moves, stall_limit = task
+    return [ { name : play_game( player, seed, max_moves, stall_limit )
+               for name, player in players.items() }
+             for seed in seeds ]
+
+def run_tournament( players:Dict[str, object], seeds:Iterable[int],
+                    batch:int = 20, workers:int = None, min_games:int = 100,
+                    z:float = 3.0, max_moves:int = 1000,
+                    stall_limit:int = 100 ) -> Standings :
+    '''
+    Play every seed (positive ints) with every player, batch seeds to a
+    task on a pool of worker processes (workers defaults to the number of
+    CPUs; 1 means play in this process). The players are pickled to the
+    workers with each task. Stops when the seeds run out, or early when at
+    least min_games seeds have been played and every pair of players differs
+    significantly at z. Returns the Standings.
+    '''
+    names = list( players )
+    standings = Standings( names, z )
+    seeds = iter( seeds )
+
+    def tasks() :
+        while True :
+            chunk = list( itertools.islice( seeds, batch ) )
+            if not chunk :
+                return
+            yield ( players, chunk, max_moves, stall_limit )
+
+    def merge( batches ) -> Standings :
+        for results in batches :
+            for result in results :
+                standings.add( result )
+            if standings.games >= min_games and standings.significant() :
+                standings.stopped_early = True
+                break
+        return standings
+
+    if workers == 1 :
+        return merge( _play_batch( task ) for task in tasks() )
+    with multiprocessing.Pool( workers ) as pool :
+        # imap, not imap_unordered, so that where it stops does not depend
+        # on which worker finishes first
+        return merge( pool.imap( _play_batch, tasks() ) )
+
+'''
+Test code
+'''
+
+if __name__ == '__main__' :
+
+    won, decisions, seconds = play_game( GreedyPlayer(), 319649 )
+    assert decisions > 0 and seconds > 0
+    first = play_game( RandomPlayer(), 7 )
+    second = play_game( RandomPlayer(), 7 )
+    assert first[:2] == second[:2] # the seed repeats the game
+
+    P = PairedDifference()
+    for d in ( 1, 0, 1, 1, 0, -1, 1, 0 ) :
+        P.add( d )
+    assert P.count == 8 and abs( P.mean - 0.375 ) < 1e-12
+    low, high = P.interval( 2.0 )
+    assert low < 0.375 < high and not P.significant( 2.0 ) and P.significant( 0.5 )
+
+    players = { 'greedy' : GreedyPlayer(), 'random' : RandomPlayer() }
+    serial = run_tournament( players, range( 1, 21 ), batch=6, workers=1, min_games=1000 )
+    assert serial.games == 20 and not serial.stopped_early
+    assert serial.records[ 'greedy' ].games == 20
+    pair = serial.pairs[ ( 'greedy', 'random' ) ]
+    assert pair.count == 20
+    wins = serial.records[ 'greedy' ].wins - serial.records[ 'random' ].wins
+    assert abs( pair.mean - wins / 20 ) < 1e-12
+    assert serial.records[ 'greedy' ].decisions_per_second() > 0
+
+    pooled = run_tournament( players, range( 1, 21 ), batch=6, workers=2, min_games=1000 )
+    assert [ ( r.games, r.wins, r.decisions ) for r in pooled.records.values() ] == \
+           [ ( r.games, r.wins, r.decisions ) for r in serial.records.values() ]
+
+    class Resigner() :
+        def choose( self, game ) :
+            return None
+
+    # a player that never wins is left behind soon enough to stop early
+    players = { 'random' : RandomPlayer(), 'resign' : Resigner() }
+    standings = run_tournament( players, range( 1, 2001 ), batch=25, workers=2,
+                                min_games=50, z=2.0 )
+    assert standings.stopped_early and standings.games < 2000
+    assert standings.pairs[ ( 'random', 'resign' ) ].mean > 0
+    assert standings.records[ 'resign' ].wins == 0
+    assert 'stopped early' in standings.report()